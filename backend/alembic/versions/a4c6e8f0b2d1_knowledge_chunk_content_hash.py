@@ -0,0 +1,44 @@
+"""add content_hash to knowledge_chunks for embedding reuse on re-ingest
+
+Revision ID: a4c6e8f0b2d1
+Revises: f2b8c4d6a1e3
+Create Date: 2026-10-16 02:00:00.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c6e8f0b2d1"
+down_revision: Union[str, None] = "f2b8c4d6a1e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "knowledge_chunks",
+        sa.Column("content_hash", sa.String(length=64), nullable=True, comment="内容的 SHA-256 摘要（十六进制）"),
+    )
+    # Backfill with the same digest the application computes: sha256 of the UTF-8 content, hex encoded.
+    op.execute(
+        "UPDATE knowledge_chunks "
+        "SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex') "
+        "WHERE content_hash IS NULL"
+    )
+    op.create_index(
+        "ix_knowledge_chunks_document_id_content_hash",
+        "knowledge_chunks",
+        ["document_id", "content_hash"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_knowledge_chunks_document_id_content_hash", table_name="knowledge_chunks")
+    op.drop_column("knowledge_chunks", "content_hash")
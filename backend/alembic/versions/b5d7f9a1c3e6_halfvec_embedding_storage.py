@@ -0,0 +1,66 @@
+"""optionally store knowledge chunk embeddings as halfvec
+
+Revision ID: b5d7f9a1c3e6
+Revises: a4c6e8f0b2d1
+Create Date: 2026-10-16 04:00:00.000000
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d7f9a1c3e6"
+down_revision: Union[str, None] = "a4c6e8f0b2d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    try:
+        return int(raw) if raw else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _recreate_index(storage: str) -> None:
+    opclass = f"{storage}_cosine_ops"
+    index_type = (os.getenv("VECTOR_INDEX_TYPE") or "hnsw").strip().lower()
+    if index_type == "hnsw":
+        options = f"m = {_env_int('HNSW_M', 16)}, ef_construction = {_env_int('HNSW_EF_CONSTRUCTION', 64)}"
+    else:
+        index_type, options = "ivfflat", "lists = 100"
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_knowledge_chunks_embedding "
+        f"ON knowledge_chunks USING {index_type} (embedding {opclass}) WITH ({options})"
+    )
+
+
+def _convert(storage: str) -> None:
+    dim = _env_int("EMBEDDING_DIM", 768)
+    op.execute("DROP INDEX IF EXISTS ix_knowledge_chunks_embedding")
+    op.execute(
+        f"ALTER TABLE knowledge_chunks ALTER COLUMN embedding TYPE {storage}({dim}) "
+        f"USING embedding::{storage}({dim})"
+    )
+    _recreate_index(storage)
+
+
+def upgrade() -> None:
+    # EMBEDDING_STORAGE=halfvec (requires pgvector >= 0.7) halves column and index size; vector keeps float32.
+    storage = (os.getenv("EMBEDDING_STORAGE") or "vector").strip().lower()
+    if storage != "halfvec":
+        return
+    _convert("halfvec")
+
+
+def downgrade() -> None:
+    storage = (os.getenv("EMBEDDING_STORAGE") or "vector").strip().lower()
+    if storage != "halfvec":
+        return
+    _convert("vector")
@@ -0,0 +1,167 @@
+"""bm25 corpus statistics: per-term document frequency and chunk lengths
+
+Revision ID: c8e1f3a5b7d9
+Revises: b5d7f9a1c3e6
+Create Date: 2026-10-16 06:00:00.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c8e1f3a5b7d9"
+down_revision: Union[str, None] = "b5d7f9a1c3e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Number of lexeme occurrences in a tsvector (stripped lexemes count once).
+# IMMUTABLE so it can back the stored generated column search_length.
+TSVECTOR_LENGTH_FUNCTION = """
+CREATE OR REPLACE FUNCTION kb_tsvector_length(tsv tsvector) RETURNS integer
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT coalesce(sum(coalesce(nullif(cardinality(u.positions), 0), 1)), 0)::integer
+    FROM unnest(tsv) AS u(lexeme, positions, weights)
+$$
+"""
+
+# Add (direction = 1) or remove (direction = -1) a set of chunks from the statistics.
+# Terms are upserted in lexeme order so concurrent writers lock rows in the same order.
+APPLY_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION kb_apply_chunk_stats(direction integer, vectors tsvector[], lengths bigint)
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    IF vectors IS NULL OR cardinality(vectors) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO knowledge_term_stats AS t (term, doc_freq)
+    SELECT u.lexeme, direction * count(*)
+    FROM unnest(vectors) AS v(tsv), unnest(v.tsv) AS u(lexeme, positions, weights)
+    GROUP BY u.lexeme
+    ORDER BY u.lexeme
+    ON CONFLICT (term) DO UPDATE SET doc_freq = t.doc_freq + EXCLUDED.doc_freq;
+
+    IF direction < 0 THEN
+        DELETE FROM knowledge_term_stats
+        WHERE doc_freq <= 0
+          AND term IN (SELECT u.lexeme FROM unnest(vectors) AS v(tsv), unnest(v.tsv) AS u(lexeme, positions, weights));
+    END IF;
+
+    UPDATE knowledge_corpus_stats
+    SET chunk_count = chunk_count + direction * cardinality(vectors),
+        total_length = total_length + direction * coalesce(lengths, 0)
+    WHERE id = 1;
+END
+$$
+"""
+
+# Statement-level trigger: one aggregate per INSERT / UPDATE / DELETE statement,
+# covering COPY staging inserts, chunk copies, edits and cascaded document deletes.
+SYNC_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION kb_chunk_stats_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM kb_apply_chunk_stats(
+            1,
+            (SELECT array_agg(search_vector) FROM new_rows WHERE search_vector IS NOT NULL),
+            (SELECT sum(search_length) FROM new_rows WHERE search_vector IS NOT NULL)
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM kb_apply_chunk_stats(
+            -1,
+            (SELECT array_agg(search_vector) FROM old_rows WHERE search_vector IS NOT NULL),
+            (SELECT sum(search_length) FROM old_rows WHERE search_vector IS NOT NULL)
+        );
+    ELSE
+        -- Only rows whose search_vector actually changed (re-indexing chunk_index is a no-op).
+        PERFORM kb_apply_chunk_stats(
+            -1,
+            (SELECT array_agg(o.search_vector) FROM old_rows o JOIN new_rows n ON n.id = o.id
+             WHERE o.search_vector IS DISTINCT FROM n.search_vector AND o.search_vector IS NOT NULL),
+            (SELECT sum(o.search_length) FROM old_rows o JOIN new_rows n ON n.id = o.id
+             WHERE o.search_vector IS DISTINCT FROM n.search_vector AND o.search_vector IS NOT NULL)
+        );
+        PERFORM kb_apply_chunk_stats(
+            1,
+            (SELECT array_agg(n.search_vector) FROM old_rows o JOIN new_rows n ON n.id = o.id
+             WHERE o.search_vector IS DISTINCT FROM n.search_vector AND n.search_vector IS NOT NULL),
+            (SELECT sum(n.search_length) FROM old_rows o JOIN new_rows n ON n.id = o.id
+             WHERE o.search_vector IS DISTINCT FROM n.search_vector AND n.search_vector IS NOT NULL)
+        );
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = (
+    ("kb_chunk_stats_insert", "AFTER INSERT", "REFERENCING NEW TABLE AS new_rows"),
+    ("kb_chunk_stats_update", "AFTER UPDATE", "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("kb_chunk_stats_delete", "AFTER DELETE", "REFERENCING OLD TABLE AS old_rows"),
+)
+
+
+def upgrade() -> None:
+    op.execute(TSVECTOR_LENGTH_FUNCTION)
+    op.add_column(
+        "knowledge_chunks",
+        sa.Column(
+            "search_length",
+            sa.Integer(),
+            sa.Computed("kb_tsvector_length(search_vector)", persisted=True),
+            nullable=True,
+            comment="search_vector 的词元总数",
+        ),
+    )
+
+    op.create_table(
+        "knowledge_term_stats",
+        sa.Column("term", sa.Text(), primary_key=True, comment="tsvector 词元"),
+        sa.Column("doc_freq", sa.BigInteger(), nullable=False, server_default="0", comment="包含该词元的块数量"),
+    )
+    op.create_table(
+        "knowledge_corpus_stats",
+        sa.Column("id", sa.SmallInteger(), primary_key=True),
+        sa.Column("chunk_count", sa.BigInteger(), nullable=False, server_default="0", comment="含 search_vector 的块数量"),
+        sa.Column("total_length", sa.BigInteger(), nullable=False, server_default="0", comment="search_length 之和"),
+    )
+
+    # Backfill from the existing corpus
+    op.execute(
+        "INSERT INTO knowledge_term_stats (term, doc_freq) "
+        "SELECT u.lexeme, count(*) "
+        "FROM knowledge_chunks c, unnest(c.search_vector) AS u(lexeme, positions, weights) "
+        "WHERE c.search_vector IS NOT NULL "
+        "GROUP BY u.lexeme"
+    )
+    op.execute(
+        "INSERT INTO knowledge_corpus_stats (id, chunk_count, total_length) "
+        "SELECT 1, count(*), coalesce(sum(search_length), 0) "
+        "FROM knowledge_chunks WHERE search_vector IS NOT NULL"
+    )
+
+    op.execute(APPLY_STATS_FUNCTION)
+    op.execute(SYNC_TRIGGER_FUNCTION)
+    for name, timing, referencing in TRIGGERS:
+        op.execute(
+            f"CREATE TRIGGER {name} {timing} ON knowledge_chunks {referencing} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION kb_chunk_stats_sync()"
+        )
+
+
+def downgrade() -> None:
+    for name, _, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON knowledge_chunks")
+    op.execute("DROP FUNCTION IF EXISTS kb_chunk_stats_sync()")
+    op.execute("DROP FUNCTION IF EXISTS kb_apply_chunk_stats(integer, tsvector[], bigint)")
+    op.drop_table("knowledge_corpus_stats")
+    op.drop_table("knowledge_term_stats")
+    op.drop_column("knowledge_chunks", "search_length")
+    op.execute("DROP FUNCTION IF EXISTS kb_tsvector_length(tsvector)")
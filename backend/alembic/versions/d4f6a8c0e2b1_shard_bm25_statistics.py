@@ -0,0 +1,152 @@
+"""shard bm25 statistics by writer backend
+
+Revision ID: d4f6a8c0e2b1
+Revises: c8e1f3a5b7d9
+Create Date: 2026-10-16 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4f6a8c0e2b1"
+down_revision: Union[str, None] = "c8e1f3a5b7d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Keep in sync with app.modules.knowledge_base.models.STATS_SHARDS
+STATS_SHARDS = 16
+
+# Each writing backend updates its own shard (pg_backend_pid() % shards), so concurrent
+# ingests no longer queue on the single corpus row or on the rows of common terms.
+# A shard's doc_freq may go negative (chunk added in one shard, removed in another);
+# only the sum over shards is meaningful. On removal, every term touched whose rows sum to
+# zero across all shards is deleted entirely, so +1/-1 pairs left on different shards do not
+# accumulate. Those rows are locked with SKIP LOCKED and a term is pruned only when all of
+# its visible rows were locked here: concurrent writers never wait on each other's shards
+# (no cross-shard deadlocks) and a term busy elsewhere is simply pruned by a later removal.
+APPLY_STATS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION kb_apply_chunk_stats(direction integer, vectors tsvector[], lengths bigint)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    stats_shard smallint := (pg_backend_pid() % {STATS_SHARDS})::smallint;
+BEGIN
+    IF vectors IS NULL OR cardinality(vectors) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO knowledge_term_stats AS t (term, shard, doc_freq)
+    SELECT u.lexeme, stats_shard, direction * count(*)
+    FROM unnest(vectors) AS v(tsv), unnest(v.tsv) AS u(lexeme, positions, weights)
+    GROUP BY u.lexeme
+    ORDER BY u.lexeme
+    ON CONFLICT (term, shard) DO UPDATE SET doc_freq = t.doc_freq + EXCLUDED.doc_freq;
+
+    IF direction < 0 THEN
+        WITH touched AS (
+            SELECT DISTINCT u.lexeme AS term
+            FROM unnest(vectors) AS v(tsv), unnest(v.tsv) AS u(lexeme, positions, weights)
+        ),
+        locked AS (
+            SELECT s.term, s.doc_freq
+            FROM knowledge_term_stats AS s
+            WHERE s.term IN (SELECT term FROM touched)
+            FOR UPDATE SKIP LOCKED
+        ),
+        dead AS (
+            SELECT l.term
+            FROM locked AS l
+            GROUP BY l.term
+            HAVING sum(l.doc_freq) = 0
+               AND count(*) = (SELECT count(*) FROM knowledge_term_stats AS a WHERE a.term = l.term)
+        )
+        DELETE FROM knowledge_term_stats AS t
+        USING dead
+        WHERE t.term = dead.term;
+    END IF;
+
+    DELETE FROM knowledge_term_stats
+    WHERE shard = stats_shard
+      AND doc_freq = 0
+      AND term IN (SELECT u.lexeme FROM unnest(vectors) AS v(tsv), unnest(v.tsv) AS u(lexeme, positions, weights));
+
+    UPDATE knowledge_corpus_stats
+    SET chunk_count = chunk_count + direction * cardinality(vectors),
+        total_length = total_length + direction * coalesce(lengths, 0)
+    WHERE id = stats_shard;
+END
+$$
+"""
+
+UNSHARDED_APPLY_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION kb_apply_chunk_stats(direction integer, vectors tsvector[], lengths bigint)
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    IF vectors IS NULL OR cardinality(vectors) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO knowledge_term_stats AS t (term, doc_freq)
+    SELECT u.lexeme, direction * count(*)
+    FROM unnest(vectors) AS v(tsv), unnest(v.tsv) AS u(lexeme, positions, weights)
+    GROUP BY u.lexeme
+    ORDER BY u.lexeme
+    ON CONFLICT (term) DO UPDATE SET doc_freq = t.doc_freq + EXCLUDED.doc_freq;
+
+    IF direction < 0 THEN
+        DELETE FROM knowledge_term_stats
+        WHERE doc_freq <= 0
+          AND term IN (SELECT u.lexeme FROM unnest(vectors) AS v(tsv), unnest(v.tsv) AS u(lexeme, positions, weights));
+    END IF;
+
+    UPDATE knowledge_corpus_stats
+    SET chunk_count = chunk_count + direction * cardinality(vectors),
+        total_length = total_length + direction * coalesce(lengths, 0)
+    WHERE id = 1;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    op.add_column(
+        "knowledge_term_stats",
+        sa.Column("shard", sa.SmallInteger(), nullable=False, server_default="0", comment="统计分片"),
+    )
+    op.drop_constraint("knowledge_term_stats_pkey", "knowledge_term_stats", type_="primary")
+    op.create_primary_key("knowledge_term_stats_pkey", "knowledge_term_stats", ["term", "shard"])
+
+    # The existing totals stay in row 1; the other shards start at zero
+    op.execute(
+        "INSERT INTO knowledge_corpus_stats (id, chunk_count, total_length) "
+        f"SELECT g, 0, 0 FROM generate_series(0, {STATS_SHARDS - 1}) AS g "
+        "ON CONFLICT (id) DO NOTHING"
+    )
+    op.execute(APPLY_STATS_FUNCTION)
+
+
+def downgrade() -> None:
+    op.execute(UNSHARDED_APPLY_STATS_FUNCTION)
+
+    op.execute(
+        "UPDATE knowledge_corpus_stats SET "
+        "chunk_count = (SELECT coalesce(sum(chunk_count), 0) FROM knowledge_corpus_stats), "
+        "total_length = (SELECT coalesce(sum(total_length), 0) FROM knowledge_corpus_stats) "
+        "WHERE id = 1"
+    )
+    op.execute("DELETE FROM knowledge_corpus_stats WHERE id <> 1")
+
+    op.drop_constraint("knowledge_term_stats_pkey", "knowledge_term_stats", type_="primary")
+    op.execute(
+        "WITH shards AS (DELETE FROM knowledge_term_stats RETURNING term, doc_freq) "
+        "INSERT INTO knowledge_term_stats (term, shard, doc_freq) "
+        "SELECT term, 0, sum(doc_freq) FROM shards GROUP BY term HAVING sum(doc_freq) > 0"
+    )
+    op.drop_column("knowledge_term_stats", "shard")
+    op.create_primary_key("knowledge_term_stats_pkey", "knowledge_term_stats", ["term"])
@@ -0,0 +1,52 @@
+"""switch knowledge chunk embedding index to HNSW
+
+Revision ID: e7d3a1c9b5f2
+Revises: c1a2f8d0b3e4
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7d3a1c9b5f2"
+down_revision: Union[str, None] = "c1a2f8d0b3e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    try:
+        return int(raw) if raw else default
+    except (TypeError, ValueError):
+        return default
+
+
+def upgrade() -> None:
+    # VECTOR_INDEX_TYPE=ivfflat keeps the legacy index; HNSW is the default.
+    index_type = (os.getenv("VECTOR_INDEX_TYPE") or "hnsw").strip().lower()
+    if index_type != "hnsw":
+        return
+
+    m = _env_int("HNSW_M", 16)
+    ef_construction = _env_int("HNSW_EF_CONSTRUCTION", 64)
+    op.execute("DROP INDEX IF EXISTS ix_knowledge_chunks_embedding")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_knowledge_chunks_embedding "
+        "ON knowledge_chunks USING hnsw (embedding vector_cosine_ops) "
+        f"WITH (m = {m}, ef_construction = {ef_construction})"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_knowledge_chunks_embedding")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_knowledge_chunks_embedding "
+        "ON knowledge_chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)"
+    )
@@ -0,0 +1,41 @@
+"""index knowledge document tags and source_type for filtered retrieval
+
+Revision ID: f2b8c4d6a1e3
+Revises: e7d3a1c9b5f2
+Create Date: 2026-10-16 00:10:00.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b8c4d6a1e3"
+down_revision: Union[str, None] = "e7d3a1c9b5f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # jsonb_ops (not jsonb_path_ops) so that the ?| operator used by tag filters can use the index.
+    op.create_index(
+        "ix_knowledge_documents_tags",
+        "knowledge_documents",
+        ["tags"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_knowledge_documents_source_type",
+        "knowledge_documents",
+        ["source_type"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_knowledge_documents_source_type", table_name="knowledge_documents")
+    op.drop_index("ix_knowledge_documents_tags", table_name="knowledge_documents")
@@ -19,6 +19,8 @@ DEFAULT_EXCLUDE_PATHS = [
     "/redoc", 
     "/openapi.json",
     "/health",
+    "/metrics",
+    "/ready",
 ]
 
 class AuthMiddleware(BaseHTTPMiddleware):
@@ -180,6 +180,8 @@ async def send_conversation_message(
         task_payload["system_prompt_override"] = message.system_prompt_override
     if message.top_k is not None:
         task_payload["top_k"] = message.top_k
+    if message.document_id is not None:
+        task_payload["document_id"] = message.document_id
 
     await process_chat_message.kiq(**task_payload)
 
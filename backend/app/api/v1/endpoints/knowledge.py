@@ -1,15 +1,22 @@
+import asyncio
+import json
 import logging
-from typing import Awaitable, Callable, Dict
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
+from sse_starlette.sse import EventSourceResponse
 
+from app.core.config import settings
 from app.infrastructure.database.postgres_base import get_async_session
+from app.infrastructure.redis.keyspace import redis_keys
+from app.infrastructure.redis.redis_pool import redis_connection_manager
 from app.modules.knowledge_base.schemas import (
     KnowledgeDocumentCreate,
     KnowledgeDocumentRead,
     KnowledgeDocumentIngestRequest,
-    KnowledgeIngestResult,
+    KnowledgeIngestJobAccepted,
+    KnowledgeIngestJobRead,
     KnowledgeDocumentUpdate,
     KnowledgeChunkRead,
     KnowledgeSearchRequest,
@@ -17,27 +24,26 @@ from app.modules.knowledge_base.schemas import (
     KnowledgeSearchResult,
 )
 from app.modules.knowledge_base import models
-from app.modules.knowledge_base.repository import crud_knowledge_base
+from app.modules.knowledge_base.repository import RetrievalFilters, crud_knowledge_base
 from app.modules.knowledge_base.retrieval import bm25_search, vector_search
+from app.modules.knowledge_base.retrieval_cache import bump_corpus_generation
+from app.modules.knowledge_base.ingest_jobs import (
+    INGEST_FINAL_STATUSES,
+    IngestJobState,
+    discard_spool,
+    get_ingest_job_tracker,
+    spool_path_for,
+)
 from app.modules.knowledge_base.ingestion import (
-    ingest_document_content,
-    ingest_document_file,
     update_chunk,
     delete_chunk,
 )
+from app.modules.knowledge_base.task import ingest_knowledge_document
 
 
 router = APIRouter(prefix="/knowledge", tags=["knowledge"])
 logger = logging.getLogger(__name__)
 
-UPLOAD_ERROR_MAP: Dict[str, tuple[int, str]] = {
-    "unsupported_file_type": (
-        400,
-        "Unsupported file type. Please upload text-based files only.",
-    ),
-    "missing_file": (400, "No file uploaded"),
-}
-
 
 async def _get_document_or_404(
     document_id: int,
@@ -49,23 +55,49 @@ async def _get_document_or_404(
     return doc
 
 
-async def _ingest_document(
-    document_id: int,
-    db: AsyncSession,
-    operation: Callable[[models.KnowledgeDocument], Awaitable[int]],
-    *,
-    error_map: Dict[str, tuple[int, str]] | None = None,
-) -> dict[str, int]:
-    doc = await _get_document_or_404(document_id, db)
+def _job_accepted(state: IngestJobState) -> KnowledgeIngestJobAccepted:
+    base_url = f"/api/v1/knowledge/ingest/jobs/{state.job_id}"
+    return KnowledgeIngestJobAccepted(
+        job_id=state.job_id,
+        document_id=state.document_id,
+        status=state.status,
+        status_url=base_url,
+        stream_url=f"{base_url}/events",
+    )
+
+
+async def _spool_upload(upload: UploadFile, path: str) -> int:
+    """将上传文件分块写入暂存目录，返回写入的字节数。"""
+    written = 0
+    with open(path, "wb") as handle:
+        while True:
+            data = await upload.read(settings.INGEST_READ_CHUNK_BYTES)
+            if not data:
+                break
+            await run_in_threadpool(handle.write, data)
+            written += len(data)
+    return written
+
+
+async def _fail_job(state: IngestJobState, error: str, spool_path: str | None = None) -> None:
+    """任务未能交给 worker 时清理暂存文件并标记失败，避免其永远停留在 queued。"""
+    discard_spool(spool_path)
+    await get_ingest_job_tracker().update(state, status="failed", error=error)
+
+
+async def _enqueue_ingest(state: IngestJobState, *, spool_path: str | None = None, **kwargs) -> None:
+    """投递摄入任务到 kb_ingest 队列；投递失败时清理并返回 503。"""
     try:
-        count = await operation(doc)
-    except ValueError as exc:
-        if error_map is None:
-            raise
-        reason = str(exc)
-        status_code, message = error_map.get(reason, (400, "Failed to process uploaded file"))
-        raise HTTPException(status_code=status_code, detail=message) from exc
-    return {"document_id": document_id, "chunks": count}
+        await ingest_knowledge_document.kiq(
+            state.job_id,
+            state.document_id,
+            spool_path=spool_path,
+            **kwargs,
+        )
+    except Exception as exc:
+        logger.exception("Failed to enqueue ingest job", extra={"job_id": state.job_id})
+        await _fail_job(state, f"enqueue_failed: {exc.__class__.__name__}", spool_path)
+        raise HTTPException(status_code=503, detail="Ingestion queue unavailable") from exc
 
 
 @router.post("/documents", response_model=KnowledgeDocumentRead, status_code=201)
@@ -76,49 +108,108 @@ async def create_knowledge_document(payload: KnowledgeDocumentCreate, db: AsyncS
     return doc
 
 
-@router.post("/documents/{document_id}/ingest", response_model=KnowledgeIngestResult, status_code=201)
+@router.post("/documents/{document_id}/ingest", response_model=KnowledgeIngestJobAccepted, status_code=202)
 async def ingest_content(
     document_id: int,
     body: KnowledgeDocumentIngestRequest,
     db: AsyncSession = Depends(get_async_session),
 ):
-    async def _operation(doc: models.KnowledgeDocument) -> int:
-        return await ingest_document_content(
-            db,
-            body.content,
-            overwrite=body.overwrite,
-            document=doc,
-        )
-
-    return await _ingest_document(document_id, db, _operation)
+    await _get_document_or_404(document_id, db)
+    state = await get_ingest_job_tracker().create(document_id=document_id, source="content")
+    await _enqueue_ingest(state, overwrite=body.overwrite, content=body.content)
+    return _job_accepted(state)
 
 
-@router.post("/documents/{document_id}/ingest/upload", response_model=KnowledgeIngestResult, status_code=201)
+@router.post("/documents/{document_id}/ingest/upload", response_model=KnowledgeIngestJobAccepted, status_code=202)
 async def ingest_content_upload(
     document_id: int,
     file: UploadFile = File(...),
     overwrite: bool = Form(False),
     db: AsyncSession = Depends(get_async_session),
 ):
-    async def _operation(doc: models.KnowledgeDocument) -> int:
-        return await ingest_document_file(
-            db,
-            file,
-            document=doc,
-            overwrite=overwrite,
-        )
-
-    return await _ingest_document(
-        document_id,
-        db,
-        _operation,
-        error_map=UPLOAD_ERROR_MAP,
+    doc = await _get_document_or_404(document_id, db)
+    state = await get_ingest_job_tracker().create(document_id=document_id, source="upload")
+    spool_path = spool_path_for(state.job_id)
+    try:
+        await _spool_upload(file, spool_path)
+    except Exception as exc:
+        # 客户端断开或磁盘写满：删除不完整的暂存文件
+        await _fail_job(state, f"spool_failed: {exc.__class__.__name__}", spool_path)
+        raise
+    await _enqueue_ingest(
+        state,
+        spool_path=spool_path,
+        overwrite=overwrite,
+        filename=file.filename or doc.source_ref,
     )
+    return _job_accepted(state)
+
+
+@router.get("/ingest/jobs/{job_id}", response_model=KnowledgeIngestJobRead)
+async def get_ingest_job(job_id: str):
+    state = await get_ingest_job_tracker().get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return state
+
+
+@router.get("/ingest/jobs/{job_id}/events", response_class=EventSourceResponse)
+async def stream_ingest_job_events(job_id: str, request: Request):
+    tracker = get_ingest_job_tracker()
+    state = await tracker.get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+
+    try:
+        redis_client = await redis_connection_manager.get_client()
+    except Exception as exc:
+        logger.exception("Failed to acquire Redis client for ingest SSE", extra={"job_id": job_id})
+        raise HTTPException(status_code=503, detail="Event stream unavailable") from exc
+
+    channel_name = f"kb:{redis_keys.knowledge.ingest_events(job_id)}"
+
+    async def event_generator():
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(channel_name)
+            # 订阅后重新读取一次快照，避免错过订阅前已完成的任务
+            latest = await tracker.get(job_id)
+            if latest is not None:
+                yield KnowledgeIngestJobRead.model_validate(latest).model_dump_json()
+                if latest.status in INGEST_FINAL_STATUSES:
+                    return
+
+            while not await request.is_disconnected():
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=5.0)
+                if message is None:
+                    await asyncio.sleep(0.25)
+                    continue
+                data = message.get("data")
+                if data is None:
+                    continue
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8", errors="ignore")
+                yield data
+                try:
+                    status = json.loads(data).get("status")
+                except (ValueError, AttributeError):
+                    status = None
+                if status in INGEST_FINAL_STATUSES:
+                    return
+        finally:
+            try:
+                await pubsub.unsubscribe(channel_name)
+                await pubsub.close()
+            except Exception:
+                pass
+
+    return EventSourceResponse(event_generator())
 
 
 @router.delete("/documents/{document_id}", status_code=204)
 async def remove_document(document_id: int, db: AsyncSession = Depends(get_async_session)):
     await crud_knowledge_base.delete_document(db, document_id)
+    await bump_corpus_generation()
     return None
 
 
@@ -151,6 +242,8 @@ async def patch_document(
     )
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
+    # 标题/标签/来源类型会影响检索过滤与引用信息
+    await bump_corpus_generation()
     return doc
 
 
@@ -167,6 +260,12 @@ async def search_knowledge(
         },
     )
 
+    filters = RetrievalFilters.build(
+        document_ids=payload.document_ids,
+        tags=payload.tags,
+        languages=payload.languages,
+        source_types=payload.source_types,
+    )
     results: list[KnowledgeSearchResult] = []
 
     if payload.use_bm25:
@@ -174,6 +273,7 @@ async def search_knowledge(
             db,
             payload.query,
             requested_top_k=payload.top_k,
+            filters=filters,
         )
 
         for match in search_result.matches:
@@ -197,6 +297,7 @@ async def search_knowledge(
             db,
             payload.query,
             top_k=payload.top_k,
+            filters=filters,
         )
         for item in vector_matches:
             chunk = item.chunk
@@ -0,0 +1,117 @@
+"""
+halfvec 召回率对比基准
+
+从数据库读取当前语料的全部块向量，分别以 float32（vector）与 float16（halfvec 的存储精度）
+做精确余弦检索，报告 halfvec 相对于 float32 基准的 recall@k 与得分误差，用于评估切换
+``EMBEDDING_STORAGE=halfvec`` 的精度代价。两者都是暴力检索，因此结果只反映存储精度的影响，
+与 ANN 索引自身的近似误差无关。
+
+查询默认从语料中随机抽取块向量（排除自身命中），也可以用 ``--query-file`` 提供真实查询文本
+（每行一条，使用当前嵌入模型编码）。
+
+用法::
+
+    python -m app.benchmarks.halfvec_recall --queries 200 --k 10
+    python -m app.benchmarks.halfvec_recall --query-file queries.txt --k 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import List
+
+import numpy as np
+from sqlalchemy import select
+
+
+async def _load_corpus(limit: int | None) -> tuple[np.ndarray, np.ndarray]:
+    from app.infrastructure.database.postgres_base import AsyncSessionLocal
+    from app.modules.knowledge_base import models
+
+    stmt = select(models.KnowledgeChunk.id, models.KnowledgeChunk.embedding).order_by(models.KnowledgeChunk.id)
+    if limit:
+        stmt = stmt.limit(limit)
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(stmt)).all()
+    if not rows:
+        raise SystemExit("knowledge_chunks is empty; ingest some documents first")
+    ids = np.array([row.id for row in rows], dtype=np.int64)
+    vectors = np.stack([np.asarray(row.embedding, dtype=np.float32) for row in rows])
+    return ids, vectors
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def _top_k(corpus: np.ndarray, queries: np.ndarray, k: int, exclude: np.ndarray | None) -> tuple[np.ndarray, np.ndarray]:
+    scores = queries @ corpus.T
+    if exclude is not None:
+        scores[np.arange(len(queries)), exclude] = -np.inf
+    k = min(k, corpus.shape[0])
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    ordered = np.take_along_axis(scores, candidates, axis=1).argsort(axis=1)[:, ::-1]
+    indices = np.take_along_axis(candidates, ordered, axis=1)
+    return indices, np.take_along_axis(scores, indices, axis=1)
+
+
+def compare(corpus: np.ndarray, queries: np.ndarray, k: int, exclude: np.ndarray | None = None) -> dict[str, float]:
+    """返回 float16 存储相对 float32 精确检索的 recall@k、top1 一致率与得分误差。"""
+    exact = _normalize(corpus.astype(np.float32))
+    # halfvec 按 float16 存储；查询向量同样以 halfvec 参与 <=> 运算
+    half = exact.astype(np.float16).astype(np.float32)
+    query_f32 = _normalize(queries.astype(np.float32))
+    query_f16 = query_f32.astype(np.float16).astype(np.float32)
+
+    truth, truth_scores = _top_k(exact, query_f32, k, exclude)
+    approx, _ = _top_k(half, query_f16, k, exclude)
+
+    overlaps = [len(set(t.tolist()) & set(a.tolist())) / truth.shape[1] for t, a in zip(truth, approx)]
+    half_scores = np.take_along_axis(query_f16 @ half.T, truth, axis=1)
+    return {
+        "recall_at_k": float(np.mean(overlaps)),
+        "top1_agreement": float(np.mean(truth[:, 0] == approx[:, 0])),
+        "mean_abs_score_error": float(np.mean(np.abs(half_scores - truth_scores))),
+        "max_abs_score_error": float(np.max(np.abs(half_scores - truth_scores))),
+    }
+
+
+async def _run(args: argparse.Namespace) -> None:
+    ids, corpus = await _load_corpus(args.limit)
+    exclude = None
+    if args.query_file:
+        from app.modules.knowledge_base.embedding_batcher import encode_texts
+
+        with open(args.query_file, encoding="utf-8") as handle:
+            texts = [line.strip() for line in handle if line.strip()]
+        queries = np.asarray(await encode_texts(texts), dtype=np.float32)
+    else:
+        rng = np.random.default_rng(args.seed)
+        sample = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+        queries = corpus[sample]
+        exclude = sample
+
+    result = compare(corpus, queries, args.k, exclude)
+    dim = corpus.shape[1]
+    print(f"corpus={len(ids)} queries={len(queries)} dim={dim} k={args.k}")
+    print(f"recall@{args.k}:           {result['recall_at_k']:.4f}")
+    print(f"top-1 agreement:     {result['top1_agreement']:.4f}")
+    print(f"mean |score error|:  {result['mean_abs_score_error']:.2e}")
+    print(f"max |score error|:   {result['max_abs_score_error']:.2e}")
+    # pgvector 每行额外 8 字节头部
+    print(f"bytes/row vector={dim * 4 + 8} halfvec={dim * 2 + 8}")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200, help="从语料中抽取的查询数量")
+    parser.add_argument("--query-file", help="每行一条查询文本，使用嵌入模型编码")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=None, help="最多读取的块数量")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(_run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+"""
+知识库检索质量与延迟基准
+
+向 Postgres + pgvector 写入一份合成语料（或夹具文件），把查询集分别回放到
+:func:`vector_search`、:func:`bm25_search` 与 :func:`hybrid_search`，报告：
+
+- 顺序执行时的 p50 / p95 / p99 延迟；
+- ``--concurrency`` 个并发会话下的 QPS 与延迟分位数；
+- 相对精确暴力检索（numpy 全量余弦）的 recall@k，以及查询来源块出现在 top-k 中的比例。
+
+合成语料按批次确定性生成（同一 ``--seed`` 下可随时重建任意块），因此 100 万块规模时
+真值计算也只需流式遍历一次，不必在内存中保存整份语料。合成模式下查询向量由来源块向量
+加噪声得到，回放时以查找表替代嵌入模型，测得的延迟不含查询编码；``--corpus-file``
+夹具模式使用真实嵌入模型编码语料与查询。
+
+基准语料写入 ``source_type=benchmark`` 的独立文档，检索时默认以该文档过滤；再次运行
+相同规模与种子时直接复用已写入的语料（``--reseed`` 强制重建，``--drop`` 结束后删除）。
+
+用法::
+
+    python -m app.benchmarks.retrieval --chunks 10000 --queries 200 --k 10 --concurrency 8
+    python -m app.benchmarks.retrieval --chunks 1000000 --insert-batch 5000 --modes vector,hybrid
+    python -m app.benchmarks.retrieval --corpus-file chunks.txt --queries 100 --json result.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterator, List, Sequence
+
+import numpy as np
+
+# 合成语料的生成批大小（与写入批大小无关，保证任意块都能按批重建）
+GENERATION_BATCH = 1000
+_SYLLABLES = (
+    "ka", "lo", "mi", "ne", "ru", "ta", "shi", "po", "ve", "da", "zen", "qua",
+    "bri", "tor", "sel", "fu", "gan", "hex", "jo", "wil",
+)
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return (vectors / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def _pseudo_word(index: int) -> str:
+    # 以音节为基数编码词序号，保证词表中每个词唯一
+    base = len(_SYLLABLES)
+    parts = [_SYLLABLES[index % base]]
+    index //= base
+    while index:
+        parts.append(_SYLLABLES[index % base])
+        index //= base
+    return "".join(parts)
+
+
+def _zipf_weights(size: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1, dtype=np.float64) ** exponent
+    return weights / weights.sum()
+
+
+@dataclass(slots=True)
+class SyntheticCorpus:
+    """确定性的合成语料：主题聚类的向量 + 与主题相关的 Zipf 分布伪词文本。
+
+    每个块属于一个聚类：向量为聚类中心加噪声，文本一半取自该聚类的主题词、一半取自全局词表，
+    使向量近邻与关键词命中彼此相关，混合检索的融合效果才有意义。
+    """
+
+    chunks: int
+    dim: int
+    seed: int = 0
+    clusters: int = 0
+    vocab_size: int = 20000
+    words_per_chunk: int = 80
+    spread: float = 0.6
+    topic_words: int = 200
+    _centroids: np.ndarray = field(init=False, repr=False)
+    _vocab: np.ndarray = field(init=False, repr=False)
+    _topics: np.ndarray = field(init=False, repr=False)
+    _global_p: np.ndarray = field(init=False, repr=False)
+    _topic_p: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.clusters <= 0:
+            self.clusters = max(16, self.chunks // 500)
+        rng = np.random.default_rng([self.seed, 0])
+        self._centroids = _unit(rng.standard_normal((self.clusters, self.dim)))
+        self._vocab = np.array([_pseudo_word(i) for i in range(self.vocab_size)], dtype=object)
+        self._topics = np.stack(
+            [rng.permutation(self.vocab_size)[: self.topic_words] for _ in range(self.clusters)]
+        )
+        self._global_p = _zipf_weights(self.vocab_size, 1.1)
+        self._topic_p = _zipf_weights(self.topic_words, 0.8)
+
+    @property
+    def size(self) -> int:
+        return self.chunks
+
+    def batch(self, batch_index: int) -> tuple[list[str], np.ndarray]:
+        """重建第 ``batch_index`` 个生成批次的 (文本, 归一化向量)。"""
+        start = batch_index * GENERATION_BATCH
+        count = max(0, min(GENERATION_BATCH, self.chunks - start))
+        rng = np.random.default_rng([self.seed, 1, batch_index])
+        cluster_ids = rng.integers(0, self.clusters, size=count)
+
+        noise = _unit(rng.standard_normal((count, self.dim)))
+        vectors = _unit(self._centroids[cluster_ids] + self.spread * noise)
+
+        shape = (count, self.words_per_chunk)
+        global_words = rng.choice(self.vocab_size, size=shape, p=self._global_p)
+        topic_ranks = rng.choice(self.topic_words, size=shape, p=self._topic_p)
+        topic_words = self._topics[cluster_ids[:, None], topic_ranks]
+        words = np.where(rng.random(shape) < 0.5, topic_words, global_words)
+        texts = [" ".join(row) for row in self._vocab[words]]
+        return texts, vectors
+
+    def iter_batches(self) -> Iterator[tuple[int, list[str], np.ndarray]]:
+        """按顺序产出 (起始序号, 文本, 向量)。"""
+        for batch_index in range((self.chunks + GENERATION_BATCH - 1) // GENERATION_BATCH):
+            texts, vectors = self.batch(batch_index)
+            yield batch_index * GENERATION_BATCH, texts, vectors
+
+    def chunk(self, index: int) -> tuple[str, np.ndarray]:
+        texts, vectors = self.batch(index // GENERATION_BATCH)
+        return texts[index % GENERATION_BATCH], vectors[index % GENERATION_BATCH]
+
+    def source_ref(self) -> str:
+        return (
+            f"benchmark:synthetic:n={self.chunks}:dim={self.dim}:seed={self.seed}"
+            f":clusters={self.clusters}:words={self.words_per_chunk}"
+        )
+
+
+@dataclass(slots=True)
+class FixtureCorpus:
+    """来自文件的夹具语料（每行一个块），向量由真实嵌入模型生成。"""
+
+    texts: list[str]
+    vectors: np.ndarray
+    path: str = ""
+
+    @property
+    def size(self) -> int:
+        return len(self.texts)
+
+    def iter_batches(self) -> Iterator[tuple[int, list[str], np.ndarray]]:
+        for start in range(0, self.size, GENERATION_BATCH):
+            stop = start + GENERATION_BATCH
+            yield start, self.texts[start:stop], self.vectors[start:stop]
+
+    def chunk(self, index: int) -> tuple[str, np.ndarray]:
+        return self.texts[index], self.vectors[index]
+
+    def source_ref(self) -> str:
+        return f"benchmark:fixture:{self.path}:n={self.size}"
+
+
+@dataclass(slots=True)
+class BenchmarkQuery:
+    text: str
+    vector: np.ndarray = field(repr=False)
+    source_index: int
+
+
+def make_queries(
+    corpus: SyntheticCorpus | FixtureCorpus,
+    count: int,
+    *,
+    words: int = 6,
+    noise: float = 0.3,
+    seed: int = 0,
+) -> list[BenchmarkQuery]:
+    """从语料中抽取块，截取其中一段连续词作为查询文本；查询向量为来源向量加噪声。"""
+    rng = np.random.default_rng([seed, 2])
+    sources = rng.choice(corpus.size, size=min(count, corpus.size), replace=False)
+    queries: list[BenchmarkQuery] = []
+    for source in sorted(int(index) for index in sources):
+        text, vector = corpus.chunk(source)
+        tokens = text.split()
+        start = int(rng.integers(0, max(1, len(tokens) - words + 1)))
+        query_text = " ".join(tokens[start : start + words]) or text[:64]
+        jitter = _unit(rng.standard_normal(vector.shape))
+        queries.append(
+            BenchmarkQuery(
+                text=query_text,
+                vector=_unit(vector + noise * jitter),
+                source_index=source,
+            )
+        )
+    return queries
+
+
+def exact_top_k(
+    batches: Iterator[tuple[int, Sequence[str], np.ndarray]],
+    query_vectors: np.ndarray,
+    k: int,
+) -> np.ndarray:
+    """流式暴力检索：返回每条查询余弦相似度最高的 k 个语料序号（按相似度降序）。"""
+    queries = _unit(np.asarray(query_vectors, dtype=np.float32))
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    for start, _, vectors in batches:
+        scores = queries @ _unit(np.asarray(vectors, dtype=np.float32)).T
+        ids = np.broadcast_to(np.arange(start, start + scores.shape[1], dtype=np.int64), scores.shape)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_ids, ids], axis=1)
+        keep = min(k, merged_scores.shape[1])
+        top = np.argpartition(-merged_scores, keep - 1, axis=1)[:, :keep]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_ids = np.take_along_axis(merged_ids, top, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_ids, order, axis=1)
+
+
+def recall_at_k(retrieved: Sequence[Sequence[int]], truth: Sequence[Sequence[int]], k: int) -> float:
+    """平均 recall@k：检索结果前 k 个与真值前 k 个的交集占比。"""
+    if not truth:
+        return 0.0
+    overlaps = []
+    for got, expected in zip(retrieved, truth):
+        expected_k = set(list(expected)[:k])
+        if expected_k:
+            overlaps.append(len(set(list(got)[:k]) & expected_k) / len(expected_k))
+    return float(np.mean(overlaps)) if overlaps else 0.0
+
+
+def latency_summary(samples_ms: Sequence[float]) -> dict[str, float]:
+    """延迟分位数（毫秒）。"""
+    if not samples_ms:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    values = np.asarray(samples_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(values.mean()),
+    }
+
+
+@dataclass(slots=True)
+class ReplayResult:
+    latencies_ms: list[float]
+    hits: list[list[int]]
+    wall_seconds: float
+
+    @property
+    def qps(self) -> float:
+        return len(self.latencies_ms) / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+SearchFn = Callable[[Any, str, int], Awaitable[list[int]]]
+
+
+async def replay(
+    search: SearchFn,
+    queries: Sequence[BenchmarkQuery],
+    k: int,
+    *,
+    concurrency: int = 1,
+    session_factory: Callable[[], Any],
+) -> ReplayResult:
+    """以 ``concurrency`` 个并发会话回放查询，记录每条查询的延迟与命中的 chunk id。"""
+    latencies: list[float] = [0.0] * len(queries)
+    hits: list[list[int]] = [[] for _ in queries]
+    next_index = iter(range(len(queries)))
+
+    async def worker() -> None:
+        async with session_factory() as db:
+            for index in next_index:
+                started = time.perf_counter()
+                hits[index] = await search(db, queries[index].text, k)
+                latencies[index] = (time.perf_counter() - started) * 1000.0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return ReplayResult(latencies_ms=latencies, hits=hits, wall_seconds=time.perf_counter() - started)
+
+
+def _search_modes(filters: Any) -> dict[str, SearchFn]:
+    from app.modules.knowledge_base.retrieval import bm25_search, hybrid_search, vector_search
+
+    async def run_vector(db: Any, query: str, k: int) -> list[int]:
+        return [item.chunk.id for item in await vector_search(db, query, top_k=k, filters=filters)]
+
+    async def run_bm25(db: Any, query: str, k: int) -> list[int]:
+        result = await bm25_search(db, query, requested_top_k=k, filters=filters)
+        return [match.chunk.id for match in result.matches[:k]]
+
+    async def run_hybrid(db: Any, query: str, k: int) -> list[int]:
+        return [item.chunk.id for item in (await hybrid_search(db, query, k, filters=filters))[:k]]
+
+    return {"vector": run_vector, "bm25": run_bm25, "hybrid": run_hybrid}
+
+
+@contextlib.contextmanager
+def _lookup_query_encoder(queries: Sequence[BenchmarkQuery]) -> Iterator[None]:
+    """合成模式：用查询文本 → 预生成向量的查找表替代嵌入模型。"""
+    from app.modules.knowledge_base import retrieval
+
+    table = {query.text: query.vector for query in queries}
+
+    async def encode_query(query: str) -> np.ndarray:
+        return table[query]
+
+    async def encode_queries(texts: list[str]) -> list[np.ndarray]:
+        return [table[text] for text in texts]
+
+    original = (retrieval._encode_query, retrieval._encode_queries)
+    retrieval._encode_query, retrieval._encode_queries = encode_query, encode_queries
+    try:
+        yield
+    finally:
+        retrieval._encode_query, retrieval._encode_queries = original
+
+
+async def _load_fixture(path: str) -> FixtureCorpus:
+    from app.modules.knowledge_base.embedding_batcher import encode_texts
+
+    with open(path, encoding="utf-8") as handle:
+        texts = [line.strip() for line in handle if line.strip()]
+    if not texts:
+        raise SystemExit(f"{path} contains no chunks")
+    vectors = [
+        np.asarray(await encode_texts(texts[start : start + 256]), dtype=np.float32)
+        for start in range(0, len(texts), 256)
+    ]
+    return FixtureCorpus(texts=texts, vectors=np.concatenate(vectors, axis=0), path=path)
+
+
+async def _find_seeded_document(source_ref: str, size: int) -> int | None:
+    from sqlalchemy import func, select
+
+    from app.infrastructure.database.postgres_base import AsyncSessionLocal
+    from app.modules.knowledge_base import models
+
+    async with AsyncSessionLocal() as session:
+        document_id = await session.scalar(
+            select(models.KnowledgeDocument.id)
+            .where(models.KnowledgeDocument.source_ref == source_ref)
+            .order_by(models.KnowledgeDocument.id.desc())
+            .limit(1)
+        )
+        if document_id is None:
+            return None
+        count = await session.scalar(
+            select(func.count()).where(models.KnowledgeChunk.document_id == document_id)
+        )
+    return document_id if count == size else None
+
+
+async def _seed_corpus(corpus: SyntheticCorpus | FixtureCorpus, insert_batch: int) -> int:
+    """把语料写入一个新的基准文档（逐批提交，走 COPY 写入路径），返回文档 ID。"""
+    from sqlalchemy import text
+
+    from app.infrastructure.database.postgres_base import AsyncSessionLocal
+    from app.modules.knowledge_base.repository import crud_knowledge_base
+    from app.modules.knowledge_base.schemas import KnowledgeDocumentCreate
+
+    async with AsyncSessionLocal() as session:
+        document = await crud_knowledge_base.create_document(
+            session,
+            KnowledgeDocumentCreate(
+                source_type="benchmark",
+                source_ref=corpus.source_ref(),
+                title=f"retrieval benchmark ({corpus.size} chunks)",
+                tags=["benchmark"],
+            ),
+        )
+        document_id = document.id
+        await session.commit()
+
+        started = time.perf_counter()
+        pending: list[tuple[int, str, np.ndarray, str]] = []
+        written = 0
+        for start, texts, vectors in corpus.iter_batches():
+            pending.extend(
+                (start + offset, content, vector, "en")
+                for offset, (content, vector) in enumerate(zip(texts, vectors))
+            )
+            while len(pending) >= insert_batch:
+                batch, pending = pending[:insert_batch], pending[insert_batch:]
+                written += await crud_knowledge_base.bulk_create_document_chunks(session, document_id, batch)
+            print(f"\rseeded {written}/{corpus.size} chunks ({time.perf_counter() - started:.0f}s)", end="", flush=True)
+        if pending:
+            written += await crud_knowledge_base.bulk_create_document_chunks(session, document_id, pending)
+        print(f"\rseeded {written}/{corpus.size} chunks in {time.perf_counter() - started:.1f}s")
+        await session.execute(text("ANALYZE knowledge_chunks"))
+        await session.commit()
+    return document_id
+
+
+async def _chunk_ids(document_id: int, size: int) -> np.ndarray:
+    """返回按 chunk_index 排列的数据库 chunk id，用于把语料序号映射为检索结果 id。"""
+    from sqlalchemy import select
+
+    from app.infrastructure.database.postgres_base import AsyncSessionLocal
+    from app.modules.knowledge_base import models
+
+    ids = np.full(size, -1, dtype=np.int64)
+    async with AsyncSessionLocal() as session:
+        rows = await session.execute(
+            select(models.KnowledgeChunk.chunk_index, models.KnowledgeChunk.id).where(
+                models.KnowledgeChunk.document_id == document_id
+            )
+        )
+        for chunk_index, chunk_id in rows:
+            if chunk_index is not None and 0 <= chunk_index < size:
+                ids[chunk_index] = chunk_id
+    return ids
+
+
+async def _drop_document(document_id: int) -> None:
+    from app.infrastructure.database.postgres_base import AsyncSessionLocal
+    from app.modules.knowledge_base.repository import crud_knowledge_base
+
+    async with AsyncSessionLocal() as session:
+        await crud_knowledge_base.delete_document(session, document_id)
+
+
+def _print_row(mode: str, label: str, metrics: dict[str, float]) -> None:
+    print(
+        f"{mode:<7} {label:<10} p50={metrics['p50_ms']:8.2f}ms p95={metrics['p95_ms']:8.2f}ms "
+        f"p99={metrics['p99_ms']:8.2f}ms qps={metrics['qps']:8.1f}"
+    )
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    from app.core.config import settings
+    from app.infrastructure.database.postgres_base import AsyncSessionLocal
+    from app.modules.knowledge_base.repository import RetrievalFilters
+
+    if args.corpus_file:
+        corpus: SyntheticCorpus | FixtureCorpus = await _load_fixture(args.corpus_file)
+    else:
+        corpus = SyntheticCorpus(
+            chunks=args.chunks,
+            dim=settings.EMBEDDING_DIM,
+            seed=args.seed,
+            words_per_chunk=args.chunk_words,
+        )
+
+    document_id = None if args.reseed else await _find_seeded_document(corpus.source_ref(), corpus.size)
+    if document_id is None:
+        document_id = await _seed_corpus(corpus, max(1, args.insert_batch))
+    else:
+        print(f"reusing seeded document {document_id} ({corpus.size} chunks)")
+    ids = await _chunk_ids(document_id, corpus.size)
+
+    queries = make_queries(corpus, args.queries, words=args.query_words, noise=args.query_noise, seed=args.seed)
+    if args.corpus_file:
+        from app.modules.knowledge_base.embedding_batcher import encode_texts
+
+        encoded = np.asarray(await encode_texts([query.text for query in queries]), dtype=np.float32)
+        for query, vector in zip(queries, encoded):
+            query.vector = vector
+
+    truth_positions = exact_top_k(corpus.iter_batches(), np.stack([q.vector for q in queries]), args.k)
+    truth = [[int(ids[position]) for position in row] for row in truth_positions]
+    sources = [int(ids[query.source_index]) for query in queries]
+
+    filters = None if args.unfiltered else RetrievalFilters.build(document_ids=[document_id])
+    modes = _search_modes(filters)
+    selected = [mode.strip() for mode in args.modes.split(",") if mode.strip() in modes]
+
+    # 重复查询不应命中检索结果缓存，否则测到的只是 Redis 往返
+    settings.RETRIEVAL_CACHE_ENABLED = args.with_cache
+    encoder = contextlib.nullcontext() if args.corpus_file else _lookup_query_encoder(queries)
+
+    report: dict[str, Any] = {
+        "corpus": {"chunks": corpus.size, "source_ref": corpus.source_ref(), "document_id": document_id},
+        "queries": len(queries),
+        "k": args.k,
+        "concurrency": args.concurrency,
+        "modes": {},
+    }
+    print(f"corpus={corpus.size} queries={len(queries)} k={args.k} concurrency={args.concurrency}")
+    with encoder:
+        for mode in selected:
+            search = modes[mode]
+            # 预热一次（连接池、缓存的执行计划等）
+            await replay(search, queries[: min(5, len(queries))], args.k, session_factory=AsyncSessionLocal)
+            sequential = await replay(search, queries, args.k, session_factory=AsyncSessionLocal)
+            loaded = await replay(
+                search, queries, args.k, concurrency=args.concurrency, session_factory=AsyncSessionLocal
+            )
+            result = {
+                "recall_at_k": recall_at_k(sequential.hits, truth, args.k),
+                "source_hit_at_k": float(
+                    np.mean([source in hits[: args.k] for source, hits in zip(sources, sequential.hits)])
+                ),
+                "sequential": {**latency_summary(sequential.latencies_ms), "qps": sequential.qps},
+                "concurrent": {**latency_summary(loaded.latencies_ms), "qps": loaded.qps},
+            }
+            report["modes"][mode] = result
+            _print_row(mode, "sequential", result["sequential"])
+            _print_row(mode, f"x{args.concurrency}", result["concurrent"])
+            print(
+                f"{mode:<7} recall@{args.k}={result['recall_at_k']:.4f} "
+                f"source-hit@{args.k}={result['source_hit_at_k']:.4f}"
+            )
+
+    if args.drop:
+        await _drop_document(document_id)
+    return report
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10000, help="合成语料的块数量")
+    parser.add_argument("--chunk-words", type=int, default=80, help="每个合成块的词数")
+    parser.add_argument("--corpus-file", help="夹具语料：每行一个块，使用嵌入模型编码")
+    parser.add_argument("--queries", type=int, default=200, help="查询数量")
+    parser.add_argument("--query-words", type=int, default=6, help="每条查询截取的词数")
+    parser.add_argument("--query-noise", type=float, default=0.3, help="合成查询向量的噪声幅度")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8, help="并发会话数（QPS 测量）")
+    parser.add_argument("--modes", default="vector,bm25,hybrid", help="逗号分隔：vector,bm25,hybrid")
+    parser.add_argument("--insert-batch", type=int, default=2000, help="写入时每次提交的块数量")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reseed", action="store_true", help="忽略已写入的同规格语料，重新写入")
+    parser.add_argument("--drop", action="store_true", help="结束后删除基准文档")
+    parser.add_argument("--unfiltered", action="store_true", help="检索时不按基准文档过滤")
+    parser.add_argument("--with-cache", action="store_true", help="保留检索结果缓存")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -49,7 +49,16 @@ async def on_worker_startup(state: dict) -> None:
     """Worker 启动时的初始化"""
     # 注意：不再需要在这里连接Redis超时存储
     # Redis服务的初始化已经移到了main.py的lifespan中
-    pass
+
+    # 预加载嵌入模型等，避免第一个聊天/摄入任务承担冷启动
+    from app.modules.knowledge_base.warmup import warm_up_models
+
+    await warm_up_models()
+
+    # worker 没有 HTTP 端口：定期把本进程指标写入 Redis，由 API 的 /metrics 合并导出
+    from app.infrastructure.metrics import get_metrics_snapshot_store
+
+    get_metrics_snapshot_store().start()
 
 
 @broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
@@ -57,4 +66,6 @@ async def on_worker_shutdown(state: dict) -> None:
     """Worker 关闭时的清理"""
     # 注意：不再需要在这里断开Redis超时存储
     # Redis服务的清理已经移到了main.py的lifespan中
-    pass
+    from app.infrastructure.metrics import get_metrics_snapshot_store
+
+    await get_metrics_snapshot_store().stop()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Any, List, Optional, Union
 from dataclasses import dataclass
 from pydantic import AnyHttpUrl, EmailStr, PostgresDsn, field_validator, computed_field, Field
@@ -316,10 +317,84 @@ class Settings(BaseSettings):
     CLASSIFIER_MODEL: str = Field(default_factory=lambda: os.getenv("CLASSIFIER_FILENAME", "gemma-3-4b-it-q4_0.gguf"))
     EMBEDDING_MODEL: str = Field(default="intfloat/multilingual-e5-base")
     EMBEDDING_DIM: int = Field(default=768)
+    # 向量列存储类型：vector（float32）或 halfvec（float16，存储与索引减半）；须与执行迁移时的取值一致
+    EMBEDDING_STORAGE: str = Field(default="vector")
+    # 嵌入后端：torch（SentenceTransformer）或 onnx（ONNX Runtime，需安装 onnxruntime）
+    EMBEDDING_BACKEND: str = Field(default="torch")
+    # ONNX 模型文件；留空时从 EMBEDDING_MODEL 仓库下载 onnx/model.onnx
+    EMBEDDING_ONNX_PATH: str = Field(default="")
+    EMBEDDING_ONNX_QUANTIZE: bool = Field(default=False)
+    EMBEDDING_ONNX_THREADS: int = Field(default=0)
+    EMBEDDING_MAX_LENGTH: int = Field(default=512)
+    # 启动时预加载嵌入模型、spaCy 与 tiktoken（API 进程与 Taskiq worker）
+    MODEL_WARMUP_ENABLED: bool = Field(default=True)
+    # 嵌入微批处理：并发请求最多等待 MAX_WAIT_MS 或凑满 MAX_SIZE 条文本后合并编码
+    EMBEDDING_BATCH_ENABLED: bool = Field(default=True)
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(default=32)
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = Field(default=5.0)
     RAG_TOP_K: int = Field(default=60)
     BM25_TOP_K: int = Field(default=50)
+    # BM25 得分阈值按打分方式分开：BM25_MIN_RANK 用于 ts_rank_cd，BM25_OKAPI_MIN_RANK 用于 okapi
     BM25_MIN_RANK: float = Field(default=0.05)
+    BM25_OKAPI_MIN_RANK: float = Field(default=0.5)
+    # BM25 打分方式：okapi（基于 knowledge_term_stats / knowledge_corpus_stats 的 Okapi BM25）
+    # 或 ts_rank_cd（PostgreSQL 内置覆盖密度排名，无 IDF 与长度归一化）
+    BM25_SCORER: str = Field(default="okapi")
+    BM25_K1: float = Field(default=1.2)
+    BM25_B: float = Field(default=0.75)
+    # okapi 打分前按 ts_rank 预筛的候选块数量上限
+    BM25_OKAPI_CANDIDATES: int = Field(default=1000)
+    # 混合检索融合策略：max / rrf / weighted
+    RAG_FUSION_MODE: str = Field(default="max")
+    RAG_RRF_K: int = Field(default=60)
+    RAG_FUSION_VECTOR_WEIGHT: float = Field(default=0.7)
+    # Cross-Encoder 重排（CPU）
+    RERANK_MODEL: str = Field(default="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+    RERANK_MAX_LENGTH: int = Field(default=512)
+    RAG_RERANK_ENABLED: bool = Field(default=False)
+    RAG_RERANK_CANDIDATES: int = Field(default=60)
+    RAG_RERANK_TOP_N: int = Field(default=8)
+    RAG_RERANK_SCORE_THRESHOLD: float = Field(default=0.0)
+    # 组装提示上下文时为每个命中块额外拉取前后各 N 个相邻块（0 表示不拉取，仅合并已命中的相邻块）
+    RAG_CONTEXT_NEIGHBORS: int = Field(default=0)
     SPACY_MODEL_NAME: str = Field(default="zh_core_web_sm")
+    # 批量分词：nlp.pipe 的批大小与进程数（>1 时每次调用会启动子进程，仅适合大批量摄入）
+    SPACY_PIPE_BATCH_SIZE: int = Field(default=64)
+    SPACY_PIPE_N_PROCESS: int = Field(default=1)
+    # 查询分词结果的进程内 LRU 容量
+    QUERY_TOKEN_CACHE_SIZE: int = Field(default=4096)
+    # 向量索引：hnsw / ivfflat（迁移与重建任务使用），以及查询期参数
+    VECTOR_INDEX_TYPE: str = Field(default="hnsw")
+    HNSW_M: int = Field(default=16)
+    HNSW_EF_CONSTRUCTION: int = Field(default=64)
+    RAG_IVFFLAT_PROBES: int = Field(default=10)
+    RAG_HNSW_EF_SEARCH: int = Field(default=100)
+    # 查询向量缓存（进程内 LRU + Redis 二级缓存）
+    QUERY_EMBEDDING_CACHE_ENABLED: bool = Field(default=True)
+    QUERY_EMBEDDING_CACHE_SIZE: int = Field(default=2048)
+    QUERY_EMBEDDING_CACHE_TTL: int = Field(default=3600)
+    QUERY_EMBEDDING_CACHE_REDIS_TTL: int = Field(default=86400)
+    # 流式摄入：每次读取的字节数、分块窗口字符数、每批编码/写入的块数
+    INGEST_READ_CHUNK_BYTES: int = Field(default=1024 * 1024)
+    INGEST_STREAM_WINDOW_CHARS: int = Field(default=256 * 1024)
+    INGEST_EMBED_BATCH_SIZE: int = Field(default=64)
+    # 分块参数（tiktoken token 数），可通过动态设置调整
+    INGEST_CHUNK_TOKENS: int = Field(default=2000)
+    INGEST_CHUNK_OVERLAP: int = Field(default=200)
+    # 多进程分块：元素总字符数达到阈值时按 Markdown 章节分片到进程池（进程数 0 表示 CPU 核数，1 表示关闭）
+    INGEST_SPLIT_PROCESSES: int = Field(default=0)
+    INGEST_SPLIT_PARALLEL_MIN_CHARS: int = Field(default=100_000)
+    # 块写入走 COPY（asyncpg 二进制协议）；关闭时回退为 INSERT ... VALUES
+    INGEST_COPY_ENABLED: bool = Field(default=True)
+    # 异步摄入：上传文件暂存目录（API 与 kb_ingest worker 需共享）与任务状态保留时间
+    INGEST_SPOOL_DIR: str = Field(default=os.path.join(tempfile.gettempdir(), "kb_ingest"))
+    INGEST_JOB_TTL: int = Field(default=86400)
+    # 混合检索结果缓存（Redis，按语料版本号失效）
+    RETRIEVAL_CACHE_ENABLED: bool = Field(default=True)
+    RETRIEVAL_CACHE_TTL: int = Field(default=600)
+    # 跨进程指标汇总：worker 定期把指标快照写入 Redis，API 的 /metrics 合并导出
+    METRICS_SNAPSHOT_INTERVAL: float = Field(default=15.0)
+    METRICS_SNAPSHOT_STALE_SECONDS: float = Field(default=60.0)
 
     model_config = SettingsConfigDict(
         case_sensitive=True,
@@ -337,6 +412,19 @@ class Settings(BaseSettings):
             "RAG_TOP_K": self.RAG_TOP_K,
             "BM25_TOP_K": self.BM25_TOP_K,
             "BM25_MIN_RANK": self.BM25_MIN_RANK,
+            "BM25_OKAPI_MIN_RANK": self.BM25_OKAPI_MIN_RANK,
+            "RAG_FUSION_MODE": self.RAG_FUSION_MODE,
+            "RAG_RRF_K": self.RAG_RRF_K,
+            "RAG_FUSION_VECTOR_WEIGHT": self.RAG_FUSION_VECTOR_WEIGHT,
+            "RAG_RERANK_ENABLED": self.RAG_RERANK_ENABLED,
+            "RAG_RERANK_CANDIDATES": self.RAG_RERANK_CANDIDATES,
+            "RAG_RERANK_TOP_N": self.RAG_RERANK_TOP_N,
+            "RAG_RERANK_SCORE_THRESHOLD": self.RAG_RERANK_SCORE_THRESHOLD,
+            "RAG_IVFFLAT_PROBES": self.RAG_IVFFLAT_PROBES,
+            "RAG_HNSW_EF_SEARCH": self.RAG_HNSW_EF_SEARCH,
+            "RAG_CONTEXT_NEIGHBORS": self.RAG_CONTEXT_NEIGHBORS,
+            "INGEST_CHUNK_TOKENS": self.INGEST_CHUNK_TOKENS,
+            "INGEST_CHUNK_OVERLAP": self.INGEST_CHUNK_OVERLAP,
         }
 
 settings = Settings()
@@ -0,0 +1,13 @@
+"""In-process metrics with Prometheus text exposition, aggregated across processes via Redis."""
+
+from .aggregation import MetricsSnapshotStore, get_metrics_snapshot_store
+from .registry import Counter, Histogram, MetricsRegistry, metrics_registry
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "MetricsRegistry",
+    "MetricsSnapshotStore",
+    "get_metrics_snapshot_store",
+    "metrics_registry",
+]
@@ -0,0 +1,148 @@
+"""
+跨进程指标汇总
+
+Taskiq worker 没有 HTTP 端口，检索等指标只存在于 worker 进程内。worker 定期把本进程的
+指标族快照写入 Redis 哈希（字段为进程标识），API 进程在 /metrics 中读取其他进程的快照，
+与本进程指标按标签求和后统一导出。进程退出后其快照在过期后被忽略并清理，
+计数器随之回落，由 Prometheus 的 rate() 按计数器重置处理。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from functools import lru_cache
+from typing import List, Optional
+
+from app.core.config import settings
+from app.infrastructure.redis.keyspace import redis_keys
+from app.infrastructure.redis.redis_base import RedisBase
+
+from .registry import MetricFamily, MetricsRegistry, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+def current_process_id() -> str:
+    """当前进程在快照哈希中的字段名：主机名 + pid。"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class MetricsSnapshotStore:
+    """在 Redis 中发布与读取各进程的指标快照。"""
+
+    def __init__(
+        self,
+        redis: RedisBase,
+        registry: MetricsRegistry = metrics_registry,
+        *,
+        interval_seconds: float = 15.0,
+        stale_seconds: float = 60.0,
+        process_id: Optional[str] = None,
+    ) -> None:
+        self._redis = redis
+        self._registry = registry
+        self._interval = max(1.0, float(interval_seconds))
+        # 过期时间至少覆盖两个发布周期，避免偶发延迟导致快照被误删
+        self._stale_seconds = max(float(stale_seconds), self._interval * 2)
+        self._process_id = process_id or current_process_id()
+        self._key = redis_keys.app.metrics_snapshots()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def process_id(self) -> str:
+        return self._process_id
+
+    async def publish(self) -> bool:
+        """把本进程的指标族写入 Redis；失败时仅记录日志。"""
+        payload = json.dumps(
+            {"updated_at": time.time(), "families": self._registry.collect()},
+            separators=(",", ":"),
+        )
+        try:
+            await self._redis.ensure_connection()
+            await self._redis.hset(self._key, {self._process_id: payload})
+            return True
+        except Exception as exc:  # pragma: no cover - Redis 故障不影响业务
+            logger.warning(f"发布指标快照失败: {exc}")
+            return False
+
+    async def load_remote(self) -> List[List[MetricFamily]]:
+        """读取其他进程未过期的指标快照，并清理过期的快照。"""
+        try:
+            await self._redis.ensure_connection()
+            entries = await self._redis.hgetall(self._key)
+        except Exception as exc:  # pragma: no cover - Redis 故障时只导出本进程指标
+            logger.warning(f"读取指标快照失败: {exc}")
+            return []
+
+        now = time.time()
+        snapshots: List[List[MetricFamily]] = []
+        stale: List[str] = []
+        for process_id, raw in entries.items():
+            if process_id == self._process_id:
+                continue
+            try:
+                snapshot = json.loads(raw)
+                updated_at = float(snapshot["updated_at"])
+                families = list(snapshot["families"])
+            except (TypeError, ValueError, KeyError):
+                stale.append(process_id)
+                continue
+            if now - updated_at > self._stale_seconds:
+                stale.append(process_id)
+                continue
+            snapshots.append(families)
+
+        if stale:
+            await self._redis.hdel(self._key, *stale)
+        return snapshots
+
+    async def render(self) -> str:
+        """导出本进程与其他进程汇总后的 Prometheus 文本。"""
+        return self._registry.render(*await self.load_remote())
+
+    def start(self) -> None:
+        """在当前事件循环中启动周期发布任务（重复调用无副作用）。"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._publish_loop())
+
+    async def stop(self) -> None:
+        """停止周期发布并删除本进程的快照。"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self._redis.hdel(self._key, self._process_id)
+        except Exception as exc:  # pragma: no cover - 未删除的快照会在过期后被清理
+            logger.warning(f"删除指标快照失败: {exc}")
+
+    async def _publish_loop(self) -> None:
+        while True:
+            await self.publish()
+            await asyncio.sleep(self._interval)
+
+
+@lru_cache(maxsize=1)
+def get_metrics_snapshot_store() -> MetricsSnapshotStore:
+    """进程级单例。"""
+    return MetricsSnapshotStore(
+        RedisBase(),
+        interval_seconds=settings.METRICS_SNAPSHOT_INTERVAL,
+        stale_seconds=settings.METRICS_SNAPSHOT_STALE_SECONDS,
+    )
+
+
+__all__ = [
+    "MetricsSnapshotStore",
+    "current_process_id",
+    "get_metrics_snapshot_store",
+]
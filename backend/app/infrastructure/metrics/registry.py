@@ -0,0 +1,311 @@
+"""
+进程内指标注册表
+
+提供最小化的 Counter / Histogram 实现，并按 Prometheus 文本格式（0.0.4）导出，
+避免为少量指标引入额外依赖。指标可导出为可序列化的指标族（见 ``MetricsRegistry.collect``），
+其他进程（如 Taskiq worker）的指标族经 Redis 汇总后与本进程合并导出，见 aggregation 模块。
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# 指标族的可序列化表示：{"name", "type", "help", "labelnames", "buckets"（仅直方图，不含 +Inf）, "samples"}
+# counter / gauge 的样本为 [标签值, 数值]；histogram 的样本为 [标签值, 各桶计数（非累积）, 总和, 总数]
+MetricFamily = Dict[str, Any]
+
+# 默认的延迟分桶（秒），覆盖 1ms ~ 10s
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Dict[str, str] | None = None) -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    for name, value in (extra or {}).items():
+        pairs.append(f'{name}="{_escape_label(value)}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render_family(family: MetricFamily) -> List[str]:
+    """将一个指标族渲染为 Prometheus 文本行。"""
+    name = family["name"]
+    labelnames = family["labelnames"]
+    lines = [
+        f"# HELP {name} {family['help']}",
+        f"# TYPE {name} {family['type']}",
+    ]
+    if family["type"] == "histogram":
+        bounds = [float(bound) for bound in family["buckets"]] + [math.inf]
+        for key, counts, total, count in family["samples"]:
+            running = 0
+            for bound, bucket_count in zip(bounds, counts):
+                running += bucket_count
+                labels = _format_labels(labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{name}_bucket{labels} {running}")
+            labels = _format_labels(labelnames, key)
+            lines.append(f"{name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{name}_count{labels} {int(count)}")
+        return lines
+
+    suffix = "_total" if family["type"] == "counter" else ""
+    for key, value in family["samples"]:
+        lines.append(f"{name}{suffix}{_format_labels(labelnames, key)} {_format_value(value)}")
+    return lines
+
+
+def merge_families(*groups: Iterable[MetricFamily]) -> List[MetricFamily]:
+    """按指标名合并多个进程的指标族，同一标签组合的样本相加。
+
+    类型、标签名或分桶不一致的同名指标（例如不同版本的进程）以先出现者为准，其余跳过。
+    """
+    merged: Dict[str, MetricFamily] = {}
+    samples: Dict[str, Dict[LabelValues, List[Any]]] = {}
+    for families in groups:
+        for family in families:
+            name = family["name"]
+            current = merged.get(name)
+            if current is None:
+                merged[name] = {key: value for key, value in family.items() if key != "samples"}
+                samples[name] = {}
+            elif (
+                current["type"] != family["type"]
+                or list(current["labelnames"]) != list(family["labelnames"])
+                or list(current.get("buckets", ())) != list(family.get("buckets", ()))
+            ):
+                continue
+
+            series = samples[name]
+            for sample in family["samples"]:
+                key = tuple(str(value) for value in sample[0])
+                existing = series.get(key)
+                if existing is None:
+                    # 复制桶计数列表，避免累加时修改输入
+                    series[key] = [list(key)] + [list(part) if isinstance(part, list) else part for part in sample[1:]]
+                elif family["type"] == "histogram":
+                    existing[1] = [left + right for left, right in zip(existing[1], sample[1])]
+                    existing[2] += sample[2]
+                    existing[3] += sample[3]
+                else:
+                    existing[1] += sample[1]
+
+    return [
+        {**family, "samples": [series for _, series in sorted(samples[name].items())]}
+        for name, family in merged.items()
+    ]
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _family(self, samples: List[List[Any]], **extra: Any) -> MetricFamily:
+        return {
+            "name": self.name,
+            "type": self.metric_type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            **extra,
+            "samples": samples,
+        }
+
+    def family(self) -> MetricFamily:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return render_family(self.family())
+
+
+class Counter(_Metric):
+    """单调递增计数器。"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counter can only be incremented by non-negative amounts")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def family(self) -> MetricFamily:
+        with self._lock:
+            samples = [[list(key), value] for key, value in sorted(self._values.items())]
+        return self._family(samples)
+
+
+class Histogram(_Metric):
+    """累积分桶直方图（桶边界为上界，包含 +Inf）。"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        bounds = sorted(float(bound) for bound in buckets if not math.isinf(bound))
+        self.buckets: Tuple[float, ...] = tuple(bounds) + (math.inf,)
+        # 每个标签组合：[各桶计数（非累积）, 总和, 总数]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, float(value))
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * len(self.buckets), [0.0, 0.0]))
+            counts[index] += 1
+            totals[0] += float(value)
+            totals[1] += 1
+
+    def snapshot(self, **labels: str) -> Tuple[List[int], float, int]:
+        """返回 (累积桶计数, 总和, 总数)。"""
+        with self._lock:
+            series = self._series.get(self._label_values(labels))
+            if series is None:
+                return [0] * len(self.buckets), 0.0, 0
+            counts, totals = series
+            cumulative: List[int] = []
+            running = 0
+            for count in counts:
+                running += count
+                cumulative.append(running)
+            return cumulative, totals[0], int(totals[1])
+
+    def family(self) -> MetricFamily:
+        with self._lock:
+            samples = [
+                [list(key), list(counts), totals[0], int(totals[1])]
+                for key, (counts, totals) in sorted(self._series.items())
+            ]
+        return self._family(samples, buckets=list(self.buckets[:-1]))
+
+
+class MetricsRegistry:
+    """指标注册表：登记指标与按需采集的 gauge / counter 回调，并统一导出。"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], List[MetricFamily]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))  # type: ignore[return-value]
+
+    def _register_collector(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Dict[str, float]],
+        metric_type: str,
+    ) -> None:
+        def _families() -> List[MetricFamily]:
+            return [
+                {
+                    "name": metric_name,
+                    "type": metric_type,
+                    "help": documentation,
+                    "labelnames": [],
+                    "samples": [[[], float(value)]],
+                }
+                for metric_name, value in collect().items()
+            ]
+
+        with self._lock:
+            self._collectors[name] = _families
+
+    def register_gauges(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Dict[str, float]],
+    ) -> None:
+        """登记在导出时才读取的 gauge 组：``collect`` 返回 ``{指标名: 数值}``。"""
+        self._register_collector(name, documentation, collect, "gauge")
+
+    def register_counters(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Dict[str, float]],
+    ) -> None:
+        """登记在导出时才读取的累计计数组（导出为 ``<指标名>_total``）：``collect`` 返回 ``{指标名: 数值}``。"""
+        self._register_collector(name, documentation, collect, "counter")
+
+    def collect(self) -> List[MetricFamily]:
+        """导出本进程全部指标的可序列化指标族。"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.values())
+        families = [metric.family() for metric in metrics]
+        for collect in collectors:
+            try:
+                families.extend(collect())
+            except Exception:  # pragma: no cover - a broken collector must not break /metrics
+                continue
+        return families
+
+    def render(self, *remote: Iterable[MetricFamily]) -> str:
+        """以 Prometheus 文本格式导出全部指标，``remote`` 为其他进程的指标族（与本进程按标签求和）。"""
+        lines: List[str] = []
+        for family in merge_families(self.collect(), *remote):
+            lines.extend(render_family(family))
+        return "\n".join(lines) + "\n"
+
+
+# 进程级单例
+metrics_registry = MetricsRegistry()
@@ -98,6 +98,7 @@ class _AppKeys:
 
     PREFIX = "app:"
     DYNAMIC_SETTINGS_KEY = "dynamic_settings"
+    METRICS_SNAPSHOTS_KEY = "metrics_snapshots"
 
     def dynamic_settings(self) -> str:
         """Primary key storing the JSON blob of dynamic settings."""
@@ -109,6 +110,41 @@ class _AppKeys:
 
         return f"{self.dynamic_settings()}:meta"
 
+    def metrics_snapshots(self) -> str:
+        """Hash of per-process metric snapshots (JSON), keyed by process id."""
+
+        return f"{self.PREFIX}{self.METRICS_SNAPSHOTS_KEY}"
+
+
+class _KnowledgeKeys:
+    """Knowledge-base retrieval keys inside the "kb:" namespace."""
+
+    QUERY_EMBEDDING_PREFIX = "qemb:"
+    RETRIEVAL_RESULT_PREFIX = "ret:"
+    CORPUS_GENERATION_KEY = "corpus_gen"
+    INGEST_JOB_PREFIX = "ingest_job:"
+    INGEST_EVENTS_PREFIX = "ingest_events:"
+
+    def query_embedding(self, digest: str) -> str:
+        """Packed float32 query embedding keyed by a digest of model + normalized query."""
+        return f"{self.QUERY_EMBEDDING_PREFIX}{digest}"
+
+    def retrieval_result(self, digest: str) -> str:
+        """Ranked chunk ids/scores keyed by a digest of corpus generation + query + filters + config."""
+        return f"{self.RETRIEVAL_RESULT_PREFIX}{digest}"
+
+    def corpus_generation(self) -> str:
+        """Monotonic counter bumped on every knowledge chunk/document write."""
+        return self.CORPUS_GENERATION_KEY
+
+    def ingest_job(self, job_id: str) -> str:
+        """Latest status/progress snapshot (JSON) of an ingestion job."""
+        return f"{self.INGEST_JOB_PREFIX}{job_id}"
+
+    def ingest_events(self, job_id: str) -> str:
+        """Pub/sub channel carrying progress events of an ingestion job."""
+        return f"{self.INGEST_EVENTS_PREFIX}{job_id}"
+
 
 class RedisKeys:
     """Root container for key helpers."""
@@ -117,6 +153,7 @@ class RedisKeys:
         self.app = _AppKeys()
         self.auth = _AuthKeys()
         self.cache = _CacheKeys()
+        self.knowledge = _KnowledgeKeys()
         self.scheduler = _SchedulerKeys()
 
 
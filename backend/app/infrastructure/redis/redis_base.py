@@ -63,6 +63,42 @@ class RedisBase:
             logger.error(f"Redis get error (key={key}): {e}")
             return None
 
+    async def mget(self, *keys: str) -> List[Optional[Union[str, bytes]]]:
+        """一次往返批量获取多个键，结果与 ``keys`` 顺序一致；失败时全部返回 None"""
+        if not keys:
+            return []
+        try:
+            async with self._connection_manager.get_connection() as client:
+                return list(await client.mget([self._make_key(key) for key in keys]))
+        except Exception as e:
+            logger.error(f"Redis mget error (keys={len(keys)}): {e}")
+            return [None] * len(keys)
+
+    async def set_many(self, mapping: Dict[str, Union[str, bytes]], ttl: Optional[int] = None) -> bool:
+        """通过非事务 Pipeline 一次往返写入多个键（均带相同 TTL）"""
+        if not mapping:
+            return True
+        try:
+            async with self._connection_manager.get_connection() as client:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, value in mapping.items():
+                        pipe.set(self._make_key(key), value, ex=ttl)
+                    results = await pipe.execute()
+                return all(result is True for result in results)
+        except Exception as e:
+            logger.error(f"Redis set_many error (keys={len(mapping)}): {e}")
+            return False
+
+    async def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        """原子自增整数值，返回自增后的值；失败时返回 None"""
+        try:
+            async with self._connection_manager.get_connection() as client:
+                result = await client.incrby(self._make_key(key), amount)
+                return int(result)
+        except Exception as e:
+            logger.error(f"Redis incr error (key={key}): {e}")
+            return None
+
     async def delete(self, *keys: str) -> int:
         """删除键，返回删除数量"""
         if not keys:
@@ -323,6 +359,17 @@ class RedisBase:
             logger.error(f"Redis scan delete error (pattern={pattern}): {e}")
             return 0
 
+    # ========== 发布/订阅 ==========
+
+    async def publish(self, channel: str, message: str) -> int:
+        """向频道发布消息，返回接收者数量"""
+        try:
+            async with self._connection_manager.get_connection() as client:
+                return int(await client.publish(self._make_key(channel), message))
+        except Exception as e:
+            logger.error(f"Redis publish error (channel={channel}): {e}")
+            return 0
+
     # ========== Pipeline / Transaction Support ========== #
 
     @asynccontextmanager
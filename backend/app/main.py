@@ -1,7 +1,8 @@
 from contextlib import asynccontextmanager
+import asyncio
 import datetime
 from fastapi import FastAPI, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api import router
 from app.core.config import settings
 from app.api.middleware.logging import RequestResponseLoggingMiddleware
@@ -11,7 +12,9 @@ from app.core.exceptions import ApiError, AuthenticationError
 from app.infrastructure.utils.common import create_exception_handlers
 from app.broker import broker
 from app.infrastructure.redis.redis_pool import redis_connection_manager
+from app.infrastructure.metrics import get_metrics_snapshot_store
 from app.infrastructure.scheduler.scheduler import scheduler_service
+from app.modules.knowledge_base.warmup import get_warmup_state, warm_up_models
 
 # 配置日志系统
 setup_logging()
@@ -64,6 +67,9 @@ async def lifespan(app: FastAPI):
             logger.info(f"默认实例保证: {ensured}")
         except Exception as e:
             logger.warning(f"默认实例保证出错: {e}")
+
+        # 后台预热嵌入模型 / spaCy / tiktoken，进度通过 /ready 暴露
+        app.state.warmup_task = asyncio.create_task(warm_up_models())
         
         logger.info("应用启动成功")
         
@@ -73,6 +79,10 @@ async def lifespan(app: FastAPI):
     yield
     
     # 关闭时
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+
     try:
         await broker.shutdown()
         # await task_manager.shutdown()  # 已删除，调度器通过 scheduler_service 管理
@@ -112,6 +122,8 @@ app.add_middleware(
         "/docs", 
         "/redoc", 
         "/openapi.json",
+        "/metrics",
+        "/ready",
         "/static/*"
     ],
     exclude_extensions=[
@@ -140,5 +152,26 @@ async def health_check():
         "timestamp": datetime.datetime.now().isoformat()
     }
 
+# 就绪检查端点（无需认证）：模型预热完成前返回 503，并附带各步骤进度
+@app.get("/ready")
+async def readiness_check():
+    warmup = get_warmup_state().snapshot()
+    return JSONResponse(
+        status_code=200 if warmup["ready"] else 503,
+        content={
+            "status": "ready" if warmup["ready"] else "warming_up",
+            "service": "backend",
+            "warmup": warmup,
+        },
+    )
+
+# Prometheus 指标端点（无需认证）：本进程指标与 Taskiq worker 经 Redis 上报的指标合并导出
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        await get_metrics_snapshot_store().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
 # 包含API路由
 app.include_router(router)
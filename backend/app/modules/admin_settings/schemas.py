@@ -20,7 +20,20 @@ class AdminSettingsUpdate(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     RAG_TOP_K: int | None = Field(None, ge=1, le=100)
-    # Only the retrieval breadth is admin configurable now.
+    BM25_MIN_RANK: float | None = Field(None, ge=0.0)
+    BM25_OKAPI_MIN_RANK: float | None = Field(None, ge=0.0)
+    RAG_FUSION_MODE: Literal["max", "rrf", "weighted"] | None = None
+    RAG_RRF_K: int | None = Field(None, ge=1, le=1000)
+    RAG_FUSION_VECTOR_WEIGHT: float | None = Field(None, ge=0.0, le=1.0)
+    RAG_RERANK_ENABLED: bool | None = None
+    RAG_RERANK_CANDIDATES: int | None = Field(None, ge=1, le=200)
+    RAG_RERANK_TOP_N: int | None = Field(None, ge=1, le=100)
+    RAG_RERANK_SCORE_THRESHOLD: float | None = Field(None, ge=0.0, le=1.0)
+    RAG_IVFFLAT_PROBES: int | None = Field(None, ge=1, le=10000)
+    RAG_HNSW_EF_SEARCH: int | None = Field(None, ge=1, le=1000)
+    RAG_CONTEXT_NEIGHBORS: int | None = Field(None, ge=0, le=3)
+    INGEST_CHUNK_TOKENS: int | None = Field(None, ge=64, le=8192)
+    INGEST_CHUNK_OVERLAP: int | None = Field(None, ge=0, le=2048)
 
 
 class AdminSettingsResetRequest(BaseModel):
@@ -30,6 +30,65 @@ class BM25SearchConfig:
     min_rank: float
 
 
+@dataclass(slots=True)
+class FusionConfig:
+    """How vector and BM25 candidate lists are fused in hybrid search."""
+
+    mode: str
+    rrf_k: int
+    vector_weight: float
+
+
+FUSION_MODES = ("max", "rrf", "weighted")
+
+BM25_SCORERS = ("okapi", "ts_rank_cd")
+
+
+@dataclass(slots=True)
+class RerankConfig:
+    """Cross-encoder rerank stage configuration."""
+
+    enabled: bool
+    candidates: int
+    top_n: int
+    score_threshold: float
+
+
+@dataclass(slots=True)
+class VectorIndexConfig:
+    """Per-transaction ANN index search parameters."""
+
+    ivfflat_probes: int
+    hnsw_ef_search: int
+
+
+@dataclass(slots=True)
+class ContextConfig:
+    """Prompt context assembly: how many neighbouring chunks to pull around each hit."""
+
+    neighbor_window: int
+
+
+@dataclass(slots=True)
+class SplitterConfig:
+    """Token budget used when splitting documents into chunks."""
+
+    chunk_size: int
+    chunk_overlap: int
+
+
+def _as_bool(value: Any) -> bool:
+    """Interpret common truthy strings stored in Redis as booleans."""
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in {"1", "true", "yes", "on"}:
+            return True
+        if lowered in {"0", "false", "no", "off", ""}:
+            return False
+        raise ValueError(value)
+    return bool(value)
+
+
 def _read_setting(
     config_map: DynamicSettingsMapping | None,
     key: str,
@@ -81,6 +140,12 @@ def build_rag_config(
     return RagSearchConfig(top_k=effective)
 
 
+def resolve_bm25_scorer() -> str:
+    """Return the configured BM25 scorer, falling back to okapi for unknown values."""
+    scorer = (settings.BM25_SCORER or "okapi").strip().lower()
+    return scorer if scorer in BM25_SCORERS else "okapi"
+
+
 def build_bm25_config(
     config_map: DynamicSettingsMapping | None,
     *,
@@ -89,10 +154,15 @@ def build_bm25_config(
     """Construct BM25 search configuration from request caps and dynamic min_rank."""
 
     top_k = max(1, min(requested_top_k, 100))
+    # 两种打分的量纲不同：Okapi 得分通常为 0~数十，ts_rank_cd 通常小于 1，阈值分开配置
+    if resolve_bm25_scorer() == "okapi":
+        min_rank_key, min_rank_default = "BM25_OKAPI_MIN_RANK", settings.BM25_OKAPI_MIN_RANK
+    else:
+        min_rank_key, min_rank_default = "BM25_MIN_RANK", settings.BM25_MIN_RANK
     min_rank = _read_setting(
         config_map,
-        "BM25_MIN_RANK",
-        default=settings.BM25_MIN_RANK,
+        min_rank_key,
+        default=min_rank_default,
         caster=float,
         minimum=0.0,
     )
@@ -102,11 +172,152 @@ def build_bm25_config(
     )
 
 
+def build_fusion_config(config_map: DynamicSettingsMapping | None) -> FusionConfig:
+    """Construct the hybrid fusion strategy from dynamic settings."""
+
+    mode = _read_setting(
+        config_map,
+        "RAG_FUSION_MODE",
+        default=settings.RAG_FUSION_MODE,
+        caster=lambda value: str(value).strip().lower(),
+    )
+    if mode not in FUSION_MODES:
+        logger.warning("Unknown RAG_FUSION_MODE %r, falling back to %s", mode, settings.RAG_FUSION_MODE)
+        mode = settings.RAG_FUSION_MODE
+    rrf_k = _read_setting(
+        config_map,
+        "RAG_RRF_K",
+        default=settings.RAG_RRF_K,
+        caster=int,
+        minimum=1,
+    )
+    vector_weight = _read_setting(
+        config_map,
+        "RAG_FUSION_VECTOR_WEIGHT",
+        default=settings.RAG_FUSION_VECTOR_WEIGHT,
+        caster=float,
+        minimum=0.0,
+        maximum=1.0,
+    )
+    return FusionConfig(mode=mode, rrf_k=rrf_k, vector_weight=vector_weight)
+
+
+def build_rerank_config(config_map: DynamicSettingsMapping | None) -> RerankConfig:
+    """Construct the optional rerank stage configuration from dynamic settings."""
+
+    enabled = _read_setting(
+        config_map,
+        "RAG_RERANK_ENABLED",
+        default=settings.RAG_RERANK_ENABLED,
+        caster=_as_bool,
+    )
+    candidates = _read_setting(
+        config_map,
+        "RAG_RERANK_CANDIDATES",
+        default=settings.RAG_RERANK_CANDIDATES,
+        caster=int,
+        minimum=1,
+    )
+    top_n = _read_setting(
+        config_map,
+        "RAG_RERANK_TOP_N",
+        default=settings.RAG_RERANK_TOP_N,
+        caster=int,
+        minimum=1,
+    )
+    score_threshold = _read_setting(
+        config_map,
+        "RAG_RERANK_SCORE_THRESHOLD",
+        default=settings.RAG_RERANK_SCORE_THRESHOLD,
+        caster=float,
+        minimum=0.0,
+        maximum=1.0,
+    )
+    return RerankConfig(
+        enabled=enabled,
+        candidates=candidates,
+        top_n=top_n,
+        score_threshold=score_threshold,
+    )
+
+
+def build_vector_index_config(config_map: DynamicSettingsMapping | None) -> VectorIndexConfig:
+    """Construct ivfflat.probes / hnsw.ef_search values from dynamic settings."""
+
+    probes = _read_setting(
+        config_map,
+        "RAG_IVFFLAT_PROBES",
+        default=settings.RAG_IVFFLAT_PROBES,
+        caster=int,
+        minimum=1,
+    )
+    ef_search = _read_setting(
+        config_map,
+        "RAG_HNSW_EF_SEARCH",
+        default=settings.RAG_HNSW_EF_SEARCH,
+        caster=int,
+        minimum=1,
+        maximum=1000,
+    )
+    return VectorIndexConfig(ivfflat_probes=probes, hnsw_ef_search=ef_search)
+
+
+def build_splitter_config(config_map: DynamicSettingsMapping | None) -> SplitterConfig:
+    """Construct chunk size / overlap (tiktoken tokens) from dynamic settings."""
+
+    chunk_size = _read_setting(
+        config_map,
+        "INGEST_CHUNK_TOKENS",
+        default=settings.INGEST_CHUNK_TOKENS,
+        caster=int,
+        minimum=64,
+        maximum=8192,
+    )
+    # 重叠必须小于块大小，否则分割器无法前进
+    chunk_overlap = _read_setting(
+        config_map,
+        "INGEST_CHUNK_OVERLAP",
+        default=settings.INGEST_CHUNK_OVERLAP,
+        caster=int,
+        minimum=0,
+        maximum=chunk_size // 2,
+    )
+    return SplitterConfig(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def build_context_config(config_map: DynamicSettingsMapping | None) -> ContextConfig:
+    """Construct the context assembly configuration from dynamic settings."""
+
+    neighbor_window = _read_setting(
+        config_map,
+        "RAG_CONTEXT_NEIGHBORS",
+        default=settings.RAG_CONTEXT_NEIGHBORS,
+        caster=int,
+        minimum=0,
+        maximum=3,
+    )
+    return ContextConfig(neighbor_window=neighbor_window)
+
+
 # 导出模块内的主要类和函数
 __all__ = [
     "BM25SearchConfig",
+    "BM25_SCORERS",
+    "ContextConfig",
     "DynamicSettingsMapping",
+    "FUSION_MODES",
+    "FusionConfig",
     "RagSearchConfig",
+    "RerankConfig",
+    "SplitterConfig",
+    "VectorIndexConfig",
     "build_bm25_config",
+    "build_context_config",
+    "build_fusion_config",
     "build_rag_config",
+    "build_rerank_config",
+    "build_splitter_config",
+    "build_vector_index_config",
+    "resolve_bm25_scorer",
 ]
+
@@ -0,0 +1,203 @@
+"""Prompt context assembly for retrieved chunks.
+将检索命中的块组装为提示上下文：按文档分组、合并相邻 chunk_index 区间并去除分块重叠文本，
+可选地用一条批量查询补齐命中块前后的相邻块，以更少的提示 token 提供更连贯的上下文。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .repository import KnowledgeChunkRow, KnowledgeDocumentRef, crud_knowledge_base
+from .retrieval import RetrievedChunk
+
+# 重叠短于该长度时视为巧合（如共同的标点或单词），不做去重
+MIN_OVERLAP_CHARS = 16
+# 只在前后块各自的这一段范围内查找重叠（分块重叠为数百 token，远小于该值）
+MAX_OVERLAP_CHARS = 4096
+
+
+@dataclass(slots=True)
+class ContextPassage:
+    """一段连续的上下文：同一文档中 chunk_index 相邻的若干块合并而成。"""
+
+    document_id: int | None
+    document: KnowledgeDocumentRef | None
+    start_index: int | None
+    end_index: int | None
+    content: str
+    chunk_ids: list[int] = field(default_factory=list)
+    # 段内命中块在检索结果中的位置（从 1 开始，对应 [CITEx]）
+    cite_positions: list[int] = field(default_factory=list)
+    similarity: float = 0.0
+
+
+def overlap_length(
+    left: str,
+    right: str,
+    *,
+    min_chars: int = MIN_OVERLAP_CHARS,
+    max_chars: int = MAX_OVERLAP_CHARS,
+) -> int:
+    """返回 ``left`` 的后缀与 ``right`` 的前缀最长重合的字符数（KMP 前缀函数，线性时间）。"""
+    limit = min(len(left), len(right), max_chars)
+    if limit < min_chars:
+        return 0
+    # right 前缀 + 分隔符 + left 尾部：末位的前缀函数值即为最长重合
+    probe = right[:limit] + "\x00" + left[-limit:]
+    prefix = [0] * len(probe)
+    for position in range(1, len(probe)):
+        matched = prefix[position - 1]
+        while matched and probe[position] != probe[matched]:
+            matched = prefix[matched - 1]
+        if probe[position] == probe[matched]:
+            matched += 1
+        prefix[position] = matched
+    overlap = prefix[-1]
+    return overlap if overlap >= min_chars else 0
+
+
+def merge_chunk_texts(texts: Iterable[str]) -> str:
+    """按顺序拼接相邻块，去除前后块之间的重叠部分。"""
+    merged = ""
+    for text in texts:
+        piece = (text or "").strip()
+        if not piece:
+            continue
+        if not merged:
+            merged = piece
+            continue
+        overlap = overlap_length(merged, piece)
+        if overlap:
+            merged += piece[overlap:]
+        else:
+            merged += "\n" + piece
+    return merged
+
+
+def neighbor_ranges(hits: Sequence[RetrievedChunk], window: int) -> list[tuple[int, int, int]]:
+    """计算每个命中块前后 ``window`` 个块的区间，同一文档内重叠或相接的区间合并。"""
+    if window <= 0:
+        return []
+    spans: dict[int, list[tuple[int, int]]] = {}
+    for item in hits:
+        chunk = item.chunk
+        if chunk.document_id is None or chunk.chunk_index is None:
+            continue
+        spans.setdefault(chunk.document_id, []).append(
+            (max(0, chunk.chunk_index - window), chunk.chunk_index + window)
+        )
+
+    ranges: list[tuple[int, int, int]] = []
+    for document_id, intervals in spans.items():
+        intervals.sort()
+        start, end = intervals[0]
+        for lo, hi in intervals[1:]:
+            if lo <= end + 1:
+                end = max(end, hi)
+                continue
+            ranges.append((document_id, start, end))
+            start, end = lo, hi
+        ranges.append((document_id, start, end))
+    return ranges
+
+
+async def fetch_neighbor_chunks(
+    db: AsyncSession,
+    hits: Sequence[RetrievedChunk],
+    *,
+    window: int,
+) -> list[KnowledgeChunkRow]:
+    """用一条查询取回命中块前后 ``window`` 个相邻块（不含命中块本身）。"""
+    ranges = neighbor_ranges(hits, window)
+    if not ranges:
+        return []
+    hit_ids = {item.chunk.id for item in hits}
+    rows = await crud_knowledge_base.get_chunk_rows_in_ranges(db, ranges)
+    return [row for row in rows if row.id not in hit_ids]
+
+
+def assemble_passages(
+    hits: Sequence[RetrievedChunk],
+    neighbors: Sequence[KnowledgeChunkRow] = (),
+) -> list[ContextPassage]:
+    """将命中块（及可选的相邻块）组装为上下文段落。
+
+    同一文档中 chunk_index 连续的块合并为一段并去除重叠文本；缺少文档或序号的块单独成段。
+    段落按其中排名最靠前的命中块排序，``cite_positions`` 保留命中块在 ``hits`` 中的位置。
+    """
+    standalone: list[ContextPassage] = []
+    grouped: dict[int, dict[int, tuple[KnowledgeChunkRow, int | None, float]]] = {}
+
+    for position, item in enumerate(hits, start=1):
+        chunk = item.chunk
+        if chunk.document_id is None or chunk.chunk_index is None:
+            standalone.append(
+                ContextPassage(
+                    document_id=chunk.document_id,
+                    document=chunk.document,
+                    start_index=chunk.chunk_index,
+                    end_index=chunk.chunk_index,
+                    content=(chunk.content or "").strip(),
+                    chunk_ids=[chunk.id],
+                    cite_positions=[position],
+                    similarity=float(item.similarity),
+                )
+            )
+            continue
+        slots = grouped.setdefault(chunk.document_id, {})
+        # 同一块重复命中时保留排名靠前的一次
+        slots.setdefault(chunk.chunk_index, (chunk, position, float(item.similarity)))
+
+    for row in neighbors:
+        if row.document_id in grouped and row.chunk_index is not None:
+            grouped[row.document_id].setdefault(row.chunk_index, (row, None, 0.0))
+
+    passages = standalone
+    for document_id, slots in grouped.items():
+        run: list[tuple[int, tuple[KnowledgeChunkRow, int | None, float]]] = []
+        for chunk_index in sorted(slots):
+            if run and chunk_index != run[-1][0] + 1:
+                passages.extend(_passage_from_run(document_id, run))
+                run = []
+            run.append((chunk_index, slots[chunk_index]))
+        passages.extend(_passage_from_run(document_id, run))
+
+    passages.sort(key=lambda passage: min(passage.cite_positions))
+    return passages
+
+
+def _passage_from_run(
+    document_id: int,
+    run: list[tuple[int, tuple[KnowledgeChunkRow, int | None, float]]],
+) -> list[ContextPassage]:
+    positions = [position for _, (_, position, _) in run if position is not None]
+    if not positions:
+        # 只由相邻块组成的区间（命中块之间未被补齐的部分）不输出
+        return []
+    rows = [row for _, (row, _, _) in run]
+    document = next((row.document for row in rows if row.document is not None), None)
+    return [
+        ContextPassage(
+            document_id=document_id,
+            document=document,
+            start_index=run[0][0],
+            end_index=run[-1][0],
+            content=merge_chunk_texts(row.content for row in rows),
+            chunk_ids=[row.id for row in rows],
+            cite_positions=sorted(positions),
+            similarity=max(similarity for _, (_, position, similarity) in run if position is not None),
+        )
+    ]
+
+
+__all__ = [
+    "ContextPassage",
+    "assemble_passages",
+    "fetch_neighbor_chunks",
+    "merge_chunk_texts",
+    "neighbor_ranges",
+    "overlap_length",
+]
@@ -0,0 +1,153 @@
+"""Dynamic micro-batching for embedding requests.
+嵌入请求的动态微批处理：并发调用方的待编码文本在短时间窗口内合并为一次前向计算，
+再按请求拆分结果返回，降低 CPU 推理时大量 batch=1 调用的开销与争用。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Sequence
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+from .embeddings import get_embedder
+
+logger = logging.getLogger(__name__)
+
+EncodeFn = Callable[[list[str]], np.ndarray]
+
+
+@dataclass(slots=True)
+class _PendingEncode:
+    texts: list[str]
+    future: asyncio.Future = field(repr=False)
+
+
+def _encode_with_embedder(texts: list[str]) -> np.ndarray:
+    """同步地用共享嵌入模型生成归一化向量（在线程池中调用）。"""
+    vectors = get_embedder().encode(texts, normalize_embeddings=True)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+class EmbeddingBatcher:
+    """Collect concurrent encode requests and run them as batched forward passes.
+
+    第一个请求到达后最多等待 ``max_wait_ms``（或凑满 ``max_batch_size`` 条文本）即开始编码；
+    同一时刻只有一次前向计算在执行，其间到达的请求自然累积为下一批。
+    单个请求的文本不会被拆到不同批次，超过 ``max_batch_size`` 的请求单独成批。
+    """
+
+    def __init__(
+        self,
+        encode_fn: EncodeFn,
+        *,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self._encode_fn = encode_fn
+        self._max_batch_size = max(1, int(max_batch_size))
+        self._max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._pending: list[_PendingEncode] = []
+        self._pending_texts = 0
+        self._filled: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _bind_loop(self) -> None:
+        # 状态与事件循环绑定；循环变化（如测试中多次 asyncio.run）时重新初始化
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._pending_texts = 0
+            self._filled = asyncio.Event()
+            self._worker = None
+
+    async def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """提交一组文本，返回与输入顺序一致的 ``(len(texts), dim)`` 向量矩阵。"""
+        items = list(texts)
+        if not items:
+            return np.empty((0, 0), dtype=np.float32)
+
+        self._bind_loop()
+        assert self._loop is not None and self._filled is not None
+        request = _PendingEncode(texts=items, future=self._loop.create_future())
+        self._pending.append(request)
+        self._pending_texts += len(items)
+        if self._pending_texts >= self._max_batch_size:
+            self._filled.set()
+        if self._worker is None or self._worker.done():
+            self._worker = self._loop.create_task(self._drain())
+        return await request.future
+
+    def _take_batch(self) -> list[_PendingEncode]:
+        batch: list[_PendingEncode] = []
+        size = 0
+        while self._pending:
+            request = self._pending[0]
+            if batch and size + len(request.texts) > self._max_batch_size:
+                break
+            batch.append(self._pending.pop(0))
+            size += len(request.texts)
+        self._pending_texts -= size
+        return batch
+
+    async def _drain(self) -> None:
+        assert self._filled is not None
+        while self._pending:
+            if self._pending_texts < self._max_batch_size and self._max_wait > 0:
+                try:
+                    await asyncio.wait_for(self._filled.wait(), timeout=self._max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            self._filled.clear()
+            batch = self._take_batch()
+            if self._pending_texts >= self._max_batch_size:
+                self._filled.set()
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch: list[_PendingEncode]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        try:
+            vectors = await run_in_threadpool(self._encode_fn, texts)
+        except BaseException as exc:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(exc)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            logger.warning("Batched embedding of %d texts failed: %s", len(texts), exc)
+            return
+
+        offset = 0
+        for request in batch:
+            count = len(request.texts)
+            if not request.future.done():
+                request.future.set_result(vectors[offset : offset + count])
+            offset += count
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """返回进程内共享的嵌入批处理器单例。"""
+    return EmbeddingBatcher(
+        _encode_with_embedder,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+    )
+
+
+async def encode_texts(texts: Sequence[str]) -> np.ndarray:
+    """为一组文本生成归一化嵌入向量；启用微批处理时与其他并发请求合并编码。"""
+    if not settings.EMBEDDING_BATCH_ENABLED:
+        return await run_in_threadpool(_encode_with_embedder, list(texts))
+    return await get_embedding_batcher().encode(texts)
+
+
+__all__ = ["EmbeddingBatcher", "encode_texts", "get_embedding_batcher"]
@@ -0,0 +1,258 @@
+"""Two-tier cache for query embeddings.
+查询向量的两级缓存：进程内 LRU（float32 向量）+ Redis（打包的二进制向量）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from app.core.config import settings
+from app.infrastructure.redis.keyspace import redis_keys
+from app.infrastructure.redis.redis_base import RedisBase
+
+logger = logging.getLogger(__name__)
+
+# Redis 中向量统一以小端 float32 存储
+_VECTOR_DTYPE = np.dtype("<f4")
+
+
+@dataclass(slots=True)
+class QueryEmbeddingCacheStats:
+    """命中/未命中计数器快照。"""
+
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    max_entries: int = 0
+
+
+def normalize_query_text(query: str) -> str:
+    """归一化查询文本：NFKC 规范化并折叠空白字符。"""
+    return " ".join(unicodedata.normalize("NFKC", query or "").split())
+
+
+def pack_vector(vector: np.ndarray) -> str:
+    """将向量打包为 float32 字节并做 base64 编码（连接池启用了 decode_responses）。"""
+    raw = np.ascontiguousarray(vector, dtype=_VECTOR_DTYPE).tobytes()
+    return base64.b64encode(raw).decode("ascii")
+
+
+def unpack_vector(payload: str | bytes) -> np.ndarray:
+    """将 :func:`pack_vector` 的结果还原为只读 float32 向量。"""
+    raw = base64.b64decode(payload)
+    vector = np.frombuffer(raw, dtype=_VECTOR_DTYPE).astype(np.float32)
+    vector.setflags(write=False)
+    return vector
+
+
+class QueryEmbeddingCache:
+    """Cache query embeddings in an in-process LRU backed by Redis.
+
+    键由模型名与归一化后的查询文本共同决定；两级缓存均带 TTL，LRU 按容量淘汰。
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisBase | None,
+        *,
+        model_name: str,
+        max_entries: int = 2048,
+        ttl_seconds: int = 3600,
+        redis_ttl_seconds: int = 86400,
+    ) -> None:
+        self._redis = redis_client
+        self._model_name = model_name
+        self._max_entries = max(0, int(max_entries))
+        self._ttl_seconds = max(1, int(ttl_seconds))
+        self._redis_ttl_seconds = max(1, int(redis_ttl_seconds))
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = QueryEmbeddingCacheStats(max_entries=self._max_entries)
+
+    def make_key(self, query: str) -> str:
+        """返回 (模型名, 归一化查询) 的摘要，用作两级缓存共同的键。"""
+        payload = f"{self._model_name}\x00{normalize_query_text(query)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _get_local(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, vector = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._stats.local_hits += 1
+            return vector
+
+    def _put_local(self, key: str, vector: np.ndarray) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    async def _get_remote(self, key: str) -> np.ndarray | None:
+        return (await self._get_remote_many([key]))[0]
+
+    async def _get_remote_many(self, keys: list[str]) -> list[np.ndarray | None]:
+        """用一次 MGET 读取多个键，结果与 ``keys`` 顺序一致。"""
+        if self._redis is None or not keys:
+            return [None] * len(keys)
+        try:
+            await self._redis.ensure_connection()
+            payloads = await self._redis.mget(*(redis_keys.knowledge.query_embedding(key) for key in keys))
+        except Exception as exc:  # pragma: no cover - RedisBase already logs
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            logger.debug("Query embedding cache Redis read failed: %s", exc)
+            return [None] * len(keys)
+
+        vectors: list[np.ndarray | None] = []
+        for key, payload in zip(keys, payloads):
+            if not payload:
+                vectors.append(None)
+                continue
+            try:
+                vectors.append(unpack_vector(payload))
+            except (ValueError, TypeError):
+                logger.warning("Discarding malformed cached query embedding %s", key)
+                vectors.append(None)
+        return vectors
+
+    async def _put_remote(self, key: str, vector: np.ndarray) -> None:
+        await self._put_remote_many({key: vector})
+
+    async def _put_remote_many(self, items: dict[str, np.ndarray]) -> None:
+        """通过一次 Pipeline 往返回填多个键。"""
+        if self._redis is None or not items:
+            return
+        try:
+            await self._redis.ensure_connection()
+            await self._redis.set_many(
+                {redis_keys.knowledge.query_embedding(key): pack_vector(vector) for key, vector in items.items()},
+                ttl=self._redis_ttl_seconds,
+            )
+        except Exception as exc:  # pragma: no cover - RedisBase already logs
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            logger.debug("Query embedding cache Redis write failed: %s", exc)
+
+    async def get_or_encode(
+        self,
+        query: str,
+        encoder: Callable[[str], Awaitable[np.ndarray]],
+    ) -> np.ndarray:
+        """依次查询 LRU、Redis，均未命中时调用 ``encoder`` 并回填两级缓存。"""
+        key = self.make_key(query)
+
+        vector = self._get_local(key)
+        if vector is not None:
+            return vector
+
+        vector = await self._get_remote(key)
+        if vector is not None:
+            with self._lock:
+                self._stats.redis_hits += 1
+            self._put_local(key, vector)
+            return vector
+
+        with self._lock:
+            self._stats.misses += 1
+        encoded = np.asarray(await encoder(query), dtype=np.float32)
+        vector = encoded.copy()
+        vector.setflags(write=False)
+        self._put_local(key, vector)
+        await self._put_remote(key, vector)
+        return vector
+
+    async def get_or_encode_many(
+        self,
+        queries: list[str],
+        encoder: Callable[[list[str]], Awaitable[np.ndarray]],
+    ) -> list[np.ndarray]:
+        """批量版本：本地未命中的键合并为一次 MGET，仍未命中的查询合并为一次 ``encoder``
+        调用并通过一次 Pipeline 回填 Redis，结果按输入顺序返回。
+        """
+        keys = [self.make_key(query) for query in queries]
+        vectors: list[np.ndarray | None] = [self._get_local(key) for key in keys]
+
+        remote = [index for index, vector in enumerate(vectors) if vector is None]
+        if remote:
+            fetched = await self._get_remote_many([keys[index] for index in remote])
+            for index, vector in zip(remote, fetched):
+                if vector is None:
+                    continue
+                with self._lock:
+                    self._stats.redis_hits += 1
+                self._put_local(keys[index], vector)
+                vectors[index] = vector
+
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            with self._lock:
+                self._stats.misses += len(missing)
+            encoded = np.asarray(await encoder([queries[index] for index in missing]), dtype=np.float32)
+            written: dict[str, np.ndarray] = {}
+            for index, row in zip(missing, encoded):
+                vector = row.copy()
+                vector.setflags(write=False)
+                vectors[index] = vector
+                self._put_local(keys[index], vector)
+                written[keys[index]] = vector
+            await self._put_remote_many(written)
+
+        return [vector for vector in vectors if vector is not None]
+
+    def stats(self) -> QueryEmbeddingCacheStats:
+        """返回计数器快照。"""
+        with self._lock:
+            snapshot = QueryEmbeddingCacheStats(**asdict(self._stats))
+            snapshot.size = len(self._entries)
+        return snapshot
+
+    def clear(self) -> None:
+        """清空进程内缓存（不影响 Redis）。"""
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache(maxsize=1)
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """返回绑定共享 Redis 连接池的查询向量缓存单例。"""
+    return QueryEmbeddingCache(
+        RedisBase(key_prefix="kb:"),
+        model_name=settings.EMBEDDING_MODEL,
+        max_entries=settings.QUERY_EMBEDDING_CACHE_SIZE,
+        ttl_seconds=settings.QUERY_EMBEDDING_CACHE_TTL,
+        redis_ttl_seconds=settings.QUERY_EMBEDDING_CACHE_REDIS_TTL,
+    )
+
+
+__all__ = [
+    "QueryEmbeddingCache",
+    "QueryEmbeddingCacheStats",
+    "get_query_embedding_cache",
+    "normalize_query_text",
+    "pack_vector",
+    "unpack_vector",
+]
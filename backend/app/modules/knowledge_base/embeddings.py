@@ -2,22 +2,53 @@ from __future__ import annotations
 
 import logging
 import threading
-from typing import Optional
+from typing import Optional, Union
 
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import CrossEncoder, SentenceTransformer
 
 from app.core.config import settings
 
+from .onnx_embedder import OnnxEmbedder
+
 # 获取日志记录器
 logger = logging.getLogger(__name__)
 
 # 用于嵌入器单例的线程锁
 _EMBEDDER_LOCK = threading.Lock()
-# 全局嵌入器实例 (SentenceTransformer)
-_EMBEDDER: Optional[SentenceTransformer] = None
+# 全局嵌入器实例 (SentenceTransformer 或 OnnxEmbedder，二者 encode 接口一致)
+Embedder = Union[SentenceTransformer, OnnxEmbedder]
+_EMBEDDER: Optional[Embedder] = None
+# 用于重排模型单例的线程锁
+_RERANKER_LOCK = threading.Lock()
+# 全局重排模型实例 (CrossEncoder)
+_RERANKER: Optional[CrossEncoder] = None
+
+def _load_embedder(model_name: str) -> Embedder:
+    """按 EMBEDDING_BACKEND 构造嵌入模型。"""
+    backend = (settings.EMBEDDING_BACKEND or "torch").strip().lower()
+    if backend == "onnx":
+        logger.info(
+            "正在加载 ONNX 嵌入模型 %s（int8 量化: %s）",
+            model_name,
+            settings.EMBEDDING_ONNX_QUANTIZE,
+        )
+        return OnnxEmbedder(
+            model_name,
+            onnx_path=settings.EMBEDDING_ONNX_PATH or None,
+            quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+            max_length=settings.EMBEDDING_MAX_LENGTH,
+            intra_op_threads=settings.EMBEDDING_ONNX_THREADS,
+        )
+    if backend != "torch":
+        raise RuntimeError(f"未知的 EMBEDDING_BACKEND: {settings.EMBEDDING_BACKEND}")
+    # 记录正在加载模型的日志
+    logger.info("正在加载嵌入模型 %s", model_name)
+    # 初始化 SentenceTransformer 实例
+    return SentenceTransformer(model_name)
+
 
-def get_embedder() -> SentenceTransformer:
-    """返回一个单例的 SentenceTransformer 实例，延迟初始化。"""
+def get_embedder() -> Embedder:
+    """返回一个单例的嵌入模型实例（PyTorch 或 ONNX Runtime 后端），延迟初始化。"""
     global _EMBEDDER
     # 如果实例已存在，直接返回
     if _EMBEDDER is not None:
@@ -32,11 +63,27 @@ def get_embedder() -> SentenceTransformer:
             if not model_name:
                 # 如果模型名称未配置，则抛出运行时错误
                 raise RuntimeError("EMBEDDING_MODEL 未配置")
-            # 记录正在加载模型的日志
-            logger.info("正在加载嵌入模型 %s", model_name)
-            # 初始化 SentenceTransformer 实例
-            _EMBEDDER = SentenceTransformer(model_name)
+            _EMBEDDER = _load_embedder(model_name)
     return _EMBEDDER
 
+def get_reranker() -> CrossEncoder:
+    """返回一个单例的 CrossEncoder 重排模型（CPU），延迟初始化。"""
+    global _RERANKER
+    if _RERANKER is not None:
+        return _RERANKER
+
+    with _RERANKER_LOCK:
+        if _RERANKER is None:
+            model_name = settings.RERANK_MODEL
+            if not model_name:
+                raise RuntimeError("RERANK_MODEL 未配置")
+            logger.info("正在加载重排模型 %s", model_name)
+            _RERANKER = CrossEncoder(
+                model_name,
+                max_length=settings.RERANK_MAX_LENGTH,
+                device="cpu",
+            )
+    return _RERANKER
+
 # 导出模块内的主要函数
-__all__ = ["get_embedder"]
+__all__ = ["get_embedder", "get_reranker"]
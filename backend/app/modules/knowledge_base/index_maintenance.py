@@ -0,0 +1,196 @@
+"""ANN index maintenance for ``knowledge_chunks.embedding``.
+知识块向量索引（HNSW / IVFFlat）的重建与参数调优工具。
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+
+from .models import embedding_storage
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_INDEX_NAME = "ix_knowledge_chunks_embedding"
+VECTOR_INDEX_TYPES = ("hnsw", "ivfflat")
+
+# 重建任务可能把线上索引切换为另一种类型，查询期参数以系统目录中的实际访问方法为准。
+# 进程内缓存 (索引类型, 读取时刻)：本进程重建后立即更新，其他进程（如聊天 worker）在 TTL 过期后重新读取
+ACTIVE_INDEX_TYPE_TTL_SECONDS = 60.0
+_active_index_type_cache: dict[str, tuple[str, float]] = {}
+
+_ACTIVE_INDEX_TYPE_SQL = text(
+    "SELECT am.amname FROM pg_class AS c JOIN pg_am AS am ON am.oid = c.relam "
+    "WHERE c.oid = to_regclass(:index_name)"
+)
+
+
+@dataclass(slots=True)
+class IndexRebuildResult:
+    """一次索引重建的摘要。"""
+
+    index_type: str
+    row_count: int
+    lists: int | None
+    probes: int | None
+    m: int | None
+    ef_construction: int | None
+
+
+def recommended_ivfflat_lists(row_count: int) -> int:
+    """按 pgvector 建议计算 lists：100 万行以内取 rows/1000，超过则取 sqrt(rows)。"""
+    if row_count <= 0:
+        return 1
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return max(1, int(math.sqrt(row_count)))
+
+
+def recommended_ivfflat_probes(lists: int) -> int:
+    """按 pgvector 建议计算 probes：sqrt(lists)。"""
+    return max(1, int(math.sqrt(max(1, lists))))
+
+
+def build_index_ddl(
+    index_name: str,
+    index_type: str,
+    *,
+    lists: int | None = None,
+    m: int | None = None,
+    ef_construction: int | None = None,
+    concurrently: bool = True,
+) -> str:
+    """生成 ``CREATE INDEX`` 语句（余弦距离，算子类与 embedding 列的存储类型一致）。"""
+    if index_type not in VECTOR_INDEX_TYPES:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+
+    if index_type == "hnsw":
+        options = f"m = {int(m or settings.HNSW_M)}, ef_construction = {int(ef_construction or settings.HNSW_EF_CONSTRUCTION)}"
+    else:
+        options = f"lists = {int(lists or 100)}"
+
+    keyword = "CONCURRENTLY " if concurrently else ""
+    opclass = f"{embedding_storage()}_cosine_ops"
+    return (
+        f"CREATE INDEX {keyword}{index_name} ON knowledge_chunks "
+        f"USING {index_type} (embedding {opclass}) WITH ({options})"
+    )
+
+
+def configured_index_type() -> str:
+    """返回配置的 ``VECTOR_INDEX_TYPE``（未知取值回退为 hnsw）。"""
+    index_type = (settings.VECTOR_INDEX_TYPE or "hnsw").strip().lower()
+    return index_type if index_type in VECTOR_INDEX_TYPES else "hnsw"
+
+
+def remember_active_index_type(index_type: str) -> None:
+    """记录本进程已知的线上索引类型（重建完成后调用）。"""
+    _active_index_type_cache[EMBEDDING_INDEX_NAME] = (index_type, time.monotonic())
+
+
+async def get_active_index_type(db: AsyncSession) -> str:
+    """返回 ``EMBEDDING_INDEX_NAME`` 当前的索引类型（hnsw / ivfflat）。
+
+    按 ``ACTIVE_INDEX_TYPE_TTL_SECONDS`` 缓存目录查询结果；索引不存在（例如重建过程中）
+    或为其他访问方法时回退为配置值。
+    """
+    cached = _active_index_type_cache.get(EMBEDDING_INDEX_NAME)
+    if cached is not None and time.monotonic() - cached[1] < ACTIVE_INDEX_TYPE_TTL_SECONDS:
+        return cached[0]
+
+    result = await db.execute(_ACTIVE_INDEX_TYPE_SQL, {"index_name": EMBEDDING_INDEX_NAME})
+    index_type = result.scalar_one_or_none()
+    if index_type not in VECTOR_INDEX_TYPES:
+        index_type = configured_index_type()
+    remember_active_index_type(index_type)
+    return index_type
+
+
+async def rebuild_embedding_index(
+    engine: AsyncEngine,
+    *,
+    index_type: str,
+    lists: int | None = None,
+    m: int | None = None,
+    ef_construction: int | None = None,
+) -> IndexRebuildResult:
+    """在线重建向量索引。
+
+    先以 ``CREATE INDEX CONCURRENTLY`` 构建临时索引，再删除旧索引并重命名，整个过程不阻塞读写。
+    ``ivfflat`` 未指定 ``lists`` 时按当前行数自动计算。
+    """
+    if index_type not in VECTOR_INDEX_TYPES:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+
+    staging_name = f"{EMBEDDING_INDEX_NAME}_rebuild"
+
+    async with engine.connect() as raw_conn:
+        # CONCURRENTLY 不能在事务块中执行
+        conn = await raw_conn.execution_options(isolation_level="AUTOCOMMIT")
+        row_count = int((await conn.execute(text("SELECT count(*) FROM knowledge_chunks"))).scalar_one() or 0)
+
+        probes: int | None = None
+        if index_type == "ivfflat":
+            lists = lists or recommended_ivfflat_lists(row_count)
+            probes = recommended_ivfflat_probes(lists)
+        else:
+            m = m or settings.HNSW_M
+            ef_construction = ef_construction or settings.HNSW_EF_CONSTRUCTION
+            lists = None
+
+        logger.info(
+            "Rebuilding %s as %s (rows=%s lists=%s m=%s ef_construction=%s)",
+            EMBEDDING_INDEX_NAME,
+            index_type,
+            row_count,
+            lists,
+            m,
+            ef_construction,
+        )
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {staging_name}"))
+        await conn.execute(
+            text(
+                build_index_ddl(
+                    staging_name,
+                    index_type,
+                    lists=lists,
+                    m=m,
+                    ef_construction=ef_construction,
+                )
+            )
+        )
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {EMBEDDING_INDEX_NAME}"))
+        await conn.execute(text(f"ALTER INDEX {staging_name} RENAME TO {EMBEDDING_INDEX_NAME}"))
+        await conn.execute(text("ANALYZE knowledge_chunks"))
+
+    remember_active_index_type(index_type)
+    return IndexRebuildResult(
+        index_type=index_type,
+        row_count=row_count,
+        lists=lists,
+        probes=probes,
+        m=m if index_type == "hnsw" else None,
+        ef_construction=ef_construction if index_type == "hnsw" else None,
+    )
+
+
+__all__ = [
+    "ACTIVE_INDEX_TYPE_TTL_SECONDS",
+    "EMBEDDING_INDEX_NAME",
+    "IndexRebuildResult",
+    "VECTOR_INDEX_TYPES",
+    "build_index_ddl",
+    "configured_index_type",
+    "get_active_index_type",
+    "rebuild_embedding_index",
+    "recommended_ivfflat_lists",
+    "recommended_ivfflat_probes",
+    "remember_active_index_type",
+]
@@ -4,6 +4,7 @@
 
 from __future__ import annotations
 
+import codecs
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -43,6 +44,52 @@ def _decode_bytes_to_text(raw: bytes) -> str:
     return raw.decode("utf-8", errors="ignore")
 
 
+class IncrementalTextDecoder:
+    """Decode a byte stream piece by piece without buffering the whole payload.
+    增量解码字节流：用首个样本检测编码，之后使用增量解码器处理跨块的多字节字符。
+    """
+
+    def __init__(self, *, sample_size: int = 64 * 1024) -> None:
+        self._sample_size = max(1, sample_size)
+        self._pending = b""
+        self._decoder: codecs.IncrementalDecoder | None = None
+        self.encoding: str | None = None
+
+    def _init_decoder(self, sample: bytes) -> None:
+        encoding = "utf-8"
+        try:
+            best = from_bytes(sample).best()
+            if best is not None and best.encoding:
+                encoding = best.encoding
+        except Exception:  # pragma: no cover - charset detection can fail
+            pass
+        # 样本全为 ASCII 时后续内容仍可能包含多字节字符
+        if codecs.lookup(encoding).name == "ascii":
+            encoding = "utf-8"
+        self.encoding = encoding
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+
+    def feed(self, raw: bytes) -> str:
+        """输入下一段字节，返回当前可解码的文本。"""
+        if self._decoder is None:
+            self._pending += raw
+            if len(self._pending) < self._sample_size:
+                return ""
+            self._init_decoder(self._pending)
+            raw, self._pending = self._pending, b""
+        return self._decoder.decode(raw)
+
+    def finish(self) -> str:
+        """结束输入，返回剩余文本。"""
+        if self._decoder is None:
+            if not self._pending:
+                return ""
+            self._init_decoder(self._pending)
+            raw, self._pending = self._pending, b""
+            return self._decoder.decode(raw, final=True)
+        return self._decoder.decode(b"", final=True)
+
+
 def extract_from_text(content: str, *, source_ref: str | None = None) -> list[ExtractedElement]:
     """Normalize plain text input into a single ExtractedElement list.
     将纯文本输入标准化为单个 ExtractedElement 列表。
@@ -73,4 +120,4 @@ def extract_from_bytes(
     return decoded, elements
 
 
-__all__ = ["ExtractedElement", "extract_from_text", "extract_from_bytes"]
+__all__ = ["ExtractedElement", "IncrementalTextDecoder", "extract_from_text", "extract_from_bytes"]
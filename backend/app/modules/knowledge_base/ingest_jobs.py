@@ -0,0 +1,158 @@
+"""Ingestion job tracking.
+异步摄入任务的状态跟踪：最新快照写入 Redis（供轮询），同时发布到频道（供 SSE 推送）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+from app.infrastructure.redis.keyspace import redis_keys
+from app.infrastructure.redis.redis_base import RedisBase
+
+logger = logging.getLogger(__name__)
+
+INGEST_JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+INGEST_FINAL_STATUSES = ("succeeded", "failed")
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(slots=True)
+class IngestProgress:
+    """摄入进度计数：已提取字符数、已切分块数、已编码块数、已写入块数。"""
+
+    extracted: int = 0
+    split: int = 0
+    embedded: int = 0
+    persisted: int = 0
+
+
+@dataclass(slots=True)
+class IngestJobState:
+    """Redis 中保存的任务快照。"""
+
+    job_id: str
+    document_id: int
+    source: str
+    status: str = "queued"
+    progress: IngestProgress = field(default_factory=IngestProgress)
+    chunks: Optional[int] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=_now_iso)
+    updated_at: str = field(default_factory=_now_iso)
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "IngestJobState":
+        data = dict(payload)
+        data["progress"] = IngestProgress(**(data.get("progress") or {}))
+        return cls(**data)
+
+
+class IngestJobTracker:
+    """Persist and broadcast ingestion job state through Redis."""
+
+    def __init__(self, redis_client: RedisBase, *, ttl_seconds: int = 86400) -> None:
+        self._redis = redis_client
+        self._ttl_seconds = max(1, int(ttl_seconds))
+
+    async def _save(self, state: IngestJobState) -> None:
+        state.updated_at = _now_iso()
+        payload = asdict(state)
+        try:
+            await self._redis.ensure_connection()
+            await self._redis.set_json(
+                redis_keys.knowledge.ingest_job(state.job_id),
+                payload,
+                ttl=self._ttl_seconds,
+            )
+            await self._redis.publish(
+                redis_keys.knowledge.ingest_events(state.job_id),
+                json.dumps(payload, ensure_ascii=False),
+            )
+        except Exception as exc:  # pragma: no cover - RedisBase already logs
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            logger.warning("Failed to publish ingest job state %s: %s", state.job_id, exc)
+
+    async def create(self, *, document_id: int, source: str) -> IngestJobState:
+        """登记一个排队中的新任务。"""
+        state = IngestJobState(job_id=str(uuid4()), document_id=document_id, source=source)
+        await self._save(state)
+        return state
+
+    async def get(self, job_id: str) -> IngestJobState | None:
+        """读取任务快照；不存在或已过期时返回 None。"""
+        await self._redis.ensure_connection()
+        payload = await self._redis.get_json(redis_keys.knowledge.ingest_job(job_id))
+        if not payload:
+            return None
+        try:
+            return IngestJobState.from_payload(payload)
+        except TypeError:
+            logger.warning("Discarding malformed ingest job state %s", job_id)
+            return None
+
+    async def update(
+        self,
+        state: IngestJobState,
+        *,
+        status: str | None = None,
+        chunks: int | None = None,
+        error: str | None = None,
+    ) -> IngestJobState:
+        """更新状态并广播（``state.progress`` 由调用方原地累加）。"""
+        if status is not None:
+            if status not in INGEST_JOB_STATUSES:
+                raise ValueError(f"Unknown ingest job status: {status}")
+            state.status = status
+        if chunks is not None:
+            state.chunks = chunks
+        if error is not None:
+            state.error = error
+        await self._save(state)
+        return state
+
+
+@lru_cache(maxsize=1)
+def get_ingest_job_tracker() -> IngestJobTracker:
+    """返回绑定共享 Redis 连接池的任务跟踪器单例。"""
+    return IngestJobTracker(RedisBase(key_prefix="kb:"), ttl_seconds=settings.INGEST_JOB_TTL)
+
+
+def spool_path_for(job_id: str) -> str:
+    """返回任务上传文件的暂存路径（目录不存在时创建）。"""
+    os.makedirs(settings.INGEST_SPOOL_DIR, exist_ok=True)
+    return os.path.join(settings.INGEST_SPOOL_DIR, f"{job_id}.upload")
+
+
+def discard_spool(path: str | None) -> None:
+    """删除任务的暂存文件（不存在时忽略）。"""
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+__all__ = [
+    "INGEST_FINAL_STATUSES",
+    "INGEST_JOB_STATUSES",
+    "IngestJobState",
+    "IngestJobTracker",
+    "IngestProgress",
+    "discard_spool",
+    "get_ingest_job_tracker",
+    "spool_path_for",
+]
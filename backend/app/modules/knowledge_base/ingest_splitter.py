@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
+from concurrent.futures import Executor
 from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import Any, Iterable, List, Mapping
+from typing import Any, Iterable, Iterator, List, Mapping
 
 from langchain_text_splitters import (
     MarkdownHeaderTextSplitter,
@@ -20,7 +21,7 @@ HEADERS_TO_SPLIT_ON = [
     ("###", "Header 3"),
 ]
 
-# 默认编码和分块参数
+# 默认编码和分块参数（块大小与重叠可通过动态设置 INGEST_CHUNK_TOKENS / INGEST_CHUNK_OVERLAP 覆盖）
 DEFAULT_ENCODING = "cl100k_base"
 MAX_CHUNK_TOKENS = 2000  # 最大分块 token 数
 CHUNK_OVERLAP = 200  # 分块重叠 token 数
@@ -44,23 +45,34 @@ def _markdown_splitter() -> MarkdownHeaderTextSplitter:
     return MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS_TO_SPLIT_ON, strip_headers=False)
 
 
-def _text_splitter() -> RecursiveCharacterTextSplitter:
-    """Create a recursive character text splitter with tiktoken encoder.
-    创建一个使用 tiktoken 编码器的递归字符文本分割器。
+@lru_cache(maxsize=16)
+def get_text_splitter(
+    encoding_name: str = DEFAULT_ENCODING,
+    chunk_size: int = MAX_CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> RecursiveCharacterTextSplitter:
+    """Return the shared tiktoken-backed recursive splitter for the given parameters.
+    按 (编码, 块大小, 重叠) 缓存的递归字符分割器；分割器无状态，可跨章节、跨线程复用，
+    避免每个章节都重新构造分割器与 tiktoken 编码器。
     """
     return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=MAX_CHUNK_TOKENS,
-        chunk_overlap=CHUNK_OVERLAP,
-        encoding_name=DEFAULT_ENCODING,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        encoding_name=encoding_name,
     )
 
 
-def _split_text(text: str) -> List[str]:
+def _split_text(
+    text: str,
+    *,
+    chunk_size: int = MAX_CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> List[str]:
     """Split plain text into chunks using the recursive splitter.
     使用递归分割器将纯文本分割成块。
     """
-    splitter = _text_splitter()
     try:
+        splitter = get_text_splitter(DEFAULT_ENCODING, chunk_size, chunk_overlap)
         # 分割文本并去除空白字符
         pieces = [frag.strip() for frag in splitter.split_text(text) if frag.strip()]
     except Exception:
@@ -100,34 +112,114 @@ def _markdown_sections(text: str, base_metadata: Mapping[str, Any]) -> Iterable[
         yield doc.page_content, metadata
 
 
+Section = tuple[str, dict[str, Any]]
+
+
+def _iter_sections(elements: Iterable[ExtractedElement]) -> Iterator[Section]:
+    """Yield non-empty Markdown sections of every element in document order.
+    按文档顺序产出各元素的 Markdown 章节。
+    """
+    for element in elements:
+        text = (element.text or "").strip()
+        if not text:
+            continue
+
+        base_meta = dict(element.metadata or {})
+        yield from _markdown_sections(text, base_meta)
+
+
+def _split_section(
+    section: Section,
+    chunk_size: int = MAX_CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> List[SplitChunk]:
+    """Run the recursive splitter on one section.
+    对单个章节进行递归字符分割。
+    """
+    section_text, metadata = section
+    return [
+        SplitChunk(
+            content=part,
+            language=None,
+            metadata=dict(metadata),
+        )
+        for part in _split_text(section_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    ]
+
+
+def _split_section_batch(
+    sections: List[Section],
+    chunk_size: int = MAX_CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> List[List[SplitChunk]]:
+    """Worker entry point: split a batch of sections, keeping their order.
+    工作进程入口：按顺序分割一批章节（每个进程各自缓存分割器）。
+    """
+    return [_split_section(section, chunk_size, chunk_overlap) for section in sections]
+
+
 def split_elements(
     elements: Iterable[ExtractedElement],
+    *,
+    chunk_size: int = MAX_CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_OVERLAP,
 ) -> List[SplitChunk]:
     """Split extracted elements into smaller chunks.
     将提取的元素分割成更小的块。
     """
     chunks: List[SplitChunk] = []
+    # 首先按 Markdown 章节分割，然后对每个章节进行递归字符分割
+    for section in _iter_sections(elements):
+        chunks.extend(_split_section(section, chunk_size, chunk_overlap))
+    return chunks
 
-    for element in elements:
-        text = (element.text or "").strip()
-        if not text:
-            continue
 
-        base_meta = dict(element.metadata or {})
-        # 首先尝试按 Markdown 章节分割
-        for section_text, metadata in _markdown_sections(text, base_meta):
-            section_meta = dict(metadata)
-            # 然后对每个章节进行递归字符分割
-            for part in _split_text(section_text):
-                chunks.append(
-                    SplitChunk(
-                        content=part,
-                        language=None,
-                        metadata=dict(section_meta),
-                    )
-                )
+def split_elements_parallel(
+    elements: Iterable[ExtractedElement],
+    executor: Executor,
+    *,
+    workers: int,
+    chunk_size: int = MAX_CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> List[SplitChunk]:
+    """Shard Markdown sections across ``executor`` and reassemble chunks in order.
+    将章节分片交给执行器（通常是进程池）并行分割，结果按原顺序拼接，与 :func:`split_elements` 一致。
 
+    章节按字符数均衡地分成至多 ``workers * 4`` 个连续批次，减少进程间传输次数。
+    """
+    sections = list(_iter_sections(elements))
+    if len(sections) <= 1 or workers <= 1:
+        return [
+            chunk
+            for section in sections
+            for chunk in _split_section(section, chunk_size, chunk_overlap)
+        ]
+
+    total_chars = sum(len(text) for text, _ in sections)
+    target_chars = max(1, total_chars // (workers * 4))
+    batches: List[List[Section]] = []
+    current: List[Section] = []
+    current_chars = 0
+    for section in sections:
+        current.append(section)
+        current_chars += len(section[0])
+        if current_chars >= target_chars:
+            batches.append(current)
+            current, current_chars = [], 0
+    if current:
+        batches.append(current)
+
+    chunks: List[SplitChunk] = []
+    results = executor.map(
+        _split_section_batch,
+        batches,
+        [chunk_size] * len(batches),
+        [chunk_overlap] * len(batches),
+    )
+    for batch_result in results:
+        for section_chunks in batch_result:
+            chunks.extend(section_chunks)
     return chunks
 
 
-__all__ = ["SplitChunk", "split_elements"]
+__all__ = ["SplitChunk", "get_text_splitter", "split_elements", "split_elements_parallel"]
@@ -1,27 +1,240 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
 from fastapi import UploadFile
 from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.infrastructure.dynamic_settings import get_dynamic_settings_service
+
 from . import models
-from .embeddings import get_embedder
-from .ingest_extractor import ExtractedElement, extract_from_bytes, extract_from_text
-from .ingest_splitter import SplitChunk, split_elements
-from .language import detect_language_meta
-from .repository import crud_knowledge_base
+from .config import SplitterConfig, build_splitter_config
+from .embedding_batcher import encode_texts
+from .ingest_extractor import ExtractedElement, IncrementalTextDecoder, extract_from_text
+from .ingest_jobs import IngestProgress
+from .ingest_splitter import SplitChunk, split_elements, split_elements_parallel
+from .language import detect_language_meta_many
+from .repository import chunk_content_hash, crud_knowledge_base
+from .retrieval_cache import bump_corpus_generation
 from .tokenizer import tokenize_for_search
 
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[IngestProgress], Awaitable[None]]
+
+
+def _split_process_count() -> int:
+    configured = settings.INGEST_SPLIT_PROCESSES
+    return configured if configured > 0 else (os.cpu_count() or 1)
+
+
+@lru_cache(maxsize=1)
+def _split_process_pool() -> ProcessPoolExecutor:
+    """分块用的进程池单例（spawn 启动，避免 fork 事件循环与模型线程）。"""
+    return ProcessPoolExecutor(
+        max_workers=_split_process_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+async def _load_splitter_config() -> SplitterConfig:
+    """读取当前的分块参数（动态设置不可用时使用静态默认值）。"""
+    try:
+        config_map = await get_dynamic_settings_service().get_all()
+    except Exception as exc:
+        if isinstance(exc, asyncio.CancelledError):
+            raise
+        logger.warning("Falling back to default splitter settings: %s", exc)
+        config_map = None
+    return build_splitter_config(config_map)
+
 
 async def _split_elements_async(
     elements: list[ExtractedElement],
+    config: SplitterConfig,
 ) -> list[SplitChunk]:
-    """异步地将提取的元素分割成块。"""
+    """异步地将提取的元素分割成块。
+
+    文本总量达到 ``INGEST_SPLIT_PARALLEL_MIN_CHARS`` 且允许多进程时，按章节分片到进程池；
+    否则在线程池中运行 `split_elements`，以避免阻塞事件循环。
+    """
     if not elements:
         return []
-    # 在线程池中运行 `split_elements` 以避免阻塞事件循环
-    return await run_in_threadpool(split_elements, elements)
+    workers = _split_process_count()
+    total_chars = sum(len(element.text or "") for element in elements)
+    if workers > 1 and total_chars >= settings.INGEST_SPLIT_PARALLEL_MIN_CHARS:
+        return await run_in_threadpool(
+            split_elements_parallel,
+            elements,
+            _split_process_pool(),
+            workers=workers,
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+        )
+    return await run_in_threadpool(
+        split_elements,
+        elements,
+        chunk_size=config.chunk_size,
+        chunk_overlap=config.chunk_overlap,
+    )
+
+
+class _ReusableChunks:
+    """覆盖式重新摄入时，文档原有块按内容哈希建立的复用索引。
+
+    每个旧块最多被认领一次（保留原行、仅更新 chunk_index）；同一内容在新文本中
+    出现的次数多于旧块时，其余副本从已认领的行复制。未被认领的旧块最终删除。
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, str | None]]) -> None:
+        self._available: dict[str, deque[int]] = {}
+        self._sources: dict[str, int] = {}
+        self._unclaimed: dict[int, None] = {}
+        for chunk_id, content_hash in rows:
+            self._unclaimed[chunk_id] = None
+            if content_hash:
+                self._available.setdefault(content_hash, deque()).append(chunk_id)
+                self._sources.setdefault(content_hash, chunk_id)
+
+    def claim(self, content_hash: str) -> tuple[int | None, int | None]:
+        """返回 ``(认领的旧块 id, 可复制的源块 id)``，两者至多一个非空。"""
+        available = self._available.get(content_hash)
+        if available:
+            chunk_id = available.popleft()
+            self._unclaimed.pop(chunk_id, None)
+            return chunk_id, None
+        return None, self._sources.get(content_hash)
+
+    def unclaimed(self) -> list[int]:
+        return list(self._unclaimed)
+
+
+class _ChunkBatchWriter:
+    """按固定大小的批次编码并写入知识块，峰值内存只与批大小相关。
+
+    每批在当前事务内执行一次 INSERT（不提交），由调用方在全部写完后统一提交，
+    覆盖模式下旧块的删除与新块的写入仍是原子的。提供 ``reusable`` 时，
+    内容哈希未变的块沿用已存储的 embedding 与 tsvector，只有新增或修改的块才会编码。
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        *,
+        document_id: int,
+        start_index: int,
+        batch_size: int,
+        on_progress: ProgressCallback | None = None,
+        reusable: _ReusableChunks | None = None,
+    ) -> None:
+        self._db = db
+        self._document_id = document_id
+        self._next_index = start_index
+        self._batch_size = max(1, batch_size)
+        self._pending: list[SplitChunk] = []
+        self._on_progress = on_progress
+        self._reusable = reusable
+        self.progress = IngestProgress()
+        self.written = 0
+        self.reused = 0
+
+    async def report(self) -> None:
+        """将当前进度交给回调（若有）。"""
+        if self._on_progress is not None:
+            await self._on_progress(self.progress)
+
+    async def add(self, chunks: Iterable[SplitChunk]) -> None:
+        for chunk in chunks:
+            self._pending.append(chunk)
+            self.progress.split += 1
+            if len(self._pending) >= self._batch_size:
+                await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+
+        # 先按内容哈希分流：可复用的旧块只调整位置或在库内复制，其余才需要编码
+        positions: list[tuple[int, int]] = []
+        copies: list[tuple[int, int]] = []
+        fresh: list[tuple[int, SplitChunk]] = []
+        for chunk in batch:
+            chunk_index = self._next_index
+            self._next_index += 1
+            if self._reusable is not None:
+                claimed_id, source_id = self._reusable.claim(chunk_content_hash(chunk.content))
+                if claimed_id is not None:
+                    positions.append((claimed_id, chunk_index))
+                    continue
+                if source_id is not None:
+                    copies.append((source_id, chunk_index))
+                    continue
+            fresh.append((chunk_index, chunk))
+
+        await crud_knowledge_base.reindex_chunks(self._db, positions)
+        await crud_knowledge_base.copy_chunks(self._db, self._document_id, copies)
+        self.reused += len(positions) + len(copies)
+
+        if fresh:
+            # 为本批新增文本块生成嵌入向量（经微批处理器，与并发请求共享前向计算）
+            vectors = await encode_texts([chunk.content for _, chunk in fresh])
+            self.progress.embedded += len(fresh)
+
+            # 整批检测语言；结果随块写入并直接用于分词，不再二次检测
+            metas = detect_language_meta_many([chunk.content for _, chunk in fresh])
+            payloads = [
+                (chunk_index, chunk.content, vector, meta["language"])
+                for (chunk_index, chunk), vector, meta in zip(fresh, vectors, metas)
+            ]
+
+            await crud_knowledge_base.bulk_create_document_chunks(
+                self._db,
+                self._document_id,
+                payloads,
+                commit=False,
+            )
+
+        self.written += len(batch)
+        self.progress.persisted = self.written
+        await self.report()
+
+    async def finalize(self) -> None:
+        """写出剩余的块，并删除未被复用的旧块（不提交）。"""
+        await self.flush()
+        if self._reusable is not None:
+            await crud_knowledge_base.delete_chunks_by_ids(
+                self._db, self._reusable.unclaimed(), commit=False
+            )
+
+
+async def _prepare_chunk_target(
+    db: AsyncSession,
+    *,
+    document_id: int,
+    overwrite: bool,
+) -> tuple[int, _ReusableChunks | None]:
+    """返回新块的起始 chunk_index；覆盖模式下同时返回旧块的复用索引。
+
+    覆盖模式不再预先删除旧块，而是由 :class:`_ChunkBatchWriter` 在写入时按内容哈希复用，
+    最后删除未复用的部分。
+    """
+    if overwrite:
+        rows = await crud_knowledge_base.get_chunk_hashes_by_document_id(db, document_id)
+        return 0, _ReusableChunks(rows)
+    # 非覆盖模式下，将新 chunk 附加在现有索引之后
+    max_index = await crud_knowledge_base.get_max_chunk_index(db, document_id)
+    return max_index + 1, None
 
 
 async def _persist_chunks(
@@ -30,47 +243,72 @@ async def _persist_chunks(
     document_id: int,
     elements: list[ExtractedElement],
     overwrite: bool,
+    on_progress: ProgressCallback | None = None,
 ) -> int:
     """将分割后的块持久化到数据库。"""
-    split_chunks = await _split_elements_async(elements)
+    split_chunks = await _split_elements_async(elements, await _load_splitter_config())
     if not split_chunks:
         # 如果没有块，且需要覆盖，则删除该文档的所有现有块
         if overwrite:
             await crud_knowledge_base.delete_chunks_by_document_id(db, document_id, commit=True)
+            await bump_corpus_generation()
         return 0
 
-    if overwrite:
-        # 如果需要覆盖，先删除旧的块
-        await crud_knowledge_base.delete_chunks_by_document_id(db, document_id, commit=False)
-        start_index = 0
-    else:
-        # 非覆盖模式下，将新 chunk 附加在现有索引之后
-        max_index = await crud_knowledge_base.get_max_chunk_index(db, document_id)
-        start_index = max_index + 1
-
-    # 获取嵌入模型
-    embedder = get_embedder()
-    texts = [chunk.content for chunk in split_chunks]
-    # 在线程池中为所有文本块生成嵌入向量
-    vectors = await run_in_threadpool(embedder.encode, texts, normalize_embeddings=True)
-
-    payloads = []
-    # 为每个块准备持久化所需的数据
-    for idx, (chunk, vector) in enumerate(zip(split_chunks, vectors)):
-        # 检测块的语言
-        meta = detect_language_meta((chunk.content or "").strip())
-        lang = meta["language"]
-        payloads.append((start_index + idx, chunk.content, vector, lang))
-
-    # 批量创建文档块
-    await crud_knowledge_base.bulk_create_document_chunks(
+    start_index, reusable = await _prepare_chunk_target(
+        db, document_id=document_id, overwrite=overwrite
+    )
+    writer = _ChunkBatchWriter(
         db,
-        document_id,
-        payloads,
-        commit=True,
+        document_id=document_id,
+        start_index=start_index,
+        batch_size=settings.INGEST_EMBED_BATCH_SIZE,
+        on_progress=on_progress,
+        reusable=reusable,
     )
+    writer.progress.extracted = sum(len(element.text or "") for element in elements)
+    try:
+        await writer.add(split_chunks)
+        await writer.finalize()
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    await bump_corpus_generation()
+
+    return writer.written
 
-    return len(payloads)
+
+def _segment_boundary(buffer: str, window: int) -> int:
+    """在窗口内寻找最靠后的段落/行边界作为切分点，找不到时硬切。"""
+    for separator in ("\n\n", "\n"):
+        cut = buffer.rfind(separator, 0, window)
+        if cut > 0:
+            return cut + len(separator)
+    return window
+
+
+async def _iter_upload_segments(
+    upload: UploadFile,
+    *,
+    read_size: int,
+    window_chars: int,
+) -> AsyncIterator[str]:
+    """增量读取并解码上传文件，按段落边界产出不超过 ``window_chars`` 的文本片段。"""
+    # 以首次读取的数据作为编码检测样本
+    decoder = IncrementalTextDecoder(sample_size=read_size)
+    buffer = ""
+    while True:
+        raw = await upload.read(read_size)
+        if not raw:
+            break
+        buffer += decoder.feed(raw)
+        while len(buffer) >= window_chars:
+            cut = _segment_boundary(buffer, window_chars)
+            segment, buffer = buffer[:cut], buffer[cut:]
+            yield segment
+    buffer += decoder.finish()
+    if buffer.strip():
+        yield buffer
 
 
 async def ingest_document_file(
@@ -78,27 +316,47 @@ async def ingest_document_file(
     upload: UploadFile,
     document: models.KnowledgeDocument,
     overwrite: bool = False,
+    *,
+    on_progress: ProgressCallback | None = None,
 ) -> int:
-    """通过提取、分块和存储元素来摄入上传的文档文件。"""
-
-    raw = await upload.read()
+    """以流式方式摄入上传的文档文件。
 
+    边读取边解码、边分块，按 ``INGEST_EMBED_BATCH_SIZE`` 分批编码并写入，
+    峰值内存由读取块大小、分块窗口与批大小决定，而不是文件大小。
+    """
     filename = upload.filename or document.source_ref
+    splitter_config = await _load_splitter_config()
 
-    # 在线程池中从文件字节中提取元素
-    _, elements = await run_in_threadpool(
-        extract_from_bytes,
-        raw,
-        filename=filename,
+    start_index, reusable = await _prepare_chunk_target(
+        db, document_id=document.id, overwrite=overwrite
     )
-
-    # 持久化提取出的块
-    return await _persist_chunks(
+    writer = _ChunkBatchWriter(
         db,
         document_id=document.id,
-        elements=elements,
-        overwrite=overwrite,
+        start_index=start_index,
+        batch_size=settings.INGEST_EMBED_BATCH_SIZE,
+        on_progress=on_progress,
+        reusable=reusable,
     )
+    try:
+        async for segment in _iter_upload_segments(
+            upload,
+            read_size=settings.INGEST_READ_CHUNK_BYTES,
+            window_chars=settings.INGEST_STREAM_WINDOW_CHARS,
+        ):
+            writer.progress.extracted += len(segment)
+            elements = extract_from_text(segment, source_ref=filename)
+            await writer.add(await _split_elements_async(elements, splitter_config))
+        await writer.finalize()
+        await writer.report()
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+    if writer.written or overwrite:
+        await bump_corpus_generation()
+    return writer.written
 
 
 async def ingest_document_content(
@@ -106,6 +364,8 @@ async def ingest_document_content(
     content: str,
     document: models.KnowledgeDocument,
     overwrite: bool = False,
+    *,
+    on_progress: ProgressCallback | None = None,
 ) -> int:
     """摄入通过 API 直接提供的原始文本内容。"""
 
@@ -119,6 +379,7 @@ async def ingest_document_content(
         document_id=document.id,
         elements=elements,
         overwrite=overwrite,
+        on_progress=on_progress,
     )
 
 
@@ -152,19 +413,16 @@ async def update_chunk(
 
     # 如果内容已更改，则重新计算嵌入和搜索向量
     if content_changed:
-        embedder = get_embedder()
+        chunk.content_hash = chunk_content_hash(chunk.content)
         # 重新计算嵌入向量
-        vector = (
-            await run_in_threadpool(embedder.encode, [chunk.content], normalize_embeddings=True)
-        )[0]
+        vector = (await encode_texts([chunk.content]))[0]
         chunk.embedding = vector
-        stripped = (chunk.content or "").strip()
         # 重新检测语言
-        meta = detect_language_meta(stripped or "")
+        meta = detect_language_meta_many([chunk.content])[0]
         chunk.language = meta["language"]
 
-        # 为全文搜索重新生成 tsvector
-        search_text = tokenize_for_search(chunk.content, chunk.language)
+        # 为全文搜索重新生成 tsvector（沿用刚检测出的语言）
+        search_text = tokenize_for_search(chunk.content, chunk.language, detect=False)
         chunk.search_vector = func.to_tsvector("simple", search_text)
 
     needs_persist = content_changed or chunk_index_changed
@@ -172,6 +430,7 @@ async def update_chunk(
     # 如果有任何更改，则持久化块
     if needs_persist:
         await crud_knowledge_base.persist_chunk(db, chunk)
+        await bump_corpus_generation()
 
     return chunk
 
@@ -183,6 +442,7 @@ async def delete_chunk(db: AsyncSession, chunk_id: int) -> bool:
         return False
 
     await crud_knowledge_base.delete_chunk(db, chunk)
+    await bump_corpus_generation()
     return True
 
 
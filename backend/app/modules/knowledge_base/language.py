@@ -5,7 +5,9 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Iterable, Mapping
+from typing import Any, Iterable, Mapping, Sequence
+
+import numpy as np
 
 # 语言别名映射，用于标准化语言代码
 LANGUAGE_ALIAS_MAP: dict[str, str] = {
@@ -28,6 +30,36 @@ _CODE_FENCE_RE = re.compile(r"(?m)^[ \t]*(```|~~~)")  # 代码块标记
 _CJK_RE = re.compile(r"[\u4e00-\u9fff]")  # 中日韩统一表意文字
 _HIRAGANA_RE = re.compile(r"[\u3040-\u309f]")  # 平假名
 _KATAKANA_RE = re.compile(r"[\u30a0-\u30ff]")  # 片假名
+_LEADING_SPACE_RE = re.compile(r"\s*")
+
+# 批量检测时每个块只检查去除前导空白后的前缀样本
+LANGUAGE_SAMPLE_CHARS = 2048
+
+# 单字符代码符号（"::" 与 "</" 两字符符号在样本上用 str.count 统计）
+_CODE_SYMBOL_CODEPOINTS = np.array([ord(symbol) for symbol in "{}();"], dtype=np.uint32)
+
+# 字母码位区间边界（左闭右开，成对出现）；码位落在奇数下标区间内即为字母。
+# 覆盖常见文字系统，用于代码密度判断时近似 str.isalpha。
+_LETTER_BOUNDARIES = np.array(
+    [
+        0x41, 0x5B,  # A-Z
+        0x61, 0x7B,  # a-z
+        0xC0, 0xD7,  # Latin-1 字母（跳过 ×）
+        0xD8, 0xF7,  # （跳过 ÷）
+        0xF8, 0x250,  # Latin Extended-A/B
+        0x370, 0x530,  # 希腊字母、西里尔字母
+        0x590, 0x700,  # 希伯来文、阿拉伯文
+        0x900, 0xE80,  # 印度诸文字、泰文
+        0x1100, 0x1200,  # 韩文字母
+        0x1E00, 0x2000,  # Latin Extended Additional、希腊扩展
+        0x3040, 0x3100,  # 平假名、片假名
+        0x3400, 0x4DC0,  # CJK 扩展 A
+        0x4E00, 0xA000,  # 中日韩统一表意文字
+        0xAC00, 0xD7B0,  # 韩文音节
+        0xF900, 0xFB00,  # CJK 兼容表意文字
+    ],
+    dtype=np.uint32,
+)
 
 
 def _from_iterable(values: Iterable[Any]) -> str | None:
@@ -144,11 +176,75 @@ def detect_language_meta(text: str | None, default: str = "en") -> dict[str, str
     }
 
 
+def _prefix_sample(text: str | None, limit: int) -> str:
+    """返回去除首尾空白后的前 ``limit`` 个字符（不复制整段长文本）。"""
+    if not text:
+        return ""
+    start = _LEADING_SPACE_RE.match(text).end()
+    return text[start : start + limit].rstrip()
+
+
+def _segment_counts(mask: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """按样本区间统计布尔掩码中 True 的数量（允许空区间）。"""
+    cumulative = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    return cumulative[ends] - cumulative[starts]
+
+
+def detect_language_meta_many(
+    texts: Sequence[str | None],
+    default: str = "en",
+    *,
+    sample_chars: int = LANGUAGE_SAMPLE_CHARS,
+) -> list[dict[str, str | bool]]:
+    """Batch variant of :func:`detect_language_meta` for ingestion.
+    批量版 :func:`detect_language_meta`，供摄入流程使用。
+
+    每个文本只取前 ``sample_chars`` 个字符；整批样本拼接为一个码位数组，用一次向量化的
+    Unicode 区间判断同时得到假名、汉字、代码符号与字母数量，判定顺序与单条检测一致
+    （代码 → 日语 → 中文 → 默认语言）。
+    """
+    normalized_default = normalize_language_value(default) or "en"
+    samples = [_prefix_sample(text, max(1, sample_chars)) for text in texts]
+    if not samples:
+        return []
+
+    lengths = np.fromiter((len(sample) for sample in samples), dtype=np.int64, count=len(samples))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    codepoints = np.frombuffer("".join(samples).encode("utf-32-le"), dtype="<u4")
+
+    kana = _segment_counts((codepoints >= 0x3040) & (codepoints < 0x3100), starts, ends)
+    ideographs = _segment_counts((codepoints >= 0x4E00) & (codepoints < 0xA000), starts, ends)
+    symbols = _segment_counts(np.isin(codepoints, _CODE_SYMBOL_CODEPOINTS), starts, ends)
+    letters = _segment_counts(np.searchsorted(_LETTER_BOUNDARIES, codepoints, side="right") % 2 == 1, starts, ends)
+
+    results: list[dict[str, str | bool]] = []
+    for index, sample in enumerate(samples):
+        if not sample:
+            results.append({"language": normalized_default, "is_code": False, "is_cjk": False})
+            continue
+        punctuation_hits = int(symbols[index]) + sample.count("::") + sample.count("</")
+        is_code = bool(_CODE_FENCE_RE.search(sample)) or (
+            punctuation_hits >= 5 and punctuation_hits >= max(3, int(letters[index]) // 3)
+        )
+        if is_code:
+            results.append({"language": "code", "is_code": True, "is_cjk": False})
+        elif kana[index]:
+            results.append({"language": "ja", "is_code": False, "is_cjk": True})
+        elif ideographs[index]:
+            results.append({"language": "zh", "is_code": False, "is_cjk": True})
+        else:
+            results.append({"language": normalized_default, "is_code": False, "is_cjk": False})
+    return results
+
+
 __all__ = [
     "LANGUAGE_ALIAS_MAP",
+    "LANGUAGE_SAMPLE_CHARS",
     "normalize_language_value",
     "is_probable_code",
     "is_cjk_text",
     "detect_language",
     "detect_language_meta",
+    "detect_language_meta_many",
 ]
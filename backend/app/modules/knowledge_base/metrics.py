@@ -0,0 +1,108 @@
+"""Retrieval pipeline metrics.
+检索流水线各阶段耗时与命中数量的指标定义，经 ``/metrics`` 导出。
+"""
+
+from __future__ import annotations
+
+from app.infrastructure.metrics import metrics_registry
+
+from .embedding_cache import get_query_embedding_cache
+
+# 候选/结果数量的分桶
+_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+RETRIEVAL_STAGE_SECONDS = metrics_registry.histogram(
+    "kb_retrieval_stage_seconds",
+    "Latency of retrieval pipeline stages in seconds.",
+    ("operation", "stage"),
+)
+RETRIEVAL_CANDIDATES = metrics_registry.histogram(
+    "kb_retrieval_candidates",
+    "Number of candidates returned by each retrieval leg before fusion.",
+    ("operation", "source"),
+    buckets=_COUNT_BUCKETS,
+)
+RETRIEVAL_RESULTS = metrics_registry.histogram(
+    "kb_retrieval_results",
+    "Number of chunks delivered by a retrieval call.",
+    ("operation",),
+    buckets=_COUNT_BUCKETS,
+)
+RETRIEVAL_CACHE_LOOKUPS = metrics_registry.counter(
+    "kb_retrieval_cache_lookups",
+    "Retrieval result cache lookups by outcome.",
+    ("result",),
+)
+
+
+def record_retrieval(
+    operation: str,
+    *,
+    total_ms: float,
+    delivered: int,
+    embed_ms: float | None = None,
+    vector_ms: float | None = None,
+    bm25_ms: float | None = None,
+    fusion_ms: float | None = None,
+    vector_candidates: int | None = None,
+    bm25_candidates: int | None = None,
+) -> None:
+    """记录一次检索调用；未参与的阶段传 ``None`` 即不记录。"""
+    stages = {
+        "embed": embed_ms,
+        "vector_sql": vector_ms,
+        "bm25_sql": bm25_ms,
+        "fusion": fusion_ms,
+        "total": total_ms,
+    }
+    for stage, elapsed_ms in stages.items():
+        if elapsed_ms is not None:
+            RETRIEVAL_STAGE_SECONDS.observe(elapsed_ms / 1000.0, operation=operation, stage=stage)
+
+    if vector_candidates is not None:
+        RETRIEVAL_CANDIDATES.observe(vector_candidates, operation=operation, source="vector")
+    if bm25_candidates is not None:
+        RETRIEVAL_CANDIDATES.observe(bm25_candidates, operation=operation, source="bm25")
+    RETRIEVAL_RESULTS.observe(delivered, operation=operation)
+
+
+def record_cache_lookup(hit: bool) -> None:
+    """记录检索结果缓存的命中/未命中。"""
+    RETRIEVAL_CACHE_LOOKUPS.inc(result="hit" if hit else "miss")
+
+
+def _query_embedding_cache_counters() -> dict[str, float]:
+    stats = get_query_embedding_cache().stats()
+    return {
+        "kb_query_embedding_cache_local_hits": stats.local_hits,
+        "kb_query_embedding_cache_redis_hits": stats.redis_hits,
+        "kb_query_embedding_cache_misses": stats.misses,
+        "kb_query_embedding_cache_evictions": stats.evictions,
+    }
+
+
+def _query_embedding_cache_gauges() -> dict[str, float]:
+    return {"kb_query_embedding_cache_size": get_query_embedding_cache().stats().size}
+
+
+# 命中/未命中/淘汰为进程内单调累计值，按 counter 导出（*_total）；条目数为 gauge
+metrics_registry.register_counters(
+    "kb_query_embedding_cache",
+    "Query embedding cache lookups and evictions.",
+    _query_embedding_cache_counters,
+)
+metrics_registry.register_gauges(
+    "kb_query_embedding_cache_size",
+    "Entries held in the in-process query embedding cache.",
+    _query_embedding_cache_gauges,
+)
+
+
+__all__ = [
+    "RETRIEVAL_CACHE_LOOKUPS",
+    "RETRIEVAL_CANDIDATES",
+    "RETRIEVAL_RESULTS",
+    "RETRIEVAL_STAGE_SECONDS",
+    "record_cache_lookup",
+    "record_retrieval",
+]
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import DateTime, Text, String, func, Integer, ForeignKey
+from sqlalchemy import BigInteger, Computed, DateTime, SmallInteger, Text, String, func, Integer, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from pgvector.sqlalchemy import Vector
@@ -10,9 +10,43 @@ from app.core.config import settings
 from app.infrastructure.database.postgres_base import Base
 
 
+EMBEDDING_STORAGE_TYPES = ("vector", "halfvec")
+
+
+class HalfVector(Vector):
+    """pgvector ``halfvec`` 列类型。
+
+    halfvec 的文本收发格式与 vector 相同（``[1,2,3]``），因此沿用 Vector 的绑定/结果处理
+    与距离运算符，只替换 DDL 中的类型名。
+    """
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "HALFVEC" if self.dim is None else f"HALFVEC({self.dim})"
+
+
+def embedding_storage() -> str:
+    """返回配置的向量存储类型（未知取值回退为 vector）。"""
+    storage = (settings.EMBEDDING_STORAGE or "vector").strip().lower()
+    return storage if storage in EMBEDDING_STORAGE_TYPES else "vector"
+
+
+def embedding_column_type() -> Vector:
+    """按 EMBEDDING_STORAGE 构造 embedding 列类型。"""
+    if embedding_storage() == "halfvec":
+        return HalfVector(dim=settings.EMBEDDING_DIM)
+    return Vector(dim=settings.EMBEDDING_DIM)
+
+
 class KnowledgeDocument(Base):
     """知识库文档模型"""
     __tablename__ = "knowledge_documents"
+    __table_args__ = (
+        # 检索过滤：tags 使用 ?| 运算符（需默认的 jsonb_ops GIN），source_type 为等值过滤
+        Index("ix_knowledge_documents_tags", "tags", postgresql_using="gin"),
+        Index("ix_knowledge_documents_source_type", "source_type"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     # 来源类型与引用（例如 upload/url/crawl/api 等 + 具体标识）
@@ -34,6 +68,10 @@ class KnowledgeDocument(Base):
 class KnowledgeChunk(Base):
     """知识库块（Chunk）模型"""
     __tablename__ = "knowledge_chunks"
+    __table_args__ = (
+        # 覆盖式重新摄入时按 (文档, 内容哈希) 查找可复用的块
+        Index("ix_knowledge_chunks_document_id_content_hash", "document_id", "content_hash"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     document_id: Mapped[Optional[int]] = mapped_column(
@@ -45,8 +83,11 @@ class KnowledgeChunk(Base):
     )
     chunk_index: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, comment="文档内块的序号")
     content: Mapped[str] = mapped_column(Text, nullable=False, comment="文本内容")
+    content_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, comment="内容的 SHA-256 摘要（十六进制）"
+    )
     embedding: Mapped[List[float]] = mapped_column(
-        Vector(dim=settings.EMBEDDING_DIM),
+        embedding_column_type(),
         nullable=False,
         comment="嵌入向量表示",
     )
@@ -54,7 +95,41 @@ class KnowledgeChunk(Base):
     search_vector: Mapped[Optional[str]] = mapped_column(
         TSVECTOR(), nullable=True, comment="用于全文检索的 tsvector"
     )
+    # BM25 文档长度（词元出现次数之和），由数据库根据 search_vector 生成
+    search_length: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        Computed("kb_tsvector_length(search_vector)", persisted=True),
+        nullable=True,
+        comment="search_vector 的词元总数",
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), comment="创建时间")
 
     # 关联的文档
     document: Mapped[Optional[KnowledgeDocument]] = relationship(back_populates="chunks")
+
+
+# BM25 统计表按写入会话分片（pg_backend_pid() % STATS_SHARDS），并发摄入不会争用同一行；
+# 读取时对各分片求和
+STATS_SHARDS = 16
+
+
+class KnowledgeTermStat(Base):
+    """BM25 词项统计：包含该词项的块数量（文档频率），按分片累加。
+
+    由 knowledge_chunks 上的语句级触发器随插入、更新、删除增量维护；单个分片的计数可能为负，
+    各分片之和才是文档频率。
+    """
+    __tablename__ = "knowledge_term_stats"
+
+    term: Mapped[str] = mapped_column(Text, primary_key=True, comment="tsvector 词元")
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True, server_default="0", comment="统计分片")
+    doc_freq: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0", comment="包含该词元的块数量（分片增量）")
+
+
+class KnowledgeCorpusStat(Base):
+    """BM25 语料统计：参与全文检索的块数量与词元总数（用于平均块长度），每个分片一行。"""
+    __tablename__ = "knowledge_corpus_stats"
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True, comment="统计分片")
+    chunk_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0", comment="含 search_vector 的块数量")
+    total_length: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0", comment="search_length 之和")
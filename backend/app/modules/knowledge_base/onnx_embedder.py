@@ -0,0 +1,165 @@
+"""ONNX Runtime embedding backend.
+基于 ONNX Runtime 的 CPU 嵌入后端：与 PyTorch 版 SentenceTransformer 使用同一个模型，
+支持可选的动态 int8 量化，并对外提供相同的 ``encode(texts, normalize_embeddings=True)`` 接口。
+
+依赖 ``onnxruntime``（需单独安装）；分词器来自 sentence-transformers 已依赖的 ``transformers``。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Hugging Face 仓库中导出的 ONNX 模型的常见位置
+DEFAULT_ONNX_FILENAME = "onnx/model.onnx"
+
+
+def _require_onnxruntime() -> Any:
+    try:
+        import onnxruntime
+    except ImportError as exc:  # pragma: no cover - depends on deployment
+        raise RuntimeError(
+            "EMBEDDING_BACKEND=onnx 需要安装 onnxruntime（pip install onnxruntime）"
+        ) from exc
+    return onnxruntime
+
+
+def resolve_onnx_model_path(model_name: str, onnx_path: str | None = None) -> str:
+    """返回 ONNX 模型文件路径：优先使用显式配置，否则从模型仓库下载 ``onnx/model.onnx``。"""
+    if onnx_path:
+        if not os.path.isfile(onnx_path):
+            raise RuntimeError(f"ONNX 模型文件不存在: {onnx_path}")
+        return onnx_path
+    if os.path.isdir(model_name):
+        local = os.path.join(model_name, DEFAULT_ONNX_FILENAME)
+        if os.path.isfile(local):
+            return local
+    from huggingface_hub import hf_hub_download
+
+    return hf_hub_download(repo_id=model_name, filename=DEFAULT_ONNX_FILENAME)
+
+
+def quantize_onnx_model(model_path: str) -> str:
+    """对模型做动态 int8 量化（权重 int8、激活运行时量化），结果缓存在原模型旁。"""
+    root, ext = os.path.splitext(model_path)
+    quantized_path = f"{root}.int8{ext or '.onnx'}"
+    if os.path.isfile(quantized_path):
+        return quantized_path
+
+    _require_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info("正在对 ONNX 模型做动态 int8 量化: %s", model_path)
+    tmp_path = f"{quantized_path}.tmp"
+    quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+    # 原子替换，避免并发进程读到写了一半的文件
+    os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """按注意力掩码对 token 向量做均值池化（与 e5 / SentenceTransformer 的 mean pooling 一致）。"""
+    mask = attention_mask[..., np.newaxis].astype(token_embeddings.dtype)
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return summed / counts
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+class OnnxEmbedder:
+    """Sentence embedder backed by an ONNX Runtime ``InferenceSession``."""
+
+    def __init__(
+        self,
+        model_name: str,
+        *,
+        onnx_path: str | None = None,
+        quantize: bool = False,
+        max_length: int = 512,
+        intra_op_threads: int = 0,
+    ) -> None:
+        ort = _require_onnxruntime()
+        from transformers import AutoTokenizer
+
+        model_path = resolve_onnx_model_path(model_name, onnx_path)
+        if quantize:
+            model_path = quantize_onnx_model(model_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.model_path = model_path
+        self.max_length = max_length
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self._session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {item.name for item in self._session.get_inputs()}
+
+    def _forward(self, texts: list[str]) -> np.ndarray:
+        encoded = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        # 只传入模型声明的输入（部分导出不含 token_type_ids）
+        feeds = {
+            name: np.asarray(value, dtype=np.int64)
+            for name, value in encoded.items()
+            if name in self._input_names
+        }
+        token_embeddings = self._session.run(None, feeds)[0]
+        return mean_pool(token_embeddings, encoded["attention_mask"])
+
+    def encode(
+        self,
+        sentences: str | Sequence[str],
+        *,
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **_: Any,
+    ) -> np.ndarray:
+        """与 ``SentenceTransformer.encode`` 兼容：输入单条文本时返回一维向量。"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # 按长度排序后分批，减少 padding 开销，最后还原顺序
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        outputs: list[np.ndarray] = []
+        step = max(1, batch_size)
+        for start in range(0, len(texts), step):
+            batch = [texts[index] for index in order[start : start + step]]
+            outputs.append(self._forward(batch))
+        pooled = np.concatenate(outputs, axis=0)
+        vectors = np.empty_like(pooled)
+        vectors[order] = pooled
+        vectors = vectors.astype(np.float32, copy=False)
+        if normalize_embeddings:
+            vectors = l2_normalize(vectors)
+        return vectors[0] if single else vectors
+
+
+__all__ = [
+    "OnnxEmbedder",
+    "l2_normalize",
+    "mean_pool",
+    "quantize_onnx_model",
+    "resolve_onnx_model_path",
+]
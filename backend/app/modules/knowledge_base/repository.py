@@ -1,16 +1,374 @@
 from __future__ import annotations
 
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Any, Iterable, Optional, Sequence
 
 import numpy as np
+from fastapi.concurrency import run_in_threadpool
 
-from sqlalchemy import delete, select, func, insert
+from sqlalchemy import Float, Integer, Text, any_, cast, column, delete, literal, select, func, insert, text, true, union_all, update, values
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
 
 from . import models
+from .config import resolve_bm25_scorer
+from .index_maintenance import get_active_index_type
 from .schemas import KnowledgeDocumentCreate
-from .tokenizer import tokenize_for_search
+from .tokenizer import tokenize_many_for_search, tokenize_query_for_search
+
+
+# COPY 暂存表：embedding 以 real[] 二进制传输，search_text 为预先分词的文本，
+# 再用一条 INSERT ... SELECT 转换为 vector / tsvector 写入正式表。
+_CHUNK_STAGE_TABLE = "kb_chunk_stage"
+_CHUNK_STAGE_COLUMNS = (
+    "document_id",
+    "chunk_index",
+    "content",
+    "content_hash",
+    "embedding",
+    "language",
+    "search_text",
+)
+_CHUNK_STAGE_DDL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {_CHUNK_STAGE_TABLE} (
+    document_id integer,
+    chunk_index integer,
+    content text NOT NULL,
+    content_hash varchar(64),
+    embedding real[] NOT NULL,
+    language varchar(16),
+    search_text text
+) ON COMMIT DROP
+"""
+_CHUNK_STAGE_INSERT = f"""
+INSERT INTO knowledge_chunks
+    (document_id, chunk_index, content, content_hash, embedding, language, search_vector)
+SELECT document_id, chunk_index, content, content_hash, embedding::{models.embedding_storage()}, language,
+       to_tsvector('simple', coalesce(search_text, ''))
+FROM {_CHUNK_STAGE_TABLE}
+"""
+
+
+def chunk_content_hash(content: str | None) -> str:
+    """返回块内容的 SHA-256 十六进制摘要（与迁移中的回填表达式一致）。"""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class KnowledgeDocumentRef:
+    """检索结果中附带的文档最小投影。"""
+
+    id: int
+    title: Optional[str]
+    source_ref: Optional[str]
+
+
+@dataclass(slots=True)
+class KnowledgeChunkRow:
+    """检索查询的轻量列投影，不包含 embedding 与 search_vector。
+
+    字段名与 ``KnowledgeChunk`` 保持一致，调用方可以无差别地读取
+    ``chunk.content`` / ``chunk.document.title`` 等属性。
+    """
+
+    id: int
+    document_id: Optional[int]
+    chunk_index: Optional[int]
+    content: str
+    language: Optional[str]
+    created_at: datetime
+    document: Optional[KnowledgeDocumentRef] = None
+
+
+@dataclass(slots=True, frozen=True)
+class RetrievalFilters:
+    """下推到向量与 BM25 SQL 中的检索过滤条件；各字段为空表示不过滤。
+
+    ``tags`` 为任意匹配（文档标签包含其中任意一个即可）。
+    """
+
+    document_ids: tuple[int, ...] = ()
+    tags: tuple[str, ...] = ()
+    languages: tuple[str, ...] = ()
+    source_types: tuple[str, ...] = ()
+
+    @classmethod
+    def build(
+        cls,
+        *,
+        document_ids: Iterable[int] | None = None,
+        tags: Iterable[str] | None = None,
+        languages: Iterable[str] | None = None,
+        source_types: Iterable[str] | None = None,
+    ) -> "RetrievalFilters":
+        """规范化（去重、排序、去空白）后构造过滤条件，保证等价条件得到相同的实例。"""
+
+        def _strings(values: Iterable[str] | None, *, lower: bool = False) -> tuple[str, ...]:
+            cleaned = {str(value).strip() for value in (values or []) if value is not None}
+            if lower:
+                cleaned = {value.lower() for value in cleaned}
+            return tuple(sorted(value for value in cleaned if value))
+
+        return cls(
+            document_ids=tuple(sorted({int(value) for value in (document_ids or [])})),
+            tags=_strings(tags),
+            languages=_strings(languages, lower=True),
+            source_types=_strings(source_types),
+        )
+
+    def is_empty(self) -> bool:
+        return not (self.document_ids or self.tags or self.languages or self.source_types)
+
+
+def _apply_retrieval_filters(stmt: Any, filters: RetrievalFilters | None) -> Any:
+    """将过滤条件追加为 WHERE 子句。"""
+    if filters is None or filters.is_empty():
+        return stmt
+    if filters.document_ids:
+        stmt = stmt.where(models.KnowledgeChunk.document_id.in_(filters.document_ids))
+    if filters.languages:
+        stmt = stmt.where(models.KnowledgeChunk.language.in_(filters.languages))
+    if filters.source_types:
+        stmt = stmt.where(models.KnowledgeDocument.source_type.in_(filters.source_types))
+    if filters.tags:
+        # jsonb ?| text[]，可命中 ix_knowledge_documents_tags (GIN)
+        stmt = stmt.where(models.KnowledgeDocument.tags.has_any(array(filters.tags)))
+    return stmt
+
+
+# 检索投影所需的列（按 KnowledgeChunkRow 字段顺序）
+_CHUNK_ROW_COLUMNS = (
+    models.KnowledgeChunk.id,
+    models.KnowledgeChunk.document_id,
+    models.KnowledgeChunk.chunk_index,
+    models.KnowledgeChunk.content,
+    models.KnowledgeChunk.language,
+    models.KnowledgeChunk.created_at,
+    models.KnowledgeDocument.title.label("document_title"),
+    models.KnowledgeDocument.source_ref.label("document_source_ref"),
+)
+
+
+def _projected_chunks_stmt(*extra_columns: Any):
+    """构建只选取投影列并左连接文档表的查询。"""
+    return select(*_CHUNK_ROW_COLUMNS, *extra_columns).outerjoin(
+        models.KnowledgeDocument,
+        models.KnowledgeDocument.id == models.KnowledgeChunk.document_id,
+    )
+
+
+def _chunk_row_from_result(row: Any) -> KnowledgeChunkRow:
+    """将投影查询的一行转换为 KnowledgeChunkRow。"""
+    document = None
+    if row.document_id is not None:
+        document = KnowledgeDocumentRef(
+            id=row.document_id,
+            title=row.document_title,
+            source_ref=row.document_source_ref,
+        )
+    return KnowledgeChunkRow(
+        id=row.id,
+        document_id=row.document_id,
+        chunk_index=row.chunk_index,
+        content=row.content,
+        language=row.language,
+        created_at=row.created_at,
+        document=document,
+    )
+
+
+# pgvector 允许的 hnsw.ef_search 上限
+HNSW_MAX_EF_SEARCH = 1000
+# 按文档过滤后范围内的块数不超过该值时，向量检索改为精确排序（不走 ANN 索引）
+EXACT_SCOPE_MAX_CHUNKS = 5000
+# pgvector < 0.8（无 iterative_scan）时，带过滤条件的检索按该倍数放大 ANN 候选量
+FILTERED_CANDIDATE_FACTOR = 4
+# pgvector 自 0.8.0 起支持 hnsw.iterative_scan / ivfflat.iterative_scan
+ITERATIVE_SCAN_MIN_VERSION = (0, 8, 0)
+
+# 进程内缓存的 pgvector 扩展版本
+_pgvector_version_cache: dict[str, tuple[int, ...]] = {}
+
+
+def _vector_order_expr(distance_expr: Any, *, exact: bool) -> Any:
+    """返回向量检索的排序表达式。
+
+    ANN 索引只返回 ``ef_search`` 个候选后才应用 WHERE 过滤，选择性强的过滤可能得到远少于
+    ``limit`` 行甚至空结果。范围较小时以 ``distance + 0`` 排序，使其不再匹配索引算子，
+    规划器改为按过滤条件取出范围内的块再做精确 top-k 排序。
+    """
+    return distance_expr + 0.0 if exact else distance_expr
+
+
+def _parse_extension_version(raw: str | None) -> tuple[int, ...]:
+    parts = re.findall(r"\d+", raw or "")
+    return tuple(int(part) for part in parts[:3]) or (0,)
+
+
+def _vector_search_params(
+    index_type: str,
+    *,
+    ivfflat_probes: int | None = None,
+    hnsw_ef_search: int | None = None,
+    limit: int | None = None,
+    filtered: bool = False,
+    iterative_scan: bool = False,
+) -> dict[str, str]:
+    """返回 ``index_type`` 索引需要设置的 GUC（名称 -> 取值），另一种索引的参数不下发。
+
+    ``filtered`` 表示查询带有仍走 ANN 索引的过滤条件：支持时开启 iterative scan，
+    使索引在过滤后结果不足时继续扫描；否则放大 ef_search / probes 以增加候选量。
+    """
+    params: dict[str, str] = {}
+    if index_type == "ivfflat":
+        probes = ivfflat_probes
+        if filtered and iterative_scan:
+            # ivfflat 只支持 relaxed_order，调用方对结果按距离重新排序
+            params["ivfflat.iterative_scan"] = "relaxed_order"
+        elif filtered and probes is not None:
+            probes = probes * FILTERED_CANDIDATE_FACTOR
+        if probes is not None:
+            params["ivfflat.probes"] = str(int(probes))
+        return params
+
+    ef_search = hnsw_ef_search
+    if filtered and iterative_scan:
+        params["hnsw.iterative_scan"] = "strict_order"
+    elif filtered and ef_search is not None:
+        ef_search = min(HNSW_MAX_EF_SEARCH, max(ef_search, limit or 0) * FILTERED_CANDIDATE_FACTOR)
+    if ef_search is not None:
+        params["hnsw.ef_search"] = str(int(ef_search))
+    return params
+
+
+def _okapi_bm25_stmt(
+    normalized_query: str,
+    ts_query: Any,
+    candidate_limit: int,
+    *extra_columns: Any,
+    filters: RetrievalFilters | None = None,
+    k1: float,
+    b: float,
+) -> Any:
+    """Okapi BM25 打分子查询（得分列名为 ``bm25_score``）。
+
+    先按 ts_rank 对 GIN 命中的块预筛出 ``candidate_limit`` 个（只取 id 与词元），再对这些块的
+    search_vector 展开词元，与只计算一次的查询词项统计连接，按
+    ``idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avgdl))`` 按块 id 分组求和，
+    最后按 id 连接回块与文档取投影列，分组不涉及块正文。
+    文档频率与语料统计由触发器按分片维护，这里对各分片求和。
+    """
+    chunk = models.KnowledgeChunk
+    terms = models.KnowledgeTermStat.__table__
+    corpus = models.KnowledgeCorpusStat.__table__
+
+    prefilter = (
+        select(chunk.id, chunk.search_vector, chunk.search_length)
+        .outerjoin(models.KnowledgeDocument, models.KnowledgeDocument.id == chunk.document_id)
+        .where(chunk.search_vector.isnot(None))
+        .where(chunk.search_vector.op("@@")(ts_query))
+    )
+    prefilter = (
+        _apply_retrieval_filters(prefilter, filters)
+        .order_by(func.ts_rank(chunk.search_vector, ts_query).desc())
+        .limit(candidate_limit)
+        .subquery("bm25_prefilter")
+    )
+
+    query_terms = func.tsvector_to_array(func.to_tsvector("simple", normalized_query))
+    term_stats = (
+        select(terms.c.term, func.sum(terms.c.doc_freq).label("doc_freq"))
+        .where(terms.c.term == any_(query_terms))
+        .group_by(terms.c.term)
+        .subquery("bm25_terms")
+    )
+    corpus_stats = select(
+        cast(func.coalesce(func.sum(corpus.c.chunk_count), 0), Float).label("chunk_count"),
+        cast(func.coalesce(func.sum(corpus.c.total_length), 0), Float).label("total_length"),
+    ).subquery("bm25_corpus")
+    lexemes = (
+        func.unnest(prefilter.c.search_vector)
+        .table_valued("lexeme", "positions", "weights")
+        .lateral("lexemes")
+    )
+
+    tf = cast(func.coalesce(func.nullif(func.cardinality(lexemes.c.positions), 0), 1), Float)
+    doc_freq = cast(term_stats.c.doc_freq, Float)
+    chunk_count = corpus_stats.c.chunk_count
+    avg_length = func.greatest(
+        corpus_stats.c.total_length / func.greatest(chunk_count, 1.0, type_=Float), 1.0, type_=Float
+    )
+    idf = func.ln(1.0 + (chunk_count - doc_freq + 0.5) / (doc_freq + 0.5))
+    length_norm = k1 * (1.0 - b + b * cast(func.coalesce(prefilter.c.search_length, 0), Float) / avg_length)
+    score = func.sum(idf * tf * (k1 + 1.0) / (tf + length_norm))
+
+    scores = (
+        select(prefilter.c.id, score.label("bm25_score"))
+        .select_from(
+            prefilter.join(lexemes, true())
+            .join(term_stats, term_stats.c.term == lexemes.c.lexeme)
+            .join(corpus_stats, true())
+        )
+        .group_by(prefilter.c.id, prefilter.c.search_length, chunk_count, corpus_stats.c.total_length)
+        .subquery("bm25_scores")
+    )
+    return (
+        _projected_chunks_stmt(*extra_columns, scores.c.bm25_score)
+        .join(scores, scores.c.id == chunk.id)
+        .subquery("bm25_candidates")
+    )
+
+
+def _bm25_search_stmt(
+    normalized_query: str,
+    limit: int,
+    *extra_columns: Any,
+    min_rank: float | None = None,
+    filters: RetrievalFilters | None = None,
+) -> Any:
+    """构建单条 BM25 检索语句（得分列名为 ``bm25_score``）。
+
+    okapi：命中任一查询词元（OR）的块经 GIN 索引筛出，按 ts_rank 预筛后再按 Okapi BM25 打分；
+    ts_rank_cd：保持原有的全部词元匹配（AND）与覆盖密度排名。
+    得分先在子查询中计算一次，阈值与排序在外层复用。
+    """
+    chunk = models.KnowledgeChunk
+    if resolve_bm25_scorer() == "ts_rank_cd":
+        ts_query = func.plainto_tsquery("simple", normalized_query)
+        candidates = (
+            _projected_chunks_stmt(
+                *extra_columns, func.ts_rank_cd(chunk.search_vector, ts_query).label("bm25_score")
+            )
+            .where(chunk.search_vector.isnot(None))
+            .where(chunk.search_vector.op("@@")(ts_query))
+        )
+        candidates = _apply_retrieval_filters(candidates, filters).subquery("bm25_candidates")
+    else:
+        # plainto_tsquery 的文本形式为 'a' & 'b'，替换为 | 得到任一词元匹配
+        ts_query = func.to_tsquery(
+            "simple",
+            func.replace(cast(func.plainto_tsquery("simple", normalized_query), Text), " & ", " | "),
+        )
+        candidates = _okapi_bm25_stmt(
+            normalized_query,
+            ts_query,
+            max(limit, settings.BM25_OKAPI_CANDIDATES),
+            *extra_columns,
+            filters=filters,
+            k1=settings.BM25_K1,
+            b=settings.BM25_B,
+        )
+
+    stmt = select(candidates)
+    # 绝对阈值（稳定语义）在数据库侧进行 gating
+    if min_rank is not None:
+        stmt = stmt.where(candidates.c.bm25_score >= min_rank)
+    return stmt.order_by(candidates.c.bm25_score.desc()).limit(limit)
 
 
 class CRUDKnowledgeBase:
@@ -123,33 +481,63 @@ class CRUDKnowledgeBase:
         chunks: Iterable[tuple[int, str, Sequence[float], Optional[str]]],
         *,
         commit: bool = True,
+        use_copy: bool | None = None,
     ) -> int:
-        """为一个文档持久化一批块。"""
-
-        records: list[dict[str, Any]] = []
-        for chunk_index, content, embedding, language in chunks:
-            search_text = tokenize_for_search(content, language)
-            vector = np.asarray(embedding).tolist()
+        """为一个文档持久化一批块。
+
+        默认通过 asyncpg 的二进制 COPY 写入暂存表后一次性转存，避免构造并解析
+        巨大的 ``INSERT ... VALUES`` 语句；驱动不支持 COPY 时回退为 INSERT。
+        """
+        if use_copy is None:
+            use_copy = settings.INGEST_COPY_ENABLED
+
+        rows_in = list(chunks)
+        # 一次批量分词（CJK 文本走 nlp.pipe），放到线程池避免阻塞事件循环
+        search_texts = await run_in_threadpool(
+            tokenize_many_for_search,
+            [content for _, content, _, _ in rows_in],
+            [language for _, _, _, language in rows_in],
+        )
+        records: list[tuple[Any, ...]] = []
+        for (chunk_index, content, embedding, language), search_text in zip(rows_in, search_texts):
             records.append(
-                {
-                    "document_id": document_id,
-                    "chunk_index": chunk_index,
-                    "content": content,
-                    "embedding": vector,
-                    "language": language,
-                    "search_vector": func.to_tsvector("simple", search_text),
-                }
+                (
+                    document_id,
+                    chunk_index,
+                    content,
+                    chunk_content_hash(content),
+                    np.asarray(embedding, dtype=np.float32).tolist(),
+                    language,
+                    search_text,
+                )
             )
 
-        if not records:
-            if commit:
-                await db.commit()
+        if records:
+            driver = await self._copy_capable_connection(db) if use_copy else None
+            if driver is not None:
+                await driver.execute(_CHUNK_STAGE_DDL)
+                await driver.copy_records_to_table(
+                    _CHUNK_STAGE_TABLE,
+                    records=records,
+                    columns=list(_CHUNK_STAGE_COLUMNS),
+                )
+                await driver.execute(_CHUNK_STAGE_INSERT)
+                # 同一事务内可能有多批写入，转存后清空暂存表
+                await driver.execute(f"TRUNCATE {_CHUNK_STAGE_TABLE}")
             else:
-                await db.flush()
-            return 0
-
-        stmt = insert(models.KnowledgeChunk).values(records)
-        await db.execute(stmt)
+                rows = [
+                    {
+                        "document_id": doc_id,
+                        "chunk_index": chunk_index,
+                        "content": content,
+                        "content_hash": content_hash,
+                        "embedding": vector,
+                        "language": language,
+                        "search_vector": func.to_tsvector("simple", search_text),
+                    }
+                    for doc_id, chunk_index, content, content_hash, vector, language, search_text in records
+                ]
+                await db.execute(insert(models.KnowledgeChunk).values(rows))
 
         if commit:
             await db.commit()
@@ -158,12 +546,142 @@ class CRUDKnowledgeBase:
 
         return len(records)
 
+    async def _copy_capable_connection(self, db: AsyncSession) -> Any | None:
+        """返回会话当前事务所用的 asyncpg 连接；非 asyncpg 驱动时返回 None。"""
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        driver = getattr(raw, "driver_connection", None)
+        if driver is None or not hasattr(driver, "copy_records_to_table"):
+            return None
+        # SQLAlchemy 的 asyncpg 适配器惰性开启事务；确保 COPY 落在会话事务内而非自动提交
+        if not driver.is_in_transaction():
+            await connection.exec_driver_sql("SELECT 1")
+        return driver
+
+    async def get_chunk_hashes_by_document_id(
+        self, db: AsyncSession, document_id: int
+    ) -> list[tuple[int, Optional[str]]]:
+        """按 chunk_index 顺序返回文档现有块的 ``(id, content_hash)``。"""
+        stmt = (
+            select(models.KnowledgeChunk.id, models.KnowledgeChunk.content_hash)
+            .where(models.KnowledgeChunk.document_id == document_id)
+            .order_by(models.KnowledgeChunk.chunk_index.asc(), models.KnowledgeChunk.id.asc())
+        )
+        result = await db.execute(stmt)
+        return [(int(row.id), row.content_hash) for row in result]
+
+    async def reindex_chunks(
+        self,
+        db: AsyncSession,
+        positions: Sequence[tuple[int, int]],
+    ) -> int:
+        """批量修改已有块的 chunk_index（``(id, chunk_index)``，不提交）。"""
+        if not positions:
+            return 0
+        await db.execute(
+            update(models.KnowledgeChunk),
+            [{"id": chunk_id, "chunk_index": chunk_index} for chunk_id, chunk_index in positions],
+        )
+        return len(positions)
+
+    async def copy_chunks(
+        self,
+        db: AsyncSession,
+        document_id: int,
+        copies: Sequence[tuple[int, int]],
+    ) -> int:
+        """以已有块为模板插入新块（``(源块 id, 新 chunk_index)``，不提交）。
+
+        embedding / search_vector 等列直接在数据库内复制，不经过 Python 也不重新编码。
+        """
+        if not copies:
+            return 0
+        chunk = models.KnowledgeChunk
+        sources = values(
+            column("source_id", Integer),
+            column("target_index", Integer),
+            name="chunk_copies",
+        ).data(list(copies))
+        select_stmt = select(
+            literal(document_id, Integer),
+            sources.c.target_index,
+            chunk.content,
+            chunk.content_hash,
+            chunk.embedding,
+            chunk.language,
+            chunk.search_vector,
+        ).join_from(sources, chunk, chunk.id == sources.c.source_id)
+        stmt = insert(chunk).from_select(
+            [
+                "document_id",
+                "chunk_index",
+                "content",
+                "content_hash",
+                "embedding",
+                "language",
+                "search_vector",
+            ],
+            select_stmt,
+        )
+        await db.execute(stmt)
+        return len(copies)
+
+    async def delete_chunks_by_ids(
+        self, db: AsyncSession, chunk_ids: Sequence[int], *, commit: bool = False
+    ) -> None:
+        """按 ID 批量删除块。"""
+        if chunk_ids:
+            await db.execute(
+                delete(models.KnowledgeChunk).where(models.KnowledgeChunk.id.in_(list(chunk_ids)))
+            )
+        if commit:
+            await db.commit()
+
     async def get_chunk_by_id(
         self, db: AsyncSession, chunk_id: int
     ) -> Optional[models.KnowledgeChunk]:
         """按 ID 获取块。"""
         return await db.get(models.KnowledgeChunk, chunk_id)
 
+    async def get_chunk_rows_by_ids(
+        self, db: AsyncSession, chunk_ids: Sequence[int]
+    ) -> dict[int, KnowledgeChunkRow]:
+        """按 ID 批量加载知识块投影（单条查询），返回 ``{id: row}``。"""
+        if not chunk_ids:
+            return {}
+        stmt = _projected_chunks_stmt().where(models.KnowledgeChunk.id.in_(list(chunk_ids)))
+        result = await db.execute(stmt)
+        rows = (_chunk_row_from_result(row) for row in result.all())
+        return {row.id: row for row in rows}
+
+    async def get_chunk_rows_in_ranges(
+        self, db: AsyncSession, ranges: Sequence[tuple[int, int, int]]
+    ) -> list[KnowledgeChunkRow]:
+        """按 ``(文档 id, 起始 chunk_index, 结束 chunk_index)`` 闭区间批量加载块投影（单条查询）。
+
+        区间以 ``VALUES`` 列表提供并与块表连接，可命中 ``(document_id)`` 索引。
+        """
+        if not ranges:
+            return []
+        chunk = models.KnowledgeChunk
+        spans = values(
+            column("document_id", Integer),
+            column("start_index", Integer),
+            column("end_index", Integer),
+            name="chunk_ranges",
+        ).data([(int(doc), int(start), int(end)) for doc, start, end in ranges])
+        stmt = (
+            _projected_chunks_stmt()
+            .join(
+                spans,
+                (chunk.document_id == spans.c.document_id)
+                & chunk.chunk_index.between(spans.c.start_index, spans.c.end_index),
+            )
+            .order_by(chunk.document_id, chunk.chunk_index)
+        )
+        result = await db.execute(stmt)
+        return [_chunk_row_from_result(row) for row in result.all()]
+
     async def persist_chunk(
         self, db: AsyncSession, chunk: models.KnowledgeChunk
     ) -> models.KnowledgeChunk:
@@ -177,23 +695,114 @@ class CRUDKnowledgeBase:
         await db.delete(chunk)
         await db.commit()
 
+    async def apply_vector_search_params(
+        self,
+        db: AsyncSession,
+        *,
+        ivfflat_probes: int | None = None,
+        hnsw_ef_search: int | None = None,
+        limit: int | None = None,
+        filters: RetrievalFilters | None = None,
+    ) -> None:
+        """在当前事务内设置 ANN 索引的查询参数（等价于 SET LOCAL）。
+
+        只设置与线上索引实际类型（见 :func:`get_active_index_type`，重建任务可能已切换类型）
+        对应的参数，并合并为一条 ``SELECT set_config(...)``，每次检索只多一次往返。带过滤条件且走 ANN 索引时（精确排序的检索由调用方不传
+        ``filters``）额外开启 iterative scan（pgvector >= 0.8）或放大候选量，避免过滤后
+        返回的行数少于 ``limit``。
+        """
+        filtered = filters is not None and not filters.is_empty()
+        iterative_scan = filtered and await self.pgvector_version(db) >= ITERATIVE_SCAN_MIN_VERSION
+        index_type = await get_active_index_type(db)
+        params = _vector_search_params(
+            index_type,
+            ivfflat_probes=ivfflat_probes,
+            hnsw_ef_search=hnsw_ef_search,
+            limit=limit,
+            filtered=filtered,
+            iterative_scan=iterative_scan,
+        )
+        if not params:
+            return
+        await db.execute(
+            select(*(func.set_config(name, value, True) for name, value in params.items()))
+        )
+
+    async def pgvector_version(self, db: AsyncSession) -> tuple[int, ...]:
+        """返回已安装的 pgvector 版本（进程内缓存，首次调用时查询 pg_extension）。"""
+        version = _pgvector_version_cache.get("vector")
+        if version is None:
+            result = await db.execute(
+                text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            )
+            version = _parse_extension_version(result.scalar_one_or_none())
+            _pgvector_version_cache["vector"] = version
+        return version
+
+    async def use_exact_vector_scope(
+        self, db: AsyncSession, filters: RetrievalFilters | None
+    ) -> bool:
+        """按文档过滤且范围内的块不超过 ``EXACT_SCOPE_MAX_CHUNKS`` 时返回 True。
+
+        计数子查询带 ``LIMIT``，经 document_id 索引最多读取 ``EXACT_SCOPE_MAX_CHUNKS + 1`` 行。
+        只按标签 / 语言 / 来源过滤的范围通常较大，不做计数，直接走 ANN 索引。
+        """
+        if filters is None or not filters.document_ids:
+            return False
+        scoped = _apply_retrieval_filters(
+            select(models.KnowledgeChunk.id).outerjoin(
+                models.KnowledgeDocument,
+                models.KnowledgeDocument.id == models.KnowledgeChunk.document_id,
+            ),
+            filters,
+        ).limit(EXACT_SCOPE_MAX_CHUNKS + 1)
+        result = await db.execute(select(func.count()).select_from(scoped.subquery("scoped_chunks")))
+        return int(result.scalar_one() or 0) <= EXACT_SCOPE_MAX_CHUNKS
+
+    async def count_chunks(self, db: AsyncSession) -> int:
+        """统计知识块总数。"""
+        result = await db.execute(select(func.count(models.KnowledgeChunk.id)))
+        return int(result.scalar_one() or 0)
+
     async def search_by_vector(
         self,
         db: AsyncSession,
         query_embedding: np.ndarray,
         limit: int,
-    ):
-        """通过嵌入获取块候选项。"""
-        distance_expr = models.KnowledgeChunk.embedding.cosine_distance(query_embedding)
-        stmt = (
-            select(models.KnowledgeChunk, distance_expr.label("distance"))
-            .options(selectinload(models.KnowledgeChunk.document))
-            .order_by(distance_expr.asc())
-            .limit(limit)
+        *,
+        ivfflat_probes: int | None = None,
+        hnsw_ef_search: int | None = None,
+        filters: RetrievalFilters | None = None,
+    ) -> list[tuple[KnowledgeChunkRow, float]]:
+        """通过嵌入获取块候选项（仅返回投影列）。
+
+        ``ivfflat_probes`` / ``hnsw_ef_search`` 以事务级 GUC 的方式生效，不影响连接池中的其他会话。
+        带过滤条件时仍保证返回 ``limit`` 行（只要范围内有足够的块）：小范围精确排序，
+        其余开启 iterative scan 或放大候选量，见 :func:`_vector_order_expr`。
+        """
+        exact = await self.use_exact_vector_scope(db, filters)
+        await self.apply_vector_search_params(
+            db,
+            ivfflat_probes=ivfflat_probes,
+            hnsw_ef_search=hnsw_ef_search,
+            limit=limit,
+            filters=None if exact else filters,
         )
+        # 查询向量显式转换为列类型（vector / halfvec），保证命中对应的 ANN 索引
+        distance_expr = models.KnowledgeChunk.embedding.cosine_distance(
+            cast(query_embedding, models.KnowledgeChunk.embedding.type)
+        )
+        stmt = _apply_retrieval_filters(
+            _projected_chunks_stmt(distance_expr.label("distance")),
+            filters,
+        )
+        stmt = stmt.order_by(_vector_order_expr(distance_expr, exact=exact).asc()).limit(limit)
 
         rows = await db.execute(stmt)
-        return rows.all()
+        hits = [(_chunk_row_from_result(row), float(row.distance)) for row in rows]
+        # ivfflat 的 iterative scan 为 relaxed_order，按距离重新排序
+        hits.sort(key=lambda item: item[1])
+        return hits
 
     async def search_by_bm25(
         self,
@@ -202,32 +811,119 @@ class CRUDKnowledgeBase:
         limit: int,
         *,
         query_language: str | None = None,
-        min_rank: float | None = None
-    ) -> list[tuple[models.KnowledgeChunk, float]]:
-        """通过 BM25 进行搜索。"""
-        normalized_query = tokenize_for_search(query, query_language)
+        min_rank: float | None = None,
+        filters: RetrievalFilters | None = None,
+    ) -> list[tuple[KnowledgeChunkRow, float]]:
+        """通过 BM25 进行搜索（仅返回投影列）。"""
+        normalized_query = tokenize_query_for_search(query, query_language)
 
         if not normalized_query or limit <= 0:
             return []
 
-        ts_query = func.plainto_tsquery("simple", normalized_query)
-        rank_expr = func.ts_rank_cd(models.KnowledgeChunk.search_vector, ts_query)
+        stmt = _bm25_search_stmt(normalized_query, limit, min_rank=min_rank, filters=filters)
+        rows = await db.execute(stmt)
+        return [(_chunk_row_from_result(row), float(row.bm25_score or 0.0)) for row in rows]
 
-        stmt = (
-            select(models.KnowledgeChunk, rank_expr.label("bm25_score"))
-            .options(selectinload(models.KnowledgeChunk.document))
-            .where(models.KnowledgeChunk.search_vector.isnot(None))
-            .where(models.KnowledgeChunk.search_vector.op("@@")(ts_query))
+    async def search_by_vector_many(
+        self,
+        db: AsyncSession,
+        query_embeddings: Sequence[np.ndarray],
+        limit: int,
+        *,
+        ivfflat_probes: int | None = None,
+        hnsw_ef_search: int | None = None,
+        filters: RetrievalFilters | None = None,
+    ) -> list[list[tuple[KnowledgeChunkRow, float]]]:
+        """一条 SQL 完成多条查询向量的近邻检索，结果按输入顺序返回。
+
+        查询向量以 ``VALUES`` 列表提供，每条向量通过 ``JOIN LATERAL`` 独立执行
+        ``ORDER BY distance LIMIT``，因此仍可走 ANN 索引。
+        """
+        results: list[list[tuple[KnowledgeChunkRow, float]]] = [[] for _ in query_embeddings]
+        if not query_embeddings or limit <= 0:
+            return results
+
+        exact = await self.use_exact_vector_scope(db, filters)
+        await self.apply_vector_search_params(
+            db,
+            ivfflat_probes=ivfflat_probes,
+            hnsw_ef_search=hnsw_ef_search,
+            limit=limit,
+            filters=None if exact else filters,
+        )
+        embedding_type = models.KnowledgeChunk.embedding.type
+        query_vectors = values(
+            column("query_index", Integer),
+            column("query_embedding", embedding_type),
+            name="query_vectors",
+        ).data(list(enumerate(query_embeddings)))
+        # VALUES 中的参数类型无法推断，显式转换为 vector 以匹配 <=> 运算符
+        distance_expr = models.KnowledgeChunk.embedding.cosine_distance(
+            cast(query_vectors.c.query_embedding, embedding_type)
+        )
+        candidates = (
+            _apply_retrieval_filters(
+                _projected_chunks_stmt(distance_expr.label("distance")),
+                filters,
+            )
+            .order_by(_vector_order_expr(distance_expr, exact=exact).asc())
+            .limit(limit)
+            .lateral("candidates")
+        )
+        stmt = select(query_vectors.c.query_index, candidates).select_from(
+            query_vectors.join(candidates, true())
         )
 
-        # 绝对阈值（稳定语义）在数据库侧进行 gating
-        if min_rank is not None:
-            stmt = stmt.where(rank_expr >= min_rank)
+        rows = await db.execute(stmt)
+        for row in rows:
+            results[row.query_index].append((_chunk_row_from_result(row), float(row.distance)))
+        for hits in results:
+            hits.sort(key=lambda item: item[1])
+        return results
 
-        stmt = stmt.order_by(rank_expr.desc()).limit(limit)
+    async def search_by_bm25_many(
+        self,
+        db: AsyncSession,
+        queries: Sequence[str],
+        limit: int,
+        *,
+        query_languages: Sequence[str | None] | None = None,
+        min_rank: float | None = None,
+        filters: RetrievalFilters | None = None,
+    ) -> list[list[tuple[KnowledgeChunkRow, float]]]:
+        """将多条 BM25 查询合并为一条 ``UNION ALL`` 语句执行，结果按输入顺序返回。"""
+        results: list[list[tuple[KnowledgeChunkRow, float]]] = [[] for _ in queries]
+        if not queries or limit <= 0:
+            return results
+
+        languages = list(query_languages or [None] * len(queries))
+        selects = []
+        for index, (query, language) in enumerate(zip(queries, languages)):
+            normalized_query = tokenize_query_for_search(query, language)
+            if not normalized_query:
+                continue
+
+            selects.append(
+                _bm25_search_stmt(
+                    normalized_query,
+                    limit,
+                    literal(index, Integer).label("query_index"),
+                    min_rank=min_rank,
+                    filters=filters,
+                )
+            )
 
-        rows = await db.execute(stmt)
-        return rows.all()
+        if not selects:
+            return results
+
+        rows = await db.execute(selects[0] if len(selects) == 1 else union_all(*selects))
+        for row in rows:
+            results[row.query_index].append(
+                (_chunk_row_from_result(row), float(row.bm25_score or 0.0))
+            )
+        for hits in results:
+            hits.sort(key=lambda item: item[1], reverse=True)
+        return results
 
 
 crud_knowledge_base = CRUDKnowledgeBase()
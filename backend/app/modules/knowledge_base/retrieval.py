@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import logging
+import time
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Any, Dict, List, Mapping
 
 import asyncio
 import numpy as np
@@ -10,13 +11,24 @@ from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.infrastructure.database.postgres_base import AsyncSessionLocal
 from app.infrastructure.dynamic_settings import get_dynamic_settings_service
 
-from . import models
-from .config import build_bm25_config, build_rag_config
-from .embeddings import get_embedder
+from .config import (
+    FusionConfig,
+    build_bm25_config,
+    build_fusion_config,
+    build_rag_config,
+    build_rerank_config,
+    build_vector_index_config,
+)
+from .embedding_cache import get_query_embedding_cache, normalize_query_text
+from .embedding_batcher import encode_texts
+from .embeddings import get_reranker
 from .language import detect_language
-from .repository import crud_knowledge_base
+from .metrics import record_cache_lookup, record_retrieval
+from .repository import KnowledgeChunkRow, RetrievalFilters, crud_knowledge_base
+from .retrieval_cache import CachedHit, RetrievalResultCache, get_retrieval_cache
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +49,7 @@ async def _load_dynamic_settings():
 class BM25Match:
     """BM25 匹配结果的数据类"""
 
-    chunk: models.KnowledgeChunk
+    chunk: KnowledgeChunkRow
     raw_score: float
     normalized_score: float
 
@@ -57,16 +69,17 @@ class RetrievedChunk:
     返回给聊天层的轻量级容器。
     """
 
-    chunk: "models.KnowledgeChunk"  # 知识块对象
+    chunk: KnowledgeChunkRow  # 知识块投影（不含 embedding / search_vector）
     score: float  # 最终得分
     similarity: float  # 相似度得分
     retrieval_source: str  # 检索来源 (vector, bm25, hybrid)
     vector_score: float = 0.0  # 向量检索得分
     bm25_score: float = 0.0  # BM25 检索得分
+    rerank_score: float | None = None  # Cross-Encoder 重排得分
 
 
 def _normalize_bm25_rows(
-    rows: list[tuple["models.KnowledgeChunk", float]],
+    rows: list[tuple[KnowledgeChunkRow, float]],
 ) -> BM25SearchResult:
     """将数据库返回的 BM25 结果归一化为 0-1 区间。"""
     if not rows:
@@ -96,39 +109,104 @@ def _normalize_bm25_rows(
         after_threshold=len(rows),
     )
 
+
+def _elapsed_ms(started: float) -> float:
+    """返回自 ``started`` 起经过的毫秒数。"""
+    return (time.perf_counter() - started) * 1000.0
+
+
+async def _encode_query_uncached(query: str) -> np.ndarray:
+    """为单条查询生成归一化向量（经微批处理器与并发请求合并编码）。"""
+    return (await encode_texts([query]))[0]
+
+
+async def _encode_query(query: str) -> np.ndarray:
+    """获取查询向量，启用时优先命中查询向量缓存。"""
+    if not settings.QUERY_EMBEDDING_CACHE_ENABLED:
+        return await _encode_query_uncached(query)
+    return await get_query_embedding_cache().get_or_encode(query, _encode_query_uncached)
+
+
+async def _encode_queries_uncached(queries: list[str]) -> np.ndarray:
+    """批量生成多条查询的归一化向量（作为一个请求提交给微批处理器）。"""
+    return await encode_texts(queries)
+
+
+async def _encode_queries(queries: list[str]) -> list[np.ndarray]:
+    """批量获取查询向量，缓存未命中的查询合并为一次编码。"""
+    if not settings.QUERY_EMBEDDING_CACHE_ENABLED:
+        return list(await _encode_queries_uncached(queries))
+    return await get_query_embedding_cache().get_or_encode_many(queries, _encode_queries_uncached)
+
+
 async def vector_search(
     db: AsyncSession,
     query: str,
     *,
     top_k: int,
+    filters: RetrievalFilters | None = None,
 ) -> List[RetrievedChunk]:
     """仅使用向量相似度的检索接口。"""
     if top_k <= 0 or not query.strip():
         return []
 
-    embedder = get_embedder()
-    query_embedding = (
-        await run_in_threadpool(embedder.encode, [query], normalize_embeddings=True)
-    )[0]
+    started = time.perf_counter()
+    query_embedding = await _encode_query(query)
+    embed_ms = _elapsed_ms(started)
 
-    vector_hits = await _vector_candidates(db, query_embedding, top_k)
+    config_map = await _load_dynamic_settings()
+    sql_started = time.perf_counter()
+    vector_hits = await _vector_candidates(
+        db,
+        query_embedding,
+        top_k,
+        config_map=config_map,
+        filters=filters,
+    )
+    vector_ms = _elapsed_ms(sql_started)
     results = list(vector_hits.values())
     results.sort(key=lambda item: item.score, reverse=True)
-    return results[:top_k]
+    results = results[:top_k]
+
+    record_retrieval(
+        "vector",
+        total_ms=_elapsed_ms(started),
+        delivered=len(results),
+        embed_ms=embed_ms,
+        vector_ms=vector_ms,
+        vector_candidates=len(vector_hits),
+    )
+    return results
 
 async def _vector_candidates(
     db: AsyncSession,
     query_embedding: np.ndarray,
     top_k: int,
+    *,
+    config_map: Mapping[str, Any] | None = None,
+    filters: RetrievalFilters | None = None,
 ) -> Dict[int, RetrievedChunk]:
     """Fetch candidates using vector similarity search.
     使用向量相似度搜索获取候选者。
     """
+    if config_map is None:
+        config_map = await _load_dynamic_settings()
+    index_config = build_vector_index_config(config_map)
     rows = await crud_knowledge_base.search_by_vector(
         db,
         query_embedding,
         top_k,
+        ivfflat_probes=index_config.ivfflat_probes,
+        hnsw_ef_search=index_config.hnsw_ef_search,
+        filters=filters,
     )
+    return _vector_hits_from_rows(rows)
+
+
+def _vector_hits_from_rows(
+    rows: list[tuple[KnowledgeChunkRow, float]],
+) -> Dict[int, RetrievedChunk]:
+    """将 (投影, 余弦距离) 行转换为以 chunk id 为键的候选字典。"""
     items: Dict[int, RetrievedChunk] = {}
     for chunk, distance in rows:
         distance_val = float(distance)
@@ -150,20 +228,35 @@ async def bm25_search(
     query: str,
     *,
     requested_top_k: int,
+    filters: RetrievalFilters | None = None,
 ) -> BM25SearchResult:
     """Perform BM25 keyword search.
     执行 BM25 关键词搜索。
     """
-    return await _bm25_candidates(db, query, requested_top_k)
+    started = time.perf_counter()
+    result = await _bm25_candidates(db, query, requested_top_k, filters=filters)
+    total_ms = _elapsed_ms(started)
+    record_retrieval(
+        "bm25",
+        total_ms=total_ms,
+        delivered=len(result.matches),
+        bm25_ms=total_ms,
+        bm25_candidates=result.raw_hits,
+    )
+    return result
 
 
 async def _bm25_candidates(
     db: AsyncSession,
     query: str,
     top_k: int,
+    *,
+    config_map: Mapping[str, Any] | None = None,
+    filters: RetrievalFilters | None = None,
 ) -> BM25SearchResult:
     """Fetch BM25 results with normalization."""
-    config_map = await _load_dynamic_settings()
+    if config_map is None:
+        config_map = await _load_dynamic_settings()
     bm25_config = build_bm25_config(config_map, requested_top_k=top_k)
     if not query.strip():
         return BM25SearchResult(matches=[], raw_hits=0, after_threshold=0)
@@ -175,29 +268,70 @@ async def _bm25_candidates(
         bm25_config.top_k,
         query_language=query_language,
         min_rank=bm25_config.min_rank,
+        filters=filters,
     )
 
     return _normalize_bm25_rows(rows)
 
 
+def _rank_positions(ordered_ids: List[int]) -> Dict[int, int]:
+    """将按得分降序排列的 id 列表映射为 1 起始的名次。"""
+    return {chunk_id: rank for rank, chunk_id in enumerate(ordered_ids, start=1)}
+
+
+def _fused_score(
+    fusion: FusionConfig,
+    *,
+    vector_score: float,
+    bm25_normalized: float,
+    vector_rank: int | None,
+    bm25_rank: int | None,
+) -> float:
+    """按融合策略计算单个候选的综合得分（0-1）。"""
+    if fusion.mode == "rrf":
+        # Reciprocal Rank Fusion，除以理论最大值（两路均排第一）归一化到 0-1
+        k = fusion.rrf_k
+        total = 0.0
+        if vector_rank is not None:
+            total += 1.0 / (k + vector_rank)
+        if bm25_rank is not None:
+            total += 1.0 / (k + bm25_rank)
+        return total / (2.0 / (k + 1))
+    if fusion.mode == "weighted":
+        weight = fusion.vector_weight
+        return weight * vector_score + (1.0 - weight) * bm25_normalized
+    return max(vector_score, bm25_normalized)
+
+
 def _merge_candidates(
     vector_hits: Dict[int, RetrievedChunk],
-    bm25_hits: Dict[int, tuple["models.KnowledgeChunk", float, float]],
+    bm25_hits: Dict[int, tuple[KnowledgeChunkRow, float, float]],
+    fusion: FusionConfig | None = None,
 ) -> List[RetrievedChunk]:
     """Merge vector and BM25 candidates (Hybrid Search).
     合并向量和 BM25 候选者 (混合搜索)。
+
+    ``bm25_hits`` 需按 BM25 原始得分降序排列；``fusion`` 缺省时按静态配置构造，
+    与 ``hybrid_search`` 未配置动态设置时的融合方式一致。
     """
+    if fusion is None:
+        fusion = build_fusion_config(None)
+
+    vector_ranks = _rank_positions(
+        sorted(vector_hits, key=lambda chunk_id: vector_hits[chunk_id].vector_score, reverse=True)
+    )
+    bm25_ranks = _rank_positions(list(bm25_hits))
+    bm25_normalized: Dict[int, float] = {}
+
     merged: Dict[int, RetrievedChunk] = dict(vector_hits)
 
     for chunk_id, (chunk, normalized, raw_score) in bm25_hits.items():
+        bm25_normalized[chunk_id] = normalized
         if chunk_id in merged:
             # 如果在向量结果中已存在，更新为混合模式
             item = merged[chunk_id]
             item.bm25_score = raw_score
             item.retrieval_source = "hybrid"
-            # 取向量得分和 BM25 归一化得分的最大值作为基础得分
-            candidate = max(item.vector_score, normalized)
-            item.score = candidate
             item.similarity = max(item.similarity, normalized)
         else:
             # 如果仅在 BM25 结果中，添加为新条目
@@ -210,64 +344,461 @@ def _merge_candidates(
                 bm25_score=raw_score,
             )
 
+    for chunk_id, item in merged.items():
+        item.score = _fused_score(
+            fusion,
+            vector_score=item.vector_score,
+            bm25_normalized=bm25_normalized.get(chunk_id, 0.0),
+            vector_rank=vector_ranks.get(chunk_id),
+            bm25_rank=bm25_ranks.get(chunk_id),
+        )
+
     return list(merged.values())
 
 
+async def _vector_leg(
+    query: str,
+    top_k: int,
+    config_map: Mapping[str, Any],
+    filters: RetrievalFilters | None,
+) -> tuple[Dict[int, RetrievedChunk], float, float]:
+    """向量检索分支：编码查询后在独立的连接池会话中执行向量召回。
+
+    返回 ``(候选, 编码耗时ms, SQL耗时ms)``。
+    """
+    started = time.perf_counter()
+    query_embedding = await _encode_query(query)
+    embed_ms = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        hits = await _vector_candidates(
+            session,
+            query_embedding,
+            top_k,
+            config_map=config_map,
+            filters=filters,
+        )
+    return hits, embed_ms, _elapsed_ms(started)
+
+
+async def _bm25_leg(
+    query: str,
+    top_k: int,
+    config_map: Mapping[str, Any],
+    filters: RetrievalFilters | None,
+) -> tuple[BM25SearchResult, float]:
+    """BM25 检索分支：在独立的连接池会话中执行全文检索，返回 ``(结果, 耗时ms)``。"""
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        result = await _bm25_candidates(
+            session,
+            query,
+            top_k,
+            config_map=config_map,
+            filters=filters,
+        )
+    return result, _elapsed_ms(started)
+
+
+async def _load_cached_hits(
+    db: AsyncSession,
+    cache: RetrievalResultCache,
+    cache_key: str,
+) -> List[RetrievedChunk] | None:
+    """读取缓存的排序结果，并用一条查询按 id 回表取正文；任一块缺失时视为未命中。"""
+    hits = await cache.get(cache_key)
+    if hits is None:
+        return None
+
+    rows = await crud_knowledge_base.get_chunk_rows_by_ids(db, [hit.chunk_id for hit in hits])
+    if len(rows) != len(hits):
+        return None
+
+    return [
+        RetrievedChunk(
+            chunk=rows[hit.chunk_id],
+            score=hit.score,
+            similarity=hit.similarity,
+            retrieval_source=hit.retrieval_source,
+            vector_score=hit.vector_score,
+            bm25_score=hit.bm25_score,
+        )
+        for hit in hits
+    ]
+
+
 async def hybrid_search(
     db: AsyncSession,
     query: str,
     top_k: int,
+    *,
+    concurrent: bool = True,
+    filters: RetrievalFilters | None = None,
 ) -> List[RetrievedChunk]:
     """Fetch a generous batch of candidates via vector + BM25 and let Gemini digest them.
     通过向量 + BM25 获取大量候选者，并让 Gemini 进行处理。
+
+    ``concurrent=True`` 时两个分支各自占用一个连接池会话并行执行，BM25 查询在
+    查询向量编码期间即已发出；``concurrent=False`` 时在调用方的 ``db`` 会话上顺序执行。
+    ``filters`` 会同时下推到两路 SQL 中。
+
+    启用 ``RETRIEVAL_CACHE_ENABLED`` 时，相同（查询, top_k, 过滤条件, 动态配置, 语料版本）
+    的检索直接复用缓存的排序结果，仅回表读取正文。
     """
     if top_k <= 0 or not query.strip():
         return []
 
+    started = time.perf_counter()
     config_map = await _load_dynamic_settings()
     rag_config = build_rag_config(config_map, requested_top_k=top_k)
+    fusion = build_fusion_config(config_map)
     effective_top_k = rag_config.top_k
 
-    # 生成查询向量
-    embedder = get_embedder()
-    query_embedding = (
-        await run_in_threadpool(embedder.encode, [query], normalize_embeddings=True)
-    )[0]
-
-    # 获取向量检索候选者
-    vector_hits = await _vector_candidates(
-        db,
-        query_embedding,
-        effective_top_k,
-    )
-    # 获取 BM25 检索候选者
-    bm25_result = await _bm25_candidates(db, query, effective_top_k)
+    cache = get_retrieval_cache() if settings.RETRIEVAL_CACHE_ENABLED else None
+    cache_key: str | None = None
+    if cache is not None:
+        generation = await cache.generation()
+        if generation is not None:
+            cache_key = cache.make_key(generation, query, effective_top_k, filters, config_map)
+            cached = await _load_cached_hits(db, cache, cache_key)
+            record_cache_lookup(cached is not None)
+            if cached is not None:
+                record_retrieval("hybrid", total_ms=_elapsed_ms(started), delivered=len(cached))
+                logger.debug(
+                    "retrieval hybrid: cache hit delivered=%s generation=%s total_ms=%.1f",
+                    len(cached),
+                    generation,
+                    _elapsed_ms(started),
+                )
+                return cached
+
+    if concurrent:
+        # 向量分支（编码 + SQL）与 BM25 分支并行执行
+        (vector_hits, embed_ms, vector_ms), (bm25_result, bm25_ms) = await asyncio.gather(
+            _vector_leg(query, effective_top_k, config_map, filters),
+            _bm25_leg(query, effective_top_k, config_map, filters),
+        )
+    else:
+        leg_started = time.perf_counter()
+        query_embedding = await _encode_query(query)
+        embed_ms = _elapsed_ms(leg_started)
+
+        leg_started = time.perf_counter()
+        vector_hits = await _vector_candidates(
+            db,
+            query_embedding,
+            effective_top_k,
+            config_map=config_map,
+            filters=filters,
+        )
+        vector_ms = _elapsed_ms(leg_started)
+
+        leg_started = time.perf_counter()
+        bm25_result = await _bm25_candidates(
+            db,
+            query,
+            effective_top_k,
+            config_map=config_map,
+            filters=filters,
+        )
+        bm25_ms = _elapsed_ms(leg_started)
 
-    bm25_hits: Dict[int, tuple["models.KnowledgeChunk", float, float]] = {}
+    bm25_hits: Dict[int, tuple[KnowledgeChunkRow, float, float]] = {}
     for match in bm25_result.matches:
         bm25_hits[match.chunk.id] = (match.chunk, match.normalized_score, match.raw_score)
 
     # 合并结果
-    merged = _merge_candidates(vector_hits, bm25_hits)
+    fusion_started = time.perf_counter()
+    merged = _merge_candidates(vector_hits, bm25_hits, fusion)
 
     # 按得分排序并截断
     merged.sort(key=lambda item: item.score, reverse=True)
     trimmed = merged[:effective_top_k]
+    fusion_ms = _elapsed_ms(fusion_started)
 
     logger.debug(
-        "retrieval simplified: vector=%s bm25=%s delivered=%s",
+        "retrieval hybrid: vector=%s bm25=%s delivered=%s concurrent=%s fusion=%s "
+        "embed_ms=%.1f vector_sql_ms=%.1f bm25_sql_ms=%.1f fusion_ms=%.1f total_ms=%.1f",
         len(vector_hits),
         len(bm25_hits),
         len(trimmed),
+        concurrent,
+        fusion.mode,
+        embed_ms,
+        vector_ms,
+        bm25_ms,
+        fusion_ms,
+        _elapsed_ms(started),
+    )
+    record_retrieval(
+        "hybrid",
+        total_ms=_elapsed_ms(started),
+        delivered=len(trimmed),
+        embed_ms=embed_ms,
+        vector_ms=vector_ms,
+        bm25_ms=bm25_ms,
+        fusion_ms=fusion_ms,
+        vector_candidates=len(vector_hits),
+        bm25_candidates=len(bm25_hits),
+    )
+
+    if cache is not None and cache_key is not None:
+        await cache.set(
+            cache_key,
+            [
+                CachedHit(
+                    chunk_id=item.chunk.id,
+                    score=item.score,
+                    similarity=item.similarity,
+                    retrieval_source=item.retrieval_source,
+                    vector_score=item.vector_score,
+                    bm25_score=item.bm25_score,
+                )
+                for item in trimmed
+            ],
+        )
+    return trimmed
+
+
+async def _vector_leg_many(
+    queries: list[str],
+    top_k: int,
+    config_map: Mapping[str, Any],
+    filters: RetrievalFilters | None,
+    db: AsyncSession | None = None,
+) -> tuple[list[Dict[int, RetrievedChunk]], float, float]:
+    """批量向量分支：一次编码所有查询，再以单条 LATERAL 查询召回。
+
+    ``db`` 为空时使用独立的连接池会话。返回 ``(每条查询的候选, 编码耗时ms, SQL耗时ms)``。
+    """
+    started = time.perf_counter()
+    embeddings = await _encode_queries(queries)
+    embed_ms = _elapsed_ms(started)
+
+    index_config = build_vector_index_config(config_map)
+    started = time.perf_counter()
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            rows = await crud_knowledge_base.search_by_vector_many(
+                session,
+                embeddings,
+                top_k,
+                ivfflat_probes=index_config.ivfflat_probes,
+                hnsw_ef_search=index_config.hnsw_ef_search,
+                filters=filters,
+            )
+    else:
+        rows = await crud_knowledge_base.search_by_vector_many(
+            db,
+            embeddings,
+            top_k,
+            ivfflat_probes=index_config.ivfflat_probes,
+            hnsw_ef_search=index_config.hnsw_ef_search,
+            filters=filters,
+        )
+    return [_vector_hits_from_rows(hits) for hits in rows], embed_ms, _elapsed_ms(started)
+
+
+async def _bm25_leg_many(
+    queries: list[str],
+    top_k: int,
+    config_map: Mapping[str, Any],
+    filters: RetrievalFilters | None,
+    db: AsyncSession | None = None,
+) -> tuple[list[BM25SearchResult], float]:
+    """批量 BM25 分支：所有查询合并为一条 UNION ALL 查询，返回 ``(每条查询的结果, 耗时ms)``。"""
+    bm25_config = build_bm25_config(config_map, requested_top_k=top_k)
+    languages = [detect_language(query) for query in queries]
+
+    started = time.perf_counter()
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            rows = await crud_knowledge_base.search_by_bm25_many(
+                session,
+                queries,
+                bm25_config.top_k,
+                query_languages=languages,
+                min_rank=bm25_config.min_rank,
+                filters=filters,
+            )
+    else:
+        rows = await crud_knowledge_base.search_by_bm25_many(
+            db,
+            queries,
+            bm25_config.top_k,
+            query_languages=languages,
+            min_rank=bm25_config.min_rank,
+            filters=filters,
+        )
+    return [_normalize_bm25_rows(hits) for hits in rows], _elapsed_ms(started)
+
+
+def _dedupe_queries(queries: List[str]) -> List[str]:
+    """去掉空查询以及归一化后重复的查询，保留首次出现的顺序。"""
+    seen: set[str] = set()
+    unique: List[str] = []
+    for query in queries:
+        normalized = normalize_query_text(query)
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            unique.append(query)
+    return unique
+
+
+async def hybrid_search_many(
+    db: AsyncSession,
+    queries: List[str],
+    top_k: int,
+    *,
+    concurrent: bool = True,
+    filters: RetrievalFilters | None = None,
+) -> List[RetrievedChunk]:
+    """Hybrid retrieval for several query variants (multi-query / HyDE expansion).
+    多查询混合检索：所有查询一次批量编码，向量与 BM25 各只发出一条 SQL。
+
+    每条查询内部按 ``RAG_FUSION_MODE`` 融合两路结果；查询之间对同一知识块取最高得分。
+    只有一条有效查询时退化为 :func:`hybrid_search`（可命中检索结果缓存）。
+    """
+    unique_queries = _dedupe_queries(queries)
+    if top_k <= 0 or not unique_queries:
+        return []
+    if len(unique_queries) == 1:
+        return await hybrid_search(
+            db,
+            unique_queries[0],
+            top_k,
+            concurrent=concurrent,
+            filters=filters,
+        )
+
+    started = time.perf_counter()
+    config_map = await _load_dynamic_settings()
+    rag_config = build_rag_config(config_map, requested_top_k=top_k)
+    fusion = build_fusion_config(config_map)
+    effective_top_k = rag_config.top_k
+
+    if concurrent:
+        (vector_hits, embed_ms, vector_ms), (bm25_results, bm25_ms) = await asyncio.gather(
+            _vector_leg_many(unique_queries, effective_top_k, config_map, filters),
+            _bm25_leg_many(unique_queries, effective_top_k, config_map, filters),
+        )
+    else:
+        vector_hits, embed_ms, vector_ms = await _vector_leg_many(
+            unique_queries, effective_top_k, config_map, filters, db
+        )
+        bm25_results, bm25_ms = await _bm25_leg_many(
+            unique_queries, effective_top_k, config_map, filters, db
+        )
+
+    fusion_started = time.perf_counter()
+    pooled: Dict[int, RetrievedChunk] = {}
+    for query_vector_hits, bm25_result in zip(vector_hits, bm25_results):
+        bm25_hits = {
+            match.chunk.id: (match.chunk, match.normalized_score, match.raw_score)
+            for match in bm25_result.matches
+        }
+        for item in _merge_candidates(query_vector_hits, bm25_hits, fusion):
+            current = pooled.get(item.chunk.id)
+            if current is None or item.score > current.score:
+                pooled[item.chunk.id] = item
+
+    merged = sorted(pooled.values(), key=lambda item: item.score, reverse=True)
+    trimmed = merged[:effective_top_k]
+    fusion_ms = _elapsed_ms(fusion_started)
+
+    logger.debug(
+        "retrieval hybrid_many: queries=%s pooled=%s delivered=%s concurrent=%s fusion=%s "
+        "embed_ms=%.1f vector_sql_ms=%.1f bm25_sql_ms=%.1f fusion_ms=%.1f total_ms=%.1f",
+        len(unique_queries),
+        len(pooled),
+        len(trimmed),
+        concurrent,
+        fusion.mode,
+        embed_ms,
+        vector_ms,
+        bm25_ms,
+        fusion_ms,
+        _elapsed_ms(started),
+    )
+    record_retrieval(
+        "hybrid_many",
+        total_ms=_elapsed_ms(started),
+        delivered=len(trimmed),
+        embed_ms=embed_ms,
+        vector_ms=vector_ms,
+        bm25_ms=bm25_ms,
+        fusion_ms=fusion_ms,
+        vector_candidates=sum(len(hits) for hits in vector_hits),
+        bm25_candidates=sum(len(result.matches) for result in bm25_results),
     )
     return trimmed
 
 
+def _predict_rerank_scores(pairs: list[tuple[str, str]]) -> list[float]:
+    """在单次前向计算中为所有 (query, chunk) 对打分（阻塞调用，需在线程池中运行）。"""
+    reranker = get_reranker()
+    scores = reranker.predict(
+        pairs,
+        batch_size=len(pairs),
+        show_progress_bar=False,
+        convert_to_numpy=True,
+    )
+    return [float(score) for score in np.asarray(scores, dtype=np.float32).reshape(-1)]
+
+
+async def rerank_chunks(
+    query: str,
+    candidates: List[RetrievedChunk],
+    *,
+    config_map: Mapping[str, Any] | None = None,
+) -> List[RetrievedChunk]:
+    """Optional Cross-Encoder rerank stage between hybrid retrieval and prompt building.
+    可选的 Cross-Encoder 重排阶段：对前 N 个候选批量打分后截断为更小的最终集合。
+
+    未启用、查询为空或无候选时原样返回 ``candidates``。
+    """
+    if config_map is None:
+        config_map = await _load_dynamic_settings()
+    rerank_config = build_rerank_config(config_map)
+    if not rerank_config.enabled or not candidates or not query.strip():
+        return candidates
+
+    started = time.perf_counter()
+    pool = [item for item in candidates[: rerank_config.candidates] if (item.chunk.content or "").strip()]
+    if not pool:
+        return candidates
+
+    pairs = [(query, item.chunk.content) for item in pool]
+    scores = await run_in_threadpool(_predict_rerank_scores, pairs)
+
+    for item, score in zip(pool, scores):
+        item.rerank_score = score
+        item.score = max(0.0, min(1.0, score))
+
+    pool.sort(key=lambda item: item.rerank_score or 0.0, reverse=True)
+    kept = [item for item in pool if (item.rerank_score or 0.0) >= rerank_config.score_threshold]
+    # 阈值过严时至少保留最优的一个候选，避免上下文为空
+    final = (kept or pool[:1])[: rerank_config.top_n]
+
+    logger.debug(
+        "retrieval rerank: candidates=%s scored=%s delivered=%s rerank_ms=%.1f",
+        len(candidates),
+        len(pool),
+        len(final),
+        _elapsed_ms(started),
+    )
+    return final
+
+
 __all__ = [
     "BM25Match",
     "BM25SearchResult",
+    "RetrievalFilters",
     "RetrievedChunk",
     "bm25_search",
     "vector_search",
     "hybrid_search",
+    "hybrid_search_many",
+    "rerank_chunks",
 ]
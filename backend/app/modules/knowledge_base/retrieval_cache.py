@@ -0,0 +1,208 @@
+"""Redis cache for ranked hybrid-retrieval results.
+混合检索结果缓存：只存排序后的 chunk id 与各项得分，命中后按 id 批量回表取正文。
+
+缓存键包含语料版本号（``corpus_gen``）。摄入、更新、删除知识块或文档时自增版本号，
+旧版本的条目不会再被读取并随 TTL 自然过期，失效为 O(1)。
+
+自增失败时本进程停用缓存，并在后台按退避间隔重试自增；重试成功（旧条目全部失效）后恢复。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Mapping
+
+from app.core.config import settings
+from app.infrastructure.redis.keyspace import redis_keys
+from app.infrastructure.redis.redis_base import RedisBase
+
+from .embedding_cache import normalize_query_text
+from .repository import RetrievalFilters
+
+logger = logging.getLogger(__name__)
+
+# 版本号自增失败后的重试间隔（秒，指数退避）
+BUMP_RETRY_INITIAL_SECONDS = 0.5
+BUMP_RETRY_MAX_SECONDS = 30.0
+
+
+@dataclass(slots=True)
+class CachedHit:
+    """缓存中的单条命中（不含正文）。"""
+
+    chunk_id: int
+    score: float
+    similarity: float
+    retrieval_source: str
+    vector_score: float = 0.0
+    bm25_score: float = 0.0
+
+
+class RetrievalResultCache:
+    """Cache ranked retrieval hits in Redis, invalidated by a corpus generation counter.
+
+    Redis 不可用时所有读操作视为未命中、写操作静默跳过，检索照常执行。
+    """
+
+    def __init__(self, redis_client: RedisBase | None, *, ttl_seconds: int = 600) -> None:
+        self._redis = redis_client
+        self._ttl_seconds = max(1, int(ttl_seconds))
+        self._pending_bump: asyncio.Task[None] | None = None
+
+    def invalidation_pending(self) -> bool:
+        """是否有未完成的版本号自增（期间本进程不读写缓存）。"""
+        task = self._pending_bump
+        if task is None or task.done():
+            return False
+        try:
+            # 事件循环已更换（例如测试中多次 asyncio.run）时旧任务不会再执行，需重新调度
+            return task.get_loop() is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    async def generation(self) -> int | None:
+        """读取当前语料版本号；Redis 不可用或仍有未完成的失效时返回 None（调用方应跳过缓存）。"""
+        if self._redis is None or self.invalidation_pending():
+            return None
+        try:
+            await self._redis.ensure_connection()
+            raw = await self._redis.get(redis_keys.knowledge.corpus_generation())
+        except Exception as exc:  # pragma: no cover - RedisBase already logs
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            logger.debug("Corpus generation read failed: %s", exc)
+            return None
+        try:
+            return int(raw) if raw is not None else 0
+        except (TypeError, ValueError):
+            return None
+
+    async def bump_generation(self) -> int | None:
+        """自增语料版本号，使所有已缓存的检索结果失效。
+
+        失败时停用本进程的缓存并在后台重试，直到自增成功；返回 None 表示失效尚未完成。
+        """
+        if self._redis is None:
+            return None
+        generation = await self._incr_generation()
+        if generation is None:
+            logger.warning("Failed to bump corpus generation; retrieval cache disabled until the retry succeeds")
+            self._schedule_bump_retry()
+        return generation
+
+    async def _incr_generation(self) -> int | None:
+        try:
+            await self._redis.ensure_connection()
+            return await self._redis.incr(redis_keys.knowledge.corpus_generation())
+        except Exception as exc:  # pragma: no cover - RedisBase already logs
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            logger.debug("Corpus generation increment failed: %s", exc)
+            return None
+
+    def _schedule_bump_retry(self) -> None:
+        # 任意一次成功的自增都能使之前的所有条目失效，多次失败只需一个重试任务
+        if self.invalidation_pending():
+            return
+        self._pending_bump = asyncio.get_running_loop().create_task(self._retry_bump())
+
+    async def _retry_bump(self) -> None:
+        delay = BUMP_RETRY_INITIAL_SECONDS
+        while True:
+            await asyncio.sleep(delay)
+            generation = await self._incr_generation()
+            if generation is not None:
+                logger.info("Corpus generation bumped to %s after retry; retrieval cache re-enabled", generation)
+                return
+            delay = min(delay * 2, BUMP_RETRY_MAX_SECONDS)
+
+    @staticmethod
+    def make_key(
+        generation: int,
+        query: str,
+        top_k: int,
+        filters: RetrievalFilters | None,
+        config_map: Mapping[str, Any],
+    ) -> str:
+        """返回 (版本号, 归一化查询, top_k, 过滤条件, 动态配置) 的摘要。
+
+        动态配置参与计算，调整融合方式、阈值等参数后不会读到旧结果。
+        """
+        payload = json.dumps(
+            {
+                "gen": generation,
+                "q": normalize_query_text(query),
+                "k": top_k,
+                "f": asdict(filters) if filters is not None and not filters.is_empty() else None,
+                "cfg": dict(config_map),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> list[CachedHit] | None:
+        """读取缓存的命中列表；未命中或数据损坏时返回 None。"""
+        if self._redis is None or self.invalidation_pending():
+            return None
+        try:
+            await self._redis.ensure_connection()
+            payload = await self._redis.get_json(redis_keys.knowledge.retrieval_result(key))
+        except Exception as exc:  # pragma: no cover - RedisBase already logs
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            logger.debug("Retrieval cache read failed: %s", exc)
+            return None
+        if not payload:
+            return None
+        try:
+            return [CachedHit(**item) for item in payload["hits"]]
+        except (KeyError, TypeError):
+            logger.warning("Discarding malformed cached retrieval result %s", key)
+            return None
+
+    async def set(self, key: str, hits: list[CachedHit]) -> None:
+        """写入命中列表（带 TTL）。"""
+        if self._redis is None or self.invalidation_pending():
+            return
+        try:
+            await self._redis.ensure_connection()
+            await self._redis.set_json(
+                redis_keys.knowledge.retrieval_result(key),
+                {"hits": [asdict(hit) for hit in hits]},
+                ttl=self._ttl_seconds,
+            )
+        except Exception as exc:  # pragma: no cover - RedisBase already logs
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            logger.debug("Retrieval cache write failed: %s", exc)
+
+
+@lru_cache(maxsize=1)
+def get_retrieval_cache() -> RetrievalResultCache:
+    """返回绑定共享 Redis 连接池的检索结果缓存单例。"""
+    return RetrievalResultCache(
+        RedisBase(key_prefix="kb:"),
+        ttl_seconds=settings.RETRIEVAL_CACHE_TTL,
+    )
+
+
+async def bump_corpus_generation() -> None:
+    """知识库写操作完成后调用，使检索结果缓存整体失效。"""
+    await get_retrieval_cache().bump_generation()
+
+
+__all__ = [
+    "BUMP_RETRY_INITIAL_SECONDS",
+    "BUMP_RETRY_MAX_SECONDS",
+    "CachedHit",
+    "RetrievalResultCache",
+    "bump_corpus_generation",
+    "get_retrieval_cache",
+]
@@ -35,6 +35,37 @@ class KnowledgeIngestResult(BaseModel):
     chunks: int
 
 
+class KnowledgeIngestJobAccepted(BaseModel):
+    job_id: str = Field(..., description="摄入任务 ID")
+    document_id: int
+    status: str = Field(..., description="任务状态：queued/running/succeeded/failed")
+    status_url: str = Field(..., description="轮询任务状态的地址")
+    stream_url: str = Field(..., description="订阅任务进度（SSE）的地址")
+
+
+class KnowledgeIngestProgress(BaseModel):
+    extracted: int = Field(0, description="已提取的字符数")
+    split: int = Field(0, description="已切分的块数")
+    embedded: int = Field(0, description="已编码的块数")
+    persisted: int = Field(0, description="已写入的块数")
+
+    model_config = {"from_attributes": True}
+
+
+class KnowledgeIngestJobRead(BaseModel):
+    job_id: str
+    document_id: int
+    source: str = Field(..., description="摄入来源：content/upload")
+    status: str
+    progress: KnowledgeIngestProgress
+    chunks: Optional[int] = Field(None, description="成功后生成的块数")
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
 class KnowledgeDocumentUpdate(KnowledgeDocumentBase):
     """文档元数据更新（全部字段可选）"""
     pass
@@ -64,6 +95,10 @@ class KnowledgeSearchRequest(BaseModel):
     use_bm25: bool = Field(
         True, description="是否使用 BM25 关键词检索（false 时使用向量检索）"
     )
+    document_ids: Optional[List[int]] = Field(None, description="仅检索这些文档 ID 下的知识块")
+    tags: Optional[List[str]] = Field(None, description="仅检索包含任一标签的文档")
+    languages: Optional[List[str]] = Field(None, description="仅检索这些语言的知识块")
+    source_types: Optional[List[str]] = Field(None, description="仅检索这些来源类型的文档")
 
 
 class KnowledgeSearchResult(BaseModel):
@@ -0,0 +1,167 @@
+"""
+知识库任务定义
+
+- 维护任务（向量索引重建）：参数的 UI 元信息约定与 app/modules/tasks/task.py 保持一致
+- 摄入任务：由知识库接口投递到 kb_ingest 队列，进度写入 Redis
+"""
+from __future__ import annotations
+
+import logging
+from typing import Annotated, Any, Dict, Literal, Optional
+
+from starlette.datastructures import UploadFile
+from taskiq import Context, TaskiqDepends
+
+from app.broker import broker
+from app.infrastructure.database.postgres_base import AsyncSessionLocal, engine
+from app.infrastructure.dynamic_settings import get_dynamic_settings_service
+from app.infrastructure.tasks.exec_record_decorators import execution_handler
+from app.infrastructure.tasks.task_registry_decorators import task
+from app.infrastructure.utils.common import get_current_time
+from app.modules.knowledge_base import models
+from app.modules.knowledge_base.index_maintenance import rebuild_embedding_index
+from app.modules.knowledge_base.ingest_jobs import (
+    IngestJobState,
+    IngestProgress,
+    discard_spool,
+    get_ingest_job_tracker,
+)
+from app.modules.knowledge_base.ingestion import ingest_document_content, ingest_document_file
+
+logger = logging.getLogger(__name__)
+
+KB_MAINTENANCE_QUEUE = "kb_maintenance"
+KB_INGEST_QUEUE = "kb_ingest"
+
+
+@task("KB_REBUILD_VECTOR_INDEX", queue=KB_MAINTENANCE_QUEUE)
+@broker.task(
+    task_name="rebuild_knowledge_vector_index",
+    queue=KB_MAINTENANCE_QUEUE,
+    retry_on_error=False,
+)
+@execution_handler
+async def rebuild_knowledge_vector_index(
+    config_id: Annotated[Optional[int], {"exclude_from_ui": True}] = None,
+    index_type: Annotated[
+        Literal["hnsw", "ivfflat"],
+        {
+            "label": "索引类型",
+            "description": "重建为 HNSW（召回/延迟更稳定）或 IVFFlat（构建更快、内存更省）",
+            "example": "hnsw",
+        },
+    ] = "hnsw",
+    lists: Annotated[
+        Optional[int],
+        {
+            "ui_hint": "number",
+            "label": "IVFFlat lists",
+            "description": "留空时按当前行数自动计算（≤100 万行取 rows/1000，否则取 sqrt(rows)）",
+            "min": 1,
+            "max": 100000,
+            "step": 1,
+        },
+    ] = None,
+    update_probes: Annotated[
+        bool,
+        {
+            "ui_hint": "boolean",
+            "label": "同步更新 probes",
+            "description": "IVFFlat 重建后将动态配置 RAG_IVFFLAT_PROBES 设为 sqrt(lists)",
+            "example": True,
+        },
+    ] = True,
+    context: Annotated[Context, {"exclude_from_ui": True}] = TaskiqDepends(),
+) -> Dict[str, Any]:
+    """按当前数据规模在线重建知识块向量索引，并可选地重新调优 ivfflat.probes。"""
+    logger.info(f"开始重建知识库向量索引: index_type={index_type}, lists={lists}")
+
+    result = await rebuild_embedding_index(engine, index_type=index_type, lists=lists)
+
+    probes_updated = False
+    if update_probes and result.probes is not None:
+        await get_dynamic_settings_service().update({"RAG_IVFFLAT_PROBES": result.probes})
+        probes_updated = True
+
+    summary = {
+        "config_id": config_id,
+        "index_type": result.index_type,
+        "row_count": result.row_count,
+        "lists": result.lists,
+        "probes": result.probes,
+        "probes_updated": probes_updated,
+        "m": result.m,
+        "ef_construction": result.ef_construction,
+        "timestamp": get_current_time().isoformat(),
+    }
+    logger.info(f"知识库向量索引重建完成: {summary}")
+    return summary
+
+
+@broker.task(
+    task_name="ingest_knowledge_document",
+    queue=KB_INGEST_QUEUE,
+    retry_on_error=False,
+)
+async def ingest_knowledge_document(
+    job_id: str,
+    document_id: int,
+    *,
+    overwrite: bool = False,
+    content: Optional[str] = None,
+    spool_path: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> Dict[str, Any]:
+    """在 kb_ingest worker 上执行文档摄入，并把进度发布到 Redis。
+
+    ``content`` 与 ``spool_path`` 二选一：前者为 API 直接提交的文本，后者为 API 暂存的上传文件。
+    """
+    tracker = get_ingest_job_tracker()
+    state = await tracker.get(job_id)
+    if state is None:
+        # 状态已过期或写入失败时重建快照，保证后续进度仍可查询
+        state = IngestJobState(
+            job_id=job_id,
+            document_id=document_id,
+            source="upload" if spool_path else "content",
+        )
+    await tracker.update(state, status="running")
+
+    async def _on_progress(progress: IngestProgress) -> None:
+        state.progress = progress
+        await tracker.update(state)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            document = await db.get(models.KnowledgeDocument, document_id)
+            if document is None:
+                raise LookupError("document_not_found")
+
+            if spool_path is not None:
+                with open(spool_path, "rb") as handle:
+                    upload = UploadFile(file=handle, filename=filename)
+                    chunks = await ingest_document_file(
+                        db,
+                        upload,
+                        document=document,
+                        overwrite=overwrite,
+                        on_progress=_on_progress,
+                    )
+            else:
+                chunks = await ingest_document_content(
+                    db,
+                    content or "",
+                    document=document,
+                    overwrite=overwrite,
+                    on_progress=_on_progress,
+                )
+    except Exception as exc:
+        logger.exception(f"知识库摄入任务失败: job_id={job_id}, document_id={document_id}")
+        await tracker.update(state, status="failed", error=str(exc) or exc.__class__.__name__)
+        return {"job_id": job_id, "document_id": document_id, "status": "failed"}
+    finally:
+        discard_spool(spool_path)
+
+    await tracker.update(state, status="succeeded", chunks=chunks)
+    logger.info(f"知识库摄入任务完成: job_id={job_id}, document_id={document_id}, chunks={chunks}")
+    return {"job_id": job_id, "document_id": document_id, "status": "succeeded", "chunks": chunks}
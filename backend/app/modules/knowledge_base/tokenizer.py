@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 import logging
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Sequence
 
 from app.core.config import settings
 from .language import detect_language_meta
@@ -13,12 +13,26 @@ from spacy.language import Language
 logger = logging.getLogger(__name__)
 
 
-def _should_use_spacy(text: str, language: str | None) -> bool:
-    """判断是否应使用 spaCy 进行分词"""
+# 只需要分词结果，加载后禁用这些组件（分词由 tokenizer 完成，不属于流水线组件）
+_UNUSED_PIPES = ("tok2vec", "tagger", "morphologizer", "parser", "attribute_ruler", "lemmatizer", "ner", "senter")
+
+
+def _is_cjk_language(language: str | None) -> bool:
+    lang = (language or "").lower()
+    return lang.startswith("zh") or lang.startswith("ja")
+
+
+def _should_use_spacy(text: str, language: str | None, *, detect: bool = True) -> bool:
+    """判断是否应使用 spaCy 进行分词
+
+    ``detect=False`` 时直接信任调用方给出的语言（例如摄入时已检测过），不再重复检测。
+    """
     lang = (language or "").lower()
     # 如果语言是中文或日文，则使用 spaCy
-    if lang.startswith("zh") or lang.startswith("ja"):
+    if _is_cjk_language(lang):
         return True
+    if not detect and lang:
+        return False
     # 检测文本元数据，获取语言信息
     meta = detect_language_meta(text, default=lang or "en")
     candidate = (meta.get("language") or "").lower()
@@ -39,7 +53,7 @@ def _load_zh_pipeline() -> Optional[Language]:
     try:
         logger.info("Loading spaCy pipeline %s for Chinese tokenization", model_name)
         # 加载指定的 spaCy 模型
-        return spacy.load(model_name)
+        pipeline = spacy.load(model_name)
     except OSError as exc:
         logger.warning(
             "spaCy model %s not available: %s; tokenization will fall back to raw text",
@@ -47,6 +61,11 @@ def _load_zh_pipeline() -> Optional[Language]:
             exc,
         )
         return None
+    # 禁用标注/句法/实体等组件，只保留分词
+    unused = [name for name in pipeline.pipe_names if name in _UNUSED_PIPES]
+    if unused:
+        pipeline.select_pipes(disable=unused)
+    return pipeline
 
 
 def _iter_tokens(doc: "Language" | None, text: str) -> Iterable[str]:
@@ -59,14 +78,17 @@ def _iter_tokens(doc: "Language" | None, text: str) -> Iterable[str]:
     return (token.text.strip() for token in parsed if token.text.strip())
 
 
-def tokenize_for_search(text: str, language: str | None = None) -> str:
-    """将文本分词成一个用空格分隔的字符串，适用于 PostgreSQL 的 simple config"""
+def tokenize_for_search(text: str, language: str | None = None, *, detect: bool = True) -> str:
+    """将文本分词成一个用空格分隔的字符串，适用于 PostgreSQL 的 simple config
+
+    ``detect=False`` 表示 ``language`` 已由调用方检测过（如摄入/编辑块），不再重复检测。
+    """
     text = (text or "").strip()
     if not text:
         return ""
 
     # 判断是否需要使用 spaCy
-    if _should_use_spacy(text, language):
+    if _should_use_spacy(text, language, detect=detect or not language):
         try:
             # 加载 spaCy pipeline
             pipeline = _load_zh_pipeline()
@@ -79,4 +101,62 @@ def tokenize_for_search(text: str, language: str | None = None) -> str:
             logger.warning("spaCy tokenization failed, falling back to raw text: %s", exc)
 
     # 如果不使用 spaCy，则按空格分割文本并转换为小写
+    return _whitespace_tokens(text)
+
+
+def _whitespace_tokens(text: str) -> str:
     return " ".join(text.lower().split())
+
+
+def _pipe_tokens(texts: list[str]) -> list[list[str]]:
+    """用 ``nlp.pipe`` 批量分词；流水线不可用或失败时返回空结果（调用方回退为原文）。"""
+    try:
+        pipeline = _load_zh_pipeline()
+        if pipeline is None:
+            return [[] for _ in texts]
+        docs = pipeline.pipe(
+            texts,
+            batch_size=max(1, settings.SPACY_PIPE_BATCH_SIZE),
+            n_process=max(1, settings.SPACY_PIPE_N_PROCESS),
+        )
+        return [[token.text.strip() for token in doc if token.text.strip()] for doc in docs]
+    except Exception as exc:  # pragma: no cover - defensive fallback
+        logger.warning("spaCy batch tokenization failed, falling back to raw text: %s", exc)
+        return [[] for _ in texts]
+
+
+def tokenize_many_for_search(
+    texts: Sequence[str],
+    languages: Sequence[str | None] | None = None,
+) -> list[str]:
+    """批量版 :func:`tokenize_for_search`，结果与逐条调用一致。
+
+    需要 spaCy 的文本通过一次 ``nlp.pipe`` 批量处理（``SPACY_PIPE_BATCH_SIZE`` /
+    ``SPACY_PIPE_N_PROCESS``）；给出了语言的文本直接按该语言判断，不再重复检测。
+    """
+    langs = list(languages) if languages is not None else [None] * len(texts)
+    results: list[str] = []
+    spacy_positions: list[int] = []
+    spacy_texts: list[str] = []
+    for position, (raw, language) in enumerate(zip(texts, langs)):
+        text = (raw or "").strip()
+        results.append("")
+        if not text:
+            continue
+        if _should_use_spacy(text, language, detect=not language):
+            spacy_positions.append(position)
+            spacy_texts.append(text)
+        else:
+            results[position] = _whitespace_tokens(text)
+
+    if spacy_texts:
+        for position, text, tokens in zip(spacy_positions, spacy_texts, _pipe_tokens(spacy_texts)):
+            results[position] = " ".join(tokens) if tokens else _whitespace_tokens(text)
+
+    return results
+
+
+@lru_cache(maxsize=max(0, settings.QUERY_TOKEN_CACHE_SIZE))
+def tokenize_query_for_search(query: str, language: str | None = None) -> str:
+    """查询侧分词，带进程内 LRU 缓存（热门查询与多查询检索中重复的查询只分词一次）。"""
+    return tokenize_for_search(query, language)
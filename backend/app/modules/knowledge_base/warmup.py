@@ -0,0 +1,151 @@
+"""Model warm-up at process startup.
+进程启动时预加载嵌入模型、spaCy 流水线与 tiktoken 编码并做一次试编码，
+避免首个聊天请求或摄入任务承担数秒的冷启动；进度供 ``/ready`` 就绪检查读取。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STATUSES = ("pending", "running", "ready", "skipped", "failed")
+
+
+@dataclass(slots=True)
+class WarmupStep:
+    """单个预热步骤的状态。"""
+
+    name: str
+    required: bool = False
+    status: str = "pending"
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class WarmupState:
+    """一次预热流程的整体状态。
+
+    必需步骤（嵌入模型）全部完成后即视为就绪；可选步骤失败只记录错误，
+    对应功能会在首次使用时按原有逻辑回退。
+    """
+
+    steps: list[WarmupStep] = field(default_factory=list)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and all(
+            step.status in ("ready", "skipped") for step in self.steps if step.required
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": [asdict(step) for step in self.steps],
+        }
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _warm_embedder() -> bool:
+    from .embeddings import get_embedder
+
+    # 试编码一次，触发权重加载与推理图/线程池的初始化
+    get_embedder().encode(["warm-up"], normalize_embeddings=True)
+    return True
+
+
+def _warm_spacy() -> bool:
+    from .tokenizer import _load_zh_pipeline
+
+    pipeline = _load_zh_pipeline()
+    if pipeline is None:
+        return False
+    pipeline("预热")
+    return True
+
+
+def _warm_tiktoken() -> bool:
+    from .config import build_splitter_config
+    from .ingest_splitter import DEFAULT_ENCODING, get_text_splitter
+
+    config = build_splitter_config(None)
+    splitter = get_text_splitter(DEFAULT_ENCODING, config.chunk_size, config.chunk_overlap)
+    splitter.split_text("warm-up")
+    return True
+
+
+# (步骤名, 是否必需, 执行函数)；执行函数返回 False 表示依赖未配置而跳过
+_WARMUP_STEPS: tuple[tuple[str, bool, Callable[[], bool]], ...] = (
+    ("embedder", True, _warm_embedder),
+    ("spacy", False, _warm_spacy),
+    ("tiktoken", False, _warm_tiktoken),
+)
+
+_state = WarmupState(steps=[WarmupStep(name=name, required=required) for name, required, _ in _WARMUP_STEPS])
+
+
+def get_warmup_state() -> WarmupState:
+    """返回当前进程的预热状态。"""
+    return _state
+
+
+async def warm_up_models() -> WarmupState:
+    """依次执行各预热步骤（在线程池中运行，不阻塞事件循环）。
+
+    ``MODEL_WARMUP_ENABLED`` 关闭时所有步骤记为 skipped，进程立即就绪。
+    """
+    state = _state
+    state.started_at = _now_iso()
+    state.finished_at = None
+    for step, (_, _, runner) in zip(state.steps, _WARMUP_STEPS):
+        step.error = None
+        step.duration_ms = None
+        if not settings.MODEL_WARMUP_ENABLED:
+            step.status = "skipped"
+            continue
+        step.status = "running"
+        started = time.perf_counter()
+        try:
+            loaded = await run_in_threadpool(runner)
+        except Exception as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            step.status = "failed"
+            step.error = str(exc)
+            logger.warning("Warm-up step %s failed: %s", step.name, exc)
+        else:
+            step.status = "ready" if loaded else "skipped"
+        step.duration_ms = round((time.perf_counter() - started) * 1000.0, 1)
+        logger.info("Warm-up step %s %s in %.1f ms", step.name, step.status, step.duration_ms)
+    state.finished_at = _now_iso()
+    return state
+
+
+__all__ = [
+    "WARMUP_STATUSES",
+    "WarmupState",
+    "WarmupStep",
+    "get_warmup_state",
+    "warm_up_models",
+]
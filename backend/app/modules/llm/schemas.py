@@ -70,6 +70,7 @@ class ConversationMessageCreate(BaseModel):
     temperature: Optional[float] = None
     system_prompt_override: Optional[str] = None
     top_k: Optional[int] = Field(default=None, ge=1, le=50)
+    document_id: Optional[int] = Field(default=None, ge=1, description="仅在该文档内检索知识块")
 
     @field_validator("temperature")
     def validate_temperature(cls, value: Optional[float]) -> Optional[float]:
@@ -3,14 +3,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Iterable, List, Mapping, Tuple, TypeVar
+from typing import Any, Iterable, List, Mapping, Sequence, Tuple, TypeVar
 from uuid import UUID
 
 from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.modules.knowledge_base.context_assembly import assemble_passages
 from app.modules.knowledge_base.language import detect_language
+from app.modules.knowledge_base.repository import KnowledgeChunkRow
 from app.modules.knowledge_base.retrieval import RetrievedChunk
 from app.modules.llm import repository
 
@@ -35,34 +37,37 @@ def _normalize_lang(text: str) -> str:
 def _build_context(
     similar: Iterable[RetrievedChunk],
     lang: str,
+    neighbors: Sequence[KnowledgeChunkRow] = (),
 ) -> str:
+    """Format retrieved evidence, merging adjacent chunks of the same document.
+
+    同一文档中相邻的命中块（及 ``neighbors`` 中补齐的相邻块）合并为一段并去除分块重叠，
+    段首列出其中所有命中块的 [CITEx]，编号与引用列表（按命中顺序）保持一致。
+    """
     max_items = max(1, settings.RAG_TOP_K)
+    hits = list(similar or [])[:max_items]
     entries: List[str] = []
 
-    for idx, item in enumerate(similar or [], start=1):
-        if idx > max_items:
-            break
-        chunk = item.chunk
-        content = (chunk.content or "").strip()
+    for passage in assemble_passages(hits, neighbors):
+        content = passage.content
         if not content:
             continue
 
         meta_parts: List[str] = []
-        doc = getattr(chunk, "document", None)
+        doc = passage.document
         if doc and getattr(doc, "title", None):
             meta_parts.append(str(doc.title))
         if doc and getattr(doc, "source_ref", None):
             meta_parts.append(str(doc.source_ref))
-        if chunk.chunk_index is not None:
-            meta_parts.append(f"chunk #{chunk.chunk_index}")
-        meta_parts.append(f"sim={item.similarity:.2f}")
+        if passage.start_index is not None:
+            if passage.end_index is not None and passage.end_index != passage.start_index:
+                meta_parts.append(f"chunks #{passage.start_index}-#{passage.end_index}")
+            else:
+                meta_parts.append(f"chunk #{passage.start_index}")
+        meta_parts.append(f"sim={passage.similarity:.2f}")
         header = " | ".join(meta_parts)
-        cite_key = f"CITE{idx}"
-        entry = f"[{cite_key}] {header}\n{content}"
-
-        entries.append(entry)
-        if idx >= max_items:
-            break
+        cite_keys = "".join(f"[CITE{position}]" for position in passage.cite_positions)
+        entries.append(f"{cite_keys} {header}\n{content}")
 
     return "\n\n".join(entries)
 
@@ -127,13 +132,14 @@ def _localized_prompts(lang: str) -> PromptBundle:
 def _prepare_system_and_user(
     user_text: str,
     similar: Iterable[RetrievedChunk],
+    neighbors: Sequence[KnowledgeChunkRow] = (),
 ) -> Tuple[str, str]:
     """Build localized prompts together with formatted evidence and fallbacks."""
 
     lang = _normalize_lang(user_text)
     bundle = _localized_prompts(lang)
     evidence_list = list(similar or [])
-    context = _build_context(evidence_list, lang) if evidence_list else ""
+    context = _build_context(evidence_list, lang, neighbors) if evidence_list else ""
 
     if context:
         final_user = bundle.context_template.format(
@@ -148,10 +154,12 @@ def _prepare_system_and_user(
 async def prepare_system_and_user(
     user_text: str,
     similar: Iterable[RetrievedChunk],
+    *,
+    neighbors: Sequence[KnowledgeChunkRow] = (),
 ) -> Tuple[str, str]:
     """Async wrapper for `_prepare_system_and_user`."""
 
-    return await run_in_threadpool(_prepare_system_and_user, user_text, similar)
+    return await run_in_threadpool(_prepare_system_and_user, user_text, similar, neighbors)
 
 
 async def delete_conversation(
@@ -33,7 +33,9 @@ from app.modules.llm.repository import (
 from app.modules.llm.service import prepare_system_and_user
 from app.modules.llm.intent_classifier import RouterDecision
 from app.modules.llm.conversation_metadata import generate_conversation_metadata
-from app.modules.knowledge_base.retrieval import hybrid_search
+from app.modules.knowledge_base.config import build_context_config
+from app.modules.knowledge_base.context_assembly import fetch_neighbor_chunks
+from app.modules.knowledge_base.retrieval import RetrievalFilters, hybrid_search, rerank_chunks
 from app.modules.llm.strategy import StrategyContext, resolve_rag_parameters
 
 logger = logging.getLogger(__name__)
@@ -75,6 +77,11 @@ def _build_citations(similar: list[Any]) -> list[dict[str, Any]]:
                     if getattr(item, "bm25_score", None) is not None
                     else None
                 ),
+                "rerank_score": (
+                    round(float(item.rerank_score), 4)
+                    if getattr(item, "rerank_score", None) is not None
+                    else None
+                ),
                 "retrieval_source": getattr(item, "retrieval_source", None),
                 "content": _compress_snippet(content),
             }
@@ -236,6 +243,7 @@ async def process_chat_message(
     temperature: Optional[float] = 0.7,
     system_prompt_override: Optional[str] = None,
     top_k: Optional[int] = settings.RAG_TOP_K,
+    document_id: Optional[int] = None,
 ) -> None:
     request_uuid = UUID(request_id)
     conversation_uuid = UUID(conversation_id)
@@ -329,6 +337,7 @@ async def process_chat_message(
         requested_top_k = top_k
         strategy_ctx = StrategyContext(
             top_k_request=requested_top_k,
+            document_id=document_id,
             channel="task",
             user_role=None,
         )
@@ -444,6 +453,11 @@ async def process_chat_message(
                 db,
                 effective_query,
                 top_k_value,
+                filters=(
+                    RetrievalFilters.build(document_ids=[document_id])
+                    if document_id is not None
+                    else None
+                ),
             )
         except Exception:
             logger.exception(
@@ -452,6 +466,34 @@ async def process_chat_message(
             )
             similar = []
 
+        if similar:
+            try:
+                similar = await rerank_chunks(
+                    effective_query,
+                    similar,
+                    config_map=base_config,
+                )
+            except Exception:
+                logger.exception(
+                    "RAG rerank failed; using fused ranking",
+                    extra={"conversation_id": conversation_id, "request_id": request_id},
+                )
+
+        neighbors = []
+        context_config = build_context_config(base_config)
+        if similar and context_config.neighbor_window > 0:
+            try:
+                neighbors = await fetch_neighbor_chunks(
+                    db,
+                    similar,
+                    window=context_config.neighbor_window,
+                )
+            except Exception:
+                logger.exception(
+                    "RAG neighbor fetch failed; using retrieved chunks only",
+                    extra={"conversation_id": conversation_id, "request_id": request_id},
+                )
+
         citations_payload = _build_citations(similar)
         await _publish_event(
             redis_client,
@@ -472,6 +514,7 @@ async def process_chat_message(
         base_system_prompt, wrapped_user_text = await prepare_system_and_user(
             content,
             similar,
+            neighbors=neighbors,
         )
 
         merged_system_prompt = _merge_system_prompts(
@@ -0,0 +1,126 @@
+"""Unit tests for the in-process Prometheus metrics registry."""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+from app.infrastructure.metrics.registry import MetricsRegistry  # noqa: E402
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "Stage latency.", ("stage",), buckets=(0.1, 1.0))
+
+    histogram.observe(0.05, stage="embed")
+    histogram.observe(0.5, stage="embed")
+    histogram.observe(3.0, stage="embed")
+
+    cumulative, total, count = histogram.snapshot(stage="embed")
+    assert cumulative == [1, 2, 3]
+    assert count == 3
+    assert total == pytest.approx(3.55)
+
+    text = registry.render()
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="embed",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="embed",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="embed"} 3' in text
+
+
+def test_counter_and_gauges_are_exported():
+    registry = MetricsRegistry()
+    counter = registry.counter("lookups", "Cache lookups.", ("result",))
+    counter.inc(result="hit")
+    counter.inc(2, result="miss")
+    registry.register_gauges("cache", "Cache size.", lambda: {"cache_size": 4})
+
+    text = registry.render()
+
+    assert 'lookups_total{result="miss"} 2.0' in text
+    assert "cache_size 4.0" in text
+    assert registry.counter("lookups", "Cache lookups.", ("result",)) is counter
+
+
+def test_counter_collectors_are_exported_as_totals():
+    registry = MetricsRegistry()
+    registry.register_counters("cache", "Cache lookups.", lambda: {"cache_hits": 3, "cache_misses": 1})
+
+    text = registry.render()
+
+    assert "# TYPE cache_hits counter" in text
+    assert "cache_hits_total 3.0" in text
+    assert "cache_misses_total 1.0" in text
+    assert "cache_hits 3.0" not in text
+
+
+def test_render_sums_remote_families_with_local_series():
+    api = MetricsRegistry()
+    api.counter("lookups", "Cache lookups.", ("result",)).inc(result="hit")
+    worker = MetricsRegistry()
+    worker.counter("lookups", "Cache lookups.", ("result",)).inc(2, result="hit")
+    worker_histogram = worker.histogram("stage_seconds", "Stage latency.", ("stage",), buckets=(0.1, 1.0))
+    worker_histogram.observe(0.5, stage="embed")
+    # 远端快照经过 JSON 序列化
+    remote = json.loads(json.dumps(worker.collect()))
+
+    text = api.render(remote)
+
+    assert 'lookups_total{result="hit"} 3.0' in text
+    assert text.count("# TYPE lookups counter") == 1
+    assert 'stage_seconds_bucket{stage="embed",le="1.0"} 1' in text
+    assert 'stage_seconds_count{stage="embed"} 1' in text
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def ensure_connection(self) -> None:
+        return None
+
+    async def hset(self, name: str, mapping: dict) -> int:
+        self.hashes.setdefault(name, {}).update(mapping)
+        return len(mapping)
+
+    async def hgetall(self, name: str) -> dict:
+        return dict(self.hashes.get(name, {}))
+
+    async def hdel(self, name: str, *keys: str) -> int:
+        bucket = self.hashes.get(name, {})
+        return sum(bucket.pop(key, None) is not None for key in keys)
+
+
+def test_snapshot_store_exposes_worker_metrics_through_api_process(monkeypatch):
+    from app.infrastructure.metrics import aggregation
+
+    redis = _FakeRedis()
+    worker_registry = MetricsRegistry()
+    worker_registry.histogram("kb_retrieval_results", "Results.", ("operation",), buckets=(1, 10)).observe(
+        5, operation="hybrid_search"
+    )
+    worker = aggregation.MetricsSnapshotStore(redis, worker_registry, process_id="worker:1")
+    api = aggregation.MetricsSnapshotStore(redis, MetricsRegistry(), process_id="api:1")
+
+    assert asyncio.run(worker.publish())
+    text = asyncio.run(api.render())
+
+    assert 'kb_retrieval_results_count{operation="hybrid_search"} 1' in text
+
+    # 超过过期时间未刷新的快照不再导出，并从 Redis 中清理
+    now = time.time()
+    monkeypatch.setattr(aggregation.time, "time", lambda: now + 3600)
+    text = asyncio.run(api.render())
+
+    assert "kb_retrieval_results" not in text
+    assert redis.hashes[next(iter(redis.hashes))] == {}
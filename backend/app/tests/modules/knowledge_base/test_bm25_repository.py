@@ -12,4 +12,316 @@ async def test_search_by_bm25_empty_query_returns_empty() -> None:
 @pytest.mark.asyncio
 async def test_search_by_bm25_zero_limit_returns_empty() -> None:
     result = await crud_knowledge_base.search_by_bm25(None, "hello", 0)
-    assert result == []
\ No newline at end of file
+    assert result == []
+
+
+def test_projected_chunk_query_skips_heavy_columns() -> None:
+    from sqlalchemy.dialects import postgresql
+
+    from app.modules.knowledge_base.repository import _projected_chunks_stmt
+
+    compiled = str(_projected_chunks_stmt().compile(dialect=postgresql.dialect()))
+    selected = compiled.split(" FROM ", 1)[0]
+
+    assert "embedding" not in selected
+    assert "search_vector" not in selected
+    assert "LEFT OUTER JOIN knowledge_documents" in compiled
+
+
+def test_retrieval_filters_normalize_and_compile_into_where_clause() -> None:
+    from sqlalchemy.dialects import postgresql
+
+    from app.modules.knowledge_base.repository import (
+        RetrievalFilters,
+        _apply_retrieval_filters,
+        _projected_chunks_stmt,
+    )
+
+    filters = RetrievalFilters.build(document_ids=[3, 1, 3], tags=[" faq ", "faq"], languages=["EN"])
+    assert filters == RetrievalFilters.build(document_ids=[1, 3], tags=["faq"], languages=["en"])
+    assert RetrievalFilters.build().is_empty()
+
+    compiled = str(
+        _apply_retrieval_filters(_projected_chunks_stmt(), filters).compile(dialect=postgresql.dialect())
+    )
+    where = compiled.split("WHERE", 1)[1]
+
+    assert "knowledge_chunks.document_id IN" in where
+    assert "knowledge_chunks.language IN" in where
+    assert "knowledge_documents.tags ?|" in where
+    assert "source_type" not in where
+
+
+@pytest.mark.asyncio
+async def test_batched_searches_issue_a_single_statement() -> None:
+    import numpy as np
+    from sqlalchemy.dialects import postgresql
+
+    statements: list[str] = []
+
+    class _Result(list):
+        def scalar_one_or_none(self):
+            return None
+
+    class _Session:
+        async def execute(self, stmt, params=None):
+            if hasattr(stmt, "compile") and params is None:
+                statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return _Result()
+
+    session = _Session()
+    vector_rows = await crud_knowledge_base.search_by_vector_many(
+        session, [np.ones(4), np.zeros(4)], 5
+    )
+    bm25_rows = await crud_knowledge_base.search_by_bm25_many(
+        session, ["alpha", "beta"], 5, query_languages=["en", "en"]
+    )
+
+    assert vector_rows == [[], []]
+    assert bm25_rows == [[], []]
+    assert len(statements) == 2
+    assert "JOIN LATERAL" in statements[0]
+    assert "UNION ALL" in statements[1]
+
+
+def _fake_ann_session(scope_rows: int, *, ef_search: int = 40, pgvector: str = "0.8.0"):
+    """模拟带过滤的 ANN 查询：索引先取 ef_search 个候选再过滤，只有精确排序或 iterative scan 才能补足结果。"""
+    import re
+    from datetime import datetime
+    from types import SimpleNamespace
+
+    from sqlalchemy.dialects import postgresql
+
+    class _Session:
+        def __init__(self) -> None:
+            self.statements: list[str] = []
+            self.gucs: dict[str, str] = {}
+
+        async def execute(self, stmt, params=None):
+            if isinstance(stmt, str) or not hasattr(stmt, "compile"):
+                raise AssertionError("unexpected statement")
+            compiled = stmt.compile(dialect=postgresql.dialect())
+            sql = str(compiled)
+            self.statements.append(sql)
+            if "pg_extension" in sql:
+                return SimpleNamespace(scalar_one_or_none=lambda: pgvector)
+            if "pg_am" in sql:
+                return SimpleNamespace(scalar_one_or_none=lambda: "hnsw")
+            if "scoped_chunks" in sql:
+                return SimpleNamespace(scalar_one=lambda: scope_rows)
+            if "set_config" in sql:
+                values = list(compiled.params.values())
+                self.gucs.update(zip(values[0::3], values[1::3]))
+                return None
+
+            order_by = sql.rsplit("ORDER BY", 1)[1]
+            uses_index = "+" not in order_by.split("LIMIT", 1)[0]
+            limit = compiled.params[re.search(r"LIMIT %\((\w+)\)s", sql).group(1)]
+            available = scope_rows
+            if uses_index and "hnsw.iterative_scan" not in self.gucs:
+                # 全局 ef_search 个候选中落在过滤范围内的只有少数几行
+                available = min(scope_rows, int(self.gucs.get("hnsw.ef_search", ef_search)) // 100)
+            return [
+                SimpleNamespace(
+                    id=index,
+                    document_id=7,
+                    chunk_index=index,
+                    content=f"chunk {index}",
+                    language="en",
+                    created_at=datetime(2026, 1, 1),
+                    document_title="doc",
+                    document_source_ref=None,
+                    distance=index / 100,
+                )
+                for index in range(min(limit, available))
+            ]
+
+    return _Session()
+
+
+@pytest.mark.asyncio
+async def test_document_scoped_vector_search_still_returns_k_rows(monkeypatch) -> None:
+    import numpy as np
+
+    from app.modules.knowledge_base.repository import RetrievalFilters, settings
+
+    monkeypatch.setattr(settings, "VECTOR_INDEX_TYPE", "hnsw")
+    session = _fake_ann_session(scope_rows=50)
+    hits = await crud_knowledge_base.search_by_vector(
+        session,
+        np.ones(4),
+        10,
+        hnsw_ef_search=40,
+        filters=RetrievalFilters.build(document_ids=[7]),
+    )
+
+    assert len(hits) == 10
+    assert [distance for _, distance in hits] == sorted(distance for _, distance in hits)
+    # 小范围的检索不走 ANN 索引，也无需查询 pgvector 版本
+    assert not any("pg_extension" in sql for sql in session.statements)
+
+
+@pytest.mark.asyncio
+async def test_large_document_scope_keeps_the_ann_index(monkeypatch) -> None:
+    import numpy as np
+
+    from app.modules.knowledge_base import repository
+    from app.modules.knowledge_base.repository import EXACT_SCOPE_MAX_CHUNKS, RetrievalFilters, settings
+
+    monkeypatch.setattr(settings, "VECTOR_INDEX_TYPE", "hnsw")
+    monkeypatch.setattr(repository, "_pgvector_version_cache", {})
+    session = _fake_ann_session(scope_rows=EXACT_SCOPE_MAX_CHUNKS + 1)
+    hits = await crud_knowledge_base.search_by_vector(
+        session,
+        np.ones(4),
+        10,
+        hnsw_ef_search=40,
+        filters=RetrievalFilters.build(document_ids=[7]),
+    )
+
+    assert len(hits) == 10
+    assert session.gucs["hnsw.iterative_scan"] == "strict_order"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("pgvector", "expected"),
+    [("0.8.0", {"hnsw.iterative_scan": "strict_order", "hnsw.ef_search": "40"}), ("0.7.4", {"hnsw.ef_search": "160"})],
+)
+async def test_tag_filtered_vector_search_widens_the_ann_scan(monkeypatch, pgvector, expected) -> None:
+    import numpy as np
+
+    from app.modules.knowledge_base import repository
+    from app.modules.knowledge_base.repository import RetrievalFilters, settings
+
+    monkeypatch.setattr(settings, "VECTOR_INDEX_TYPE", "hnsw")
+    monkeypatch.setattr(repository, "_pgvector_version_cache", {})
+    session = _fake_ann_session(scope_rows=50, pgvector=pgvector)
+    hits = await crud_knowledge_base.search_by_vector(
+        session,
+        np.ones(4),
+        10,
+        hnsw_ef_search=40,
+        filters=RetrievalFilters.build(tags=["faq"]),
+    )
+
+    assert session.gucs == expected
+    if pgvector == "0.8.0":
+        assert len(hits) == 10
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_streams_rows_through_copy() -> None:
+    from types import SimpleNamespace
+
+    import numpy as np
+
+    from app.modules.knowledge_base.repository import chunk_content_hash
+
+    class _Driver:
+        def __init__(self) -> None:
+            self.statements: list[str] = []
+            self.copied: list = []
+
+        def is_in_transaction(self) -> bool:
+            return True
+
+        async def execute(self, sql: str) -> None:
+            self.statements.append(" ".join(sql.split()))
+
+        async def copy_records_to_table(self, table, *, records, columns):
+            self.copied.append((table, list(records), tuple(columns)))
+
+    driver = _Driver()
+
+    class _Connection:
+        async def get_raw_connection(self):
+            return SimpleNamespace(driver_connection=driver)
+
+    class _Session:
+        def __init__(self) -> None:
+            self.flushed = False
+
+        async def connection(self):
+            return _Connection()
+
+        async def flush(self) -> None:
+            self.flushed = True
+
+        async def execute(self, stmt) -> None:  # pragma: no cover - COPY path must not INSERT
+            raise AssertionError("unexpected INSERT")
+
+    db = _Session()
+    embedding = np.array([0.5, 0.25], dtype=np.float32)
+    written = await crud_knowledge_base.bulk_create_document_chunks(
+        db, 7, [(0, "Hello world", embedding, "en")], commit=False, use_copy=True
+    )
+
+    assert written == 1 and db.flushed
+    table, records, columns = driver.copied[0]
+    assert table == "kb_chunk_stage"
+    assert columns[4] == "embedding" and records[0][4] == [0.5, 0.25]
+    assert records[0][:4] == (7, 0, "Hello world", chunk_content_hash("Hello world"))
+    assert driver.statements[0].startswith("CREATE TEMP TABLE IF NOT EXISTS kb_chunk_stage")
+    assert driver.statements[1].startswith("INSERT INTO knowledge_chunks")
+    assert driver.statements[2] == "TRUNCATE kb_chunk_stage"
+
+
+def test_bm25_scorer_switches_between_okapi_and_ts_rank_cd(monkeypatch) -> None:
+    from sqlalchemy.dialects import postgresql
+
+    from app.core.config import settings
+    from app.modules.knowledge_base.repository import _bm25_search_stmt
+
+    def _compile() -> str:
+        return str(_bm25_search_stmt("alpha beta", 5, min_rank=0.5).compile(dialect=postgresql.dialect()))
+
+    monkeypatch.setattr(settings, "BM25_SCORER", "okapi")
+    okapi = _compile()
+    assert "ts_rank_cd" not in okapi
+    # 先按 ts_rank 截断候选，再对截断后的候选展开词元并与查询词项统计连接一次
+    assert "ORDER BY ts_rank(knowledge_chunks.search_vector" in okapi
+    assert "JOIN LATERAL unnest(bm25_prefilter.search_vector) AS lexemes" in okapi
+    assert "FROM knowledge_term_stats" in okapi and "FROM knowledge_corpus_stats" in okapi
+    assert "bm25_terms.term = lexemes.lexeme" in okapi
+    assert "unnest(knowledge_chunks.search_vector)" not in okapi
+    # 得分按块 id 聚合后再连接回块正文，分组键不包含 content
+    group_by = okapi.split("GROUP BY bm25_prefilter.id", 1)[1].split(")", 1)[0]
+    assert "content" not in group_by and "bm25_prefilter.search_length" in group_by
+    assert "bm25_scores.id = knowledge_chunks.id" in okapi
+    # 候选按任一词元匹配，阈值与排序复用子查询中算好的得分
+    assert "to_tsquery(" in okapi and "replace(" in okapi
+    assert "bm25_candidates.bm25_score >=" in okapi
+    assert "ORDER BY bm25_candidates.bm25_score DESC" in okapi
+
+    monkeypatch.setattr(settings, "BM25_SCORER", "ts_rank_cd")
+    ranked = _compile()
+    assert "ts_rank_cd(knowledge_chunks.search_vector, plainto_tsquery(" in ranked
+    assert "knowledge_term_stats" not in ranked
+
+
+def test_okapi_candidate_cap_never_drops_below_limit(monkeypatch) -> None:
+    from sqlalchemy.dialects import postgresql
+
+    from app.core.config import settings
+    from app.modules.knowledge_base.repository import _bm25_search_stmt
+
+    monkeypatch.setattr(settings, "BM25_SCORER", "okapi")
+    monkeypatch.setattr(settings, "BM25_OKAPI_CANDIDATES", 10)
+
+    compiled = _bm25_search_stmt("alpha beta", 50).compile(dialect=postgresql.dialect())
+
+    assert sorted(value for value in compiled.params.values() if value in (10, 50)) == [50, 50]
+
+
+def test_bm25_min_rank_is_read_per_scorer(monkeypatch) -> None:
+    from app.core.config import settings
+    from app.modules.knowledge_base.config import build_bm25_config
+
+    config_map = {"BM25_MIN_RANK": 0.05, "BM25_OKAPI_MIN_RANK": 2.5}
+
+    monkeypatch.setattr(settings, "BM25_SCORER", "okapi")
+    assert build_bm25_config(config_map, requested_top_k=10).min_rank == 2.5
+
+    monkeypatch.setattr(settings, "BM25_SCORER", "ts_rank_cd")
+    assert build_bm25_config(config_map, requested_top_k=10).min_rank == 0.05
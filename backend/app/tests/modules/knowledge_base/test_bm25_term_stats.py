@@ -0,0 +1,97 @@
+"""Database tests for the sharded BM25 statistics trigger function.
+
+需要真实的 PostgreSQL：设置 ``TEST_DATABASE_URL``（asyncpg DSN）后运行，否则跳过。
+每个测试在独立的临时 schema 中创建统计表与 ``kb_apply_chunk_stats``，结束后删除。
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+_MIGRATION = (
+    Path(__file__).resolve().parents[4] / "alembic" / "versions" / "d4f6a8c0e2b1_shard_bm25_statistics.py"
+)
+
+_TABLES_DDL = """
+CREATE TABLE knowledge_term_stats (
+    term text NOT NULL,
+    shard smallint NOT NULL DEFAULT 0,
+    doc_freq bigint NOT NULL DEFAULT 0,
+    PRIMARY KEY (term, shard)
+);
+CREATE TABLE knowledge_corpus_stats (
+    id smallint PRIMARY KEY,
+    chunk_count bigint NOT NULL DEFAULT 0,
+    total_length bigint NOT NULL DEFAULT 0
+);
+"""
+
+
+def _load_migration():
+    # alembic/versions 不是包，按文件路径加载；upgrade/downgrade 中的 op 在导入时不会执行
+    spec = importlib.util.spec_from_file_location("shard_bm25_statistics", _MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _connect(schema: str):
+    import asyncpg
+
+    return await asyncpg.connect(TEST_DATABASE_URL, server_settings={"search_path": schema})
+
+
+@pytest.mark.asyncio
+async def test_chunk_added_and_removed_on_different_shards_leaves_no_term_rows() -> None:
+    migration = _load_migration()
+    schema = f"kb_stats_test_{uuid.uuid4().hex[:8]}"
+
+    admin = await _connect("public")
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    connections = []
+    try:
+        writer = await _connect(schema)
+        connections.append(writer)
+        await writer.execute(_TABLES_DDL)
+        await writer.execute(
+            "INSERT INTO knowledge_corpus_stats (id) "
+            f"SELECT g FROM generate_series(0, {migration.STATS_SHARDS - 1}) AS g"
+        )
+        await writer.execute(migration.APPLY_STATS_FUNCTION)
+
+        # 找一个落在不同分片上的会话执行删除
+        writer_shard = await writer.fetchval(f"SELECT pg_backend_pid() % {migration.STATS_SHARDS}")
+        remover = None
+        for _ in range(64):
+            candidate = await _connect(schema)
+            connections.append(candidate)
+            if await candidate.fetchval(f"SELECT pg_backend_pid() % {migration.STATS_SHARDS}") != writer_shard:
+                remover = candidate
+                break
+        assert remover is not None, "could not obtain a backend on another stats shard"
+
+        chunk = "ARRAY[to_tsvector('simple', 'alpha beta alpha')]"
+        await writer.execute(f"SELECT kb_apply_chunk_stats(1, {chunk}, 3)")
+        assert await writer.fetchval("SELECT count(*) FROM knowledge_term_stats") == 2
+
+        await remover.execute(f"SELECT kb_apply_chunk_stats(-1, {chunk}, 3)")
+
+        assert await writer.fetchval("SELECT count(*) FROM knowledge_term_stats") == 0
+        totals = await writer.fetchrow(
+            "SELECT sum(chunk_count) AS chunks, sum(total_length) AS length FROM knowledge_corpus_stats"
+        )
+        assert (totals["chunks"], totals["length"]) == (0, 0)
+    finally:
+        for connection in connections:
+            await connection.close()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
@@ -0,0 +1,108 @@
+"""Tests for neighbour-aware prompt context assembly."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import types
+from datetime import datetime
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+if "sentence_transformers" not in sys.modules:  # pragma: no cover - import shim
+    fake_sentence_transformers = types.ModuleType("sentence_transformers")
+    fake_sentence_transformers.SentenceTransformer = object
+    fake_sentence_transformers.CrossEncoder = object
+    sys.modules["sentence_transformers"] = fake_sentence_transformers
+
+from app.modules.knowledge_base import context_assembly  # noqa: E402
+from app.modules.knowledge_base.repository import KnowledgeChunkRow, KnowledgeDocumentRef  # noqa: E402
+from app.modules.knowledge_base.retrieval import RetrievedChunk  # noqa: E402
+
+OVERLAP = "shared overlap sentence that both chunks contain."
+
+
+def _row(chunk_id: int, document_id: int | None, index: int | None, content: str) -> KnowledgeChunkRow:
+    document = KnowledgeDocumentRef(id=document_id, title=f"Doc {document_id}", source_ref=None) if document_id else None
+    return KnowledgeChunkRow(
+        id=chunk_id,
+        document_id=document_id,
+        chunk_index=index,
+        content=content,
+        language="en",
+        created_at=datetime(2026, 1, 1),
+        document=document,
+    )
+
+
+def _hit(row: KnowledgeChunkRow, similarity: float) -> RetrievedChunk:
+    return RetrievedChunk(chunk=row, score=similarity, similarity=similarity, retrieval_source="vector")
+
+
+def test_overlap_is_stripped_between_adjacent_chunks() -> None:
+    left = "First chunk body. " + OVERLAP
+    right = OVERLAP + " Second chunk body."
+
+    assert context_assembly.overlap_length(left, right) == len(OVERLAP)
+    assert context_assembly.overlap_length("ends with a.", "a. starts") == 0
+    assert context_assembly.merge_chunk_texts([left, right]) == "First chunk body. " + OVERLAP + " Second chunk body."
+    assert context_assembly.merge_chunk_texts(["alpha", "beta"]) == "alpha\nbeta"
+
+
+def test_adjacent_hits_merge_and_neighbors_fill_gaps() -> None:
+    hits = [
+        _hit(_row(12, 1, 5, OVERLAP + " five"), 0.9),
+        _hit(_row(30, 2, 0, "other document"), 0.8),
+        _hit(_row(10, 1, 3, "three " + OVERLAP), 0.7),
+        _hit(_row(99, None, None, "loose chunk"), 0.6),
+        _hit(_row(40, 1, 9, "nine"), 0.5),
+    ]
+    # 第 4 块由相邻块补齐，使 3..5 连成一段；第 6 块与任何命中块都不相邻后被忽略
+    neighbors = [_row(11, 1, 4, OVERLAP), _row(50, 3, 1, "unrelated document")]
+
+    passages = context_assembly.assemble_passages(hits, neighbors)
+
+    assert [passage.cite_positions for passage in passages] == [[1, 3], [2], [4], [5]]
+    merged = passages[0]
+    assert (merged.start_index, merged.end_index) == (3, 5)
+    assert merged.chunk_ids == [10, 11, 12]
+    assert merged.content == "three " + OVERLAP + " five"
+    assert merged.similarity == 0.9
+
+
+def test_neighbor_fetch_issues_one_ranged_query(monkeypatch) -> None:
+    calls: list[list[tuple[int, int, int]]] = []
+
+    async def fake_ranges(db, ranges):
+        calls.append(list(ranges))
+        return [_row(10, 1, 3, "hit"), _row(11, 1, 4, "neighbour"), _row(9, 1, 2, "before")]
+
+    monkeypatch.setattr(context_assembly.crud_knowledge_base, "get_chunk_rows_in_ranges", fake_ranges)
+    hits = [_hit(_row(10, 1, 3, "hit"), 0.9), _hit(_row(13, 1, 5, "b"), 0.8), _hit(_row(20, 2, 0, "c"), 0.7)]
+
+    rows = asyncio.run(context_assembly.fetch_neighbor_chunks(None, hits, window=1))
+
+    assert calls == [[(1, 2, 6), (2, 0, 1)]]
+    assert [row.id for row in rows] == [11, 9]
+    assert context_assembly.neighbor_ranges(hits, 0) == []
+
+
+def test_build_context_cites_every_hit_in_a_merged_passage() -> None:
+    from app.modules.llm.service import _build_context
+
+    hits = [
+        _hit(_row(2, 7, 1, OVERLAP + " tail"), 0.91),
+        _hit(_row(1, 7, 0, "head " + OVERLAP), 0.55),
+    ]
+
+    context = _build_context(hits, "en")
+
+    assert context.startswith("[CITE1][CITE2] Doc 7 | chunks #0-#1 | sim=0.91\n")
+    assert context.count(OVERLAP) == 1
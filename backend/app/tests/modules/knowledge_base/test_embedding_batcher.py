@@ -0,0 +1,102 @@
+"""Tests for the embedding micro-batching broker."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import types
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+if "sentence_transformers" not in sys.modules:  # pragma: no cover - import shim
+    fake_sentence_transformers = types.ModuleType("sentence_transformers")
+    fake_sentence_transformers.SentenceTransformer = object
+    fake_sentence_transformers.CrossEncoder = object
+    sys.modules["sentence_transformers"] = fake_sentence_transformers
+
+from app.modules.knowledge_base.embedding_batcher import EmbeddingBatcher  # noqa: E402
+
+
+class _RecordingEncoder:
+    def __init__(self, fail: bool = False) -> None:
+        self.batches: list[list[str]] = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        # 每个文本编码为 [len(text), 序号]，便于校验结果与请求的对应关系
+        return np.array([[len(text), idx] for idx, text in enumerate(texts)], dtype=np.float32)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_share_one_forward_pass():
+    encoder = _RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=16, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.encode(["a"]),
+            batcher.encode(["bb", "ccc"]),
+            batcher.encode(["dddd"]),
+        )
+
+    first, second, third = _run(scenario())
+
+    assert encoder.batches == [["a", "bb", "ccc", "dddd"]]
+    assert first[:, 0].tolist() == [1]
+    assert second[:, 0].tolist() == [2, 3]
+    assert third[:, 0].tolist() == [4]
+
+
+def test_batches_are_capped_without_splitting_requests():
+    encoder = _RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=3, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.encode(["a", "b"]),
+            batcher.encode(["c", "d"]),
+            batcher.encode(["e"]),
+            batcher.encode(["f", "g", "h", "i"]),
+        )
+
+    results = _run(scenario())
+
+    assert encoder.batches == [["a", "b"], ["c", "d", "e"], ["f", "g", "h", "i"]]
+    assert [len(vectors) for vectors in results] == [2, 2, 1, 4]
+
+
+def test_encoder_errors_reach_every_waiting_caller():
+    batcher = EmbeddingBatcher(_RecordingEncoder(fail=True), max_batch_size=8, max_wait_ms=10)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.encode(["x"]),
+            batcher.encode(["y"]),
+            return_exceptions=True,
+        )
+
+    results = _run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    # 失败后批处理器仍可继续服务（且可跨事件循环复用）
+    with pytest.raises(RuntimeError):
+        _run(batcher.encode(["z"]))
@@ -0,0 +1,156 @@
+"""Unit tests for the two-tier query embedding cache."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Dict, List
+
+import numpy as np
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+from app.modules.knowledge_base.embedding_cache import (  # noqa: E402
+    QueryEmbeddingCache,
+    pack_vector,
+    unpack_vector,
+)
+
+
+class FakeRedis:
+    """Minimal async stub for the RedisBase string operations used by the cache."""
+
+    def __init__(self) -> None:
+        self.store: Dict[str, str] = {}
+        self.ttls: Dict[str, int | None] = {}
+        self.round_trips: List[str] = []
+
+    async def ensure_connection(self) -> None:
+        return None
+
+    async def mget(self, *keys: str):
+        self.round_trips.append("mget")
+        return [self.store.get(key) for key in keys]
+
+    async def set_many(self, mapping: Dict[str, str], ttl: int | None = None) -> bool:
+        self.round_trips.append("set_many")
+        for key, value in mapping.items():
+            self.store[key] = value
+            self.ttls[key] = ttl
+        return True
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _counting_encoder(calls: List[str]):
+    async def encode(query: str) -> np.ndarray:
+        calls.append(query)
+        return np.full(4, float(len(calls)), dtype=np.float32)
+
+    return encode
+
+
+def test_pack_roundtrip_preserves_float32_values():
+    vector = np.array([0.1, -0.5, 3.25], dtype=np.float32)
+
+    restored = unpack_vector(pack_vector(vector))
+
+    assert restored.dtype == np.float32
+    assert np.array_equal(restored, vector)
+    assert not restored.flags.writeable
+
+
+def test_local_hit_skips_encoder_and_normalizes_whitespace():
+    calls: List[str] = []
+    cache = QueryEmbeddingCache(None, model_name="m", max_entries=8)
+    encoder = _counting_encoder(calls)
+
+    first = _run(cache.get_or_encode("hello   world", encoder))
+    second = _run(cache.get_or_encode(" hello world ", encoder))
+
+    assert calls == ["hello   world"]
+    assert np.array_equal(first, second)
+    stats = cache.stats()
+    assert stats.misses == 1
+    assert stats.local_hits == 1
+
+
+def test_lru_evicts_oldest_entry_when_full():
+    calls: List[str] = []
+    cache = QueryEmbeddingCache(None, model_name="m", max_entries=2)
+    encoder = _counting_encoder(calls)
+
+    for query in ("a", "b", "c", "a"):
+        _run(cache.get_or_encode(query, encoder))
+
+    assert calls == ["a", "b", "c", "a"]
+    assert cache.stats().evictions == 2
+    assert cache.stats().size == 2
+
+
+def test_redis_tier_serves_other_processes():
+    redis = FakeRedis()
+    calls: List[str] = []
+    writer = QueryEmbeddingCache(redis, model_name="m", redis_ttl_seconds=120)
+    reader = QueryEmbeddingCache(redis, model_name="m")
+
+    encoded = _run(writer.get_or_encode("query", _counting_encoder(calls)))
+    restored = _run(reader.get_or_encode("query", _counting_encoder(calls)))
+
+    assert calls == ["query"]
+    assert np.array_equal(encoded, restored)
+    assert reader.stats().redis_hits == 1
+    assert list(redis.ttls.values()) == [120]
+
+
+def test_model_name_is_part_of_key():
+    cache_a = QueryEmbeddingCache(None, model_name="model-a")
+    cache_b = QueryEmbeddingCache(None, model_name="model-b")
+
+    assert cache_a.make_key("same") != cache_b.make_key("same")
+
+
+def test_get_or_encode_many_batches_only_missing_queries():
+    batches: List[List[str]] = []
+
+    async def batch_encoder(queries: List[str]) -> np.ndarray:
+        batches.append(list(queries))
+        return np.stack([np.full(4, float(len(q)), dtype=np.float32) for q in queries])
+
+    cache = QueryEmbeddingCache(None, model_name="m", max_entries=8)
+    _run(cache.get_or_encode_many(["bb"], batch_encoder))
+
+    vectors = _run(cache.get_or_encode_many(["a", "bb", "ccc"], batch_encoder))
+
+    assert batches == [["bb"], ["a", "ccc"]]
+    assert [float(vector[0]) for vector in vectors] == [1.0, 2.0, 3.0]
+    assert cache.stats().local_hits == 1
+
+
+def test_get_or_encode_many_uses_one_redis_round_trip_per_direction():
+    redis = FakeRedis()
+
+    async def batch_encoder(queries: List[str]) -> np.ndarray:
+        return np.stack([np.full(4, float(len(q)), dtype=np.float32) for q in queries])
+
+    writer = QueryEmbeddingCache(redis, model_name="m")
+    _run(writer.get_or_encode_many(["a", "bb"], batch_encoder))
+    assert redis.round_trips == ["mget", "set_many"]
+    assert len(redis.store) == 2
+
+    redis.round_trips.clear()
+    reader = QueryEmbeddingCache(redis, model_name="m")
+    vectors = _run(reader.get_or_encode_many(["a", "bb", "ccc"], batch_encoder))
+
+    assert redis.round_trips == ["mget", "set_many"]
+    assert [float(vector[0]) for vector in vectors] == [1.0, 2.0, 3.0]
+    assert reader.stats().redis_hits == 2
+    assert reader.stats().misses == 1
@@ -0,0 +1,163 @@
+"""Tests for the hybrid retrieval fusion and rerank stages."""
+
+from __future__ import annotations
+
+import os
+import sys
+import types
+
+import pytest
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+if "sentence_transformers" not in sys.modules:  # pragma: no cover - import shim
+    fake_sentence_transformers = types.ModuleType("sentence_transformers")
+    fake_sentence_transformers.SentenceTransformer = object
+    fake_sentence_transformers.CrossEncoder = object
+    sys.modules["sentence_transformers"] = fake_sentence_transformers
+
+from app.modules.knowledge_base.config import FusionConfig, build_fusion_config  # noqa: E402
+from app.modules.knowledge_base.retrieval import RetrievedChunk, _merge_candidates  # noqa: E402
+
+
+def _chunk(chunk_id: int) -> types.SimpleNamespace:
+    return types.SimpleNamespace(id=chunk_id)
+
+
+def _vector_hits(scores: dict[int, float]) -> dict[int, RetrievedChunk]:
+    return {
+        chunk_id: RetrievedChunk(
+            chunk=_chunk(chunk_id),
+            score=score,
+            similarity=score,
+            retrieval_source="vector",
+            vector_score=score,
+        )
+        for chunk_id, score in scores.items()
+    }
+
+
+def _ranked(items: list[RetrievedChunk]) -> list[int]:
+    return [item.chunk.id for item in sorted(items, key=lambda item: item.score, reverse=True)]
+
+
+def test_max_fusion_lets_single_weak_bm25_hit_win():
+    vector_hits = _vector_hits({1: 0.82, 2: 0.80})
+    bm25_hits = {3: (_chunk(3), 1.0, 0.06)}
+
+    merged = _merge_candidates(vector_hits, bm25_hits, FusionConfig("max", 60, 0.7))
+
+    assert _ranked(merged)[0] == 3
+
+
+def test_rrf_rewards_agreement_between_lists():
+    vector_hits = _vector_hits({1: 0.90, 2: 0.85, 3: 0.80})
+    bm25_hits = {
+        3: (_chunk(3), 1.0, 0.4),
+        4: (_chunk(4), 0.5, 0.2),
+    }
+
+    merged = _merge_candidates(vector_hits, bm25_hits, FusionConfig("rrf", 60, 0.7))
+    by_id = {item.chunk.id: item for item in merged}
+
+    assert _ranked(merged)[0] == 3
+    assert by_id[3].retrieval_source == "hybrid"
+    assert by_id[4].retrieval_source == "bm25"
+    assert all(0.0 < item.score <= 1.0 for item in merged)
+
+
+def test_weighted_fusion_is_convex_combination():
+    vector_hits = _vector_hits({1: 0.6})
+    bm25_hits = {1: (_chunk(1), 0.5, 0.3)}
+
+    merged = _merge_candidates(vector_hits, bm25_hits, FusionConfig("weighted", 60, 0.8))
+
+    assert merged[0].score == pytest.approx(0.8 * 0.6 + 0.2 * 0.5)
+
+
+def test_default_fusion_follows_configured_mode(monkeypatch):
+    from app.core.config import settings
+
+    def _scores(fusion: FusionConfig | None) -> list[float]:
+        # _merge_candidates 会修改传入的候选，每次使用新的输入
+        vector_hits = _vector_hits({1: 0.90, 2: 0.85, 3: 0.80})
+        bm25_hits = {3: (_chunk(3), 1.0, 0.4)}
+        return [item.score for item in _merge_candidates(vector_hits, bm25_hits, fusion)]
+
+    for mode in ("max", "rrf", "weighted"):
+        monkeypatch.setattr(settings, "RAG_FUSION_MODE", mode)
+        assert _scores(None) == _scores(build_fusion_config({}))
+
+
+def test_build_fusion_config_rejects_unknown_mode_and_clamps_weight():
+    config = build_fusion_config({"RAG_FUSION_MODE": "bogus", "RAG_FUSION_VECTOR_WEIGHT": 3})
+
+    assert config.mode in {"max", "rrf", "weighted"}
+    assert config.vector_weight == 1.0
+
+
+def test_rerank_truncates_to_top_n_by_cross_encoder_score(monkeypatch):
+    import asyncio
+
+    from app.modules.knowledge_base import retrieval
+
+    candidates = [
+        RetrievedChunk(
+            chunk=types.SimpleNamespace(id=idx, content=f"chunk {idx}"),
+            score=1.0 - idx / 10,
+            similarity=0.5,
+            retrieval_source="vector",
+        )
+        for idx in range(5)
+    ]
+    batches: list[int] = []
+
+    def fake_predict(pairs):
+        batches.append(len(pairs))
+        return [float(idx) / 10 for idx in range(len(pairs))]
+
+    monkeypatch.setattr(retrieval, "_predict_rerank_scores", fake_predict)
+    config_map = {"RAG_RERANK_ENABLED": True, "RAG_RERANK_TOP_N": 2, "RAG_RERANK_CANDIDATES": 4}
+
+    result = asyncio.run(retrieval.rerank_chunks("q", candidates, config_map=config_map))
+
+    assert batches == [4]
+    assert [item.chunk.id for item in result] == [3, 2]
+    assert result[0].rerank_score == pytest.approx(0.3)
+
+
+def test_hybrid_search_many_dedupes_queries_and_pools_best_score(monkeypatch):
+    import asyncio
+
+    from app.modules.knowledge_base import retrieval
+
+    seen: list[list[str]] = []
+
+    async def fake_settings():
+        return {"RAG_TOP_K": 3, "RAG_FUSION_MODE": "max"}
+
+    async def fake_vector_leg(queries, top_k, config_map, filters, db=None):
+        seen.append(list(queries))
+        return [_vector_hits({1: 0.9, 2: 0.3}), _vector_hits({2: 0.8})], 0.0, 0.0
+
+    async def fake_bm25_leg(queries, top_k, config_map, filters, db=None):
+        empty = retrieval.BM25SearchResult(matches=[], raw_hits=0, after_threshold=0)
+        return [empty, empty], 0.0
+
+    monkeypatch.setattr(retrieval, "_load_dynamic_settings", fake_settings)
+    monkeypatch.setattr(retrieval, "_vector_leg_many", fake_vector_leg)
+    monkeypatch.setattr(retrieval, "_bm25_leg_many", fake_bm25_leg)
+
+    result = asyncio.run(
+        retrieval.hybrid_search_many(None, ["alpha", " alpha ", "", "beta"], 3)
+    )
+
+    assert seen == [["alpha", "beta"]]
+    assert [item.chunk.id for item in result] == [1, 2]
+    assert result[1].score == pytest.approx(0.8)
@@ -0,0 +1,152 @@
+"""Tests for vector index sizing helpers."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+from app.modules.knowledge_base.index_maintenance import (  # noqa: E402
+    build_index_ddl,
+    recommended_ivfflat_lists,
+    recommended_ivfflat_probes,
+)
+
+
+@pytest.mark.parametrize(
+    ("rows", "expected"),
+    [(0, 1), (500, 1), (200_000, 200), (1_000_000, 1000), (5_000_000, 2236)],
+)
+def test_recommended_ivfflat_lists(rows: int, expected: int) -> None:
+    assert recommended_ivfflat_lists(rows) == expected
+
+
+def test_recommended_probes_is_sqrt_of_lists() -> None:
+    assert recommended_ivfflat_probes(2236) == 47
+
+
+def test_build_index_ddl_for_both_index_types() -> None:
+    hnsw = build_index_ddl("ix_tmp", "hnsw", m=24, ef_construction=128)
+    ivfflat = build_index_ddl("ix_tmp", "ivfflat", lists=400, concurrently=False)
+
+    assert "CONCURRENTLY ix_tmp" in hnsw
+    assert "USING hnsw (embedding vector_cosine_ops) WITH (m = 24, ef_construction = 128)" in hnsw
+    assert ivfflat.startswith("CREATE INDEX ix_tmp")
+    assert "WITH (lists = 400)" in ivfflat
+
+
+def test_build_index_ddl_rejects_unknown_type() -> None:
+    with pytest.raises(ValueError):
+        build_index_ddl("ix_tmp", "btree")
+
+
+def test_halfvec_storage_uses_halfvec_column_and_opclass(monkeypatch) -> None:
+    from sqlalchemy.dialects import postgresql
+
+    from app.modules.knowledge_base import models
+
+    monkeypatch.setattr(models.settings, "EMBEDDING_STORAGE", "halfvec")
+
+    column_type = models.embedding_column_type()
+    assert column_type.compile(dialect=postgresql.dialect()) == f"HALFVEC({models.settings.EMBEDDING_DIM})"
+    assert "USING hnsw (embedding halfvec_cosine_ops)" in build_index_ddl("ix", "hnsw")
+
+    monkeypatch.setattr(models.settings, "EMBEDDING_STORAGE", "bogus")
+    assert models.embedding_storage() == "vector"
+
+
+class _SearchSession:
+    """记录 set_config 语句，并按 ``catalog_index_type`` 应答索引类型的目录查询。"""
+
+    def __init__(self, catalog_index_type: str | None) -> None:
+        self.catalog_index_type = catalog_index_type
+        self.catalog_queries = 0
+        self.statements: list = []
+
+    async def execute(self, stmt, params=None):
+        from types import SimpleNamespace
+
+        from sqlalchemy.dialects import postgresql
+
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        if "pg_am" in str(compiled):
+            self.catalog_queries += 1
+            return SimpleNamespace(scalar_one_or_none=lambda: self.catalog_index_type)
+        self.statements.append(compiled)
+        return None
+
+    def gucs(self) -> list[str]:
+        return [value for compiled in self.statements for value in compiled.params.values() if "." in str(value)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("index_type", "expected"),
+    [("hnsw", ["hnsw.ef_search"]), ("ivfflat", ["ivfflat.probes"])],
+)
+async def test_vector_search_params_set_only_the_active_index_knob(monkeypatch, index_type, expected) -> None:
+    from app.modules.knowledge_base import index_maintenance
+    from app.modules.knowledge_base.repository import crud_knowledge_base, settings
+
+    monkeypatch.setattr(index_maintenance, "_active_index_type_cache", {})
+    # 查询期参数以目录中的实际索引类型为准，而不是静态配置
+    monkeypatch.setattr(settings, "VECTOR_INDEX_TYPE", "ivfflat" if index_type == "hnsw" else "hnsw")
+    session = _SearchSession(index_type)
+    await crud_knowledge_base.apply_vector_search_params(session, ivfflat_probes=10, hnsw_ef_search=100)
+    await crud_knowledge_base.apply_vector_search_params(session, ivfflat_probes=10, hnsw_ef_search=100)
+
+    assert session.catalog_queries == 1
+    assert len(session.statements) == 2
+    assert str(session.statements[0]).count("set_config(") == len(expected)
+    assert session.gucs() == expected * 2
+
+
+@pytest.mark.asyncio
+async def test_rebuild_to_ivfflat_switches_query_time_knob_to_probes(monkeypatch) -> None:
+    from types import SimpleNamespace
+
+    from app.modules.knowledge_base import index_maintenance
+    from app.modules.knowledge_base.repository import crud_knowledge_base, settings
+
+    class _Connection:
+        def __init__(self) -> None:
+            self.sql: list[str] = []
+
+        async def execution_options(self, **_options):
+            return self
+
+        async def execute(self, stmt):
+            self.sql.append(str(stmt))
+            return SimpleNamespace(scalar_one=lambda: 250_000)
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    connection = _Connection()
+    monkeypatch.setattr(index_maintenance, "_active_index_type_cache", {})
+    monkeypatch.setattr(settings, "VECTOR_INDEX_TYPE", "hnsw")
+    # 首次检索缓存下重建前的 hnsw
+    await crud_knowledge_base.apply_vector_search_params(_SearchSession("hnsw"), ivfflat_probes=10, hnsw_ef_search=100)
+
+    result = await index_maintenance.rebuild_embedding_index(
+        SimpleNamespace(connect=lambda: connection), index_type="ivfflat"
+    )
+    session = _SearchSession("ivfflat")
+    await crud_knowledge_base.apply_vector_search_params(
+        session, ivfflat_probes=result.probes, hnsw_ef_search=100
+    )
+
+    assert any("USING ivfflat" in sql for sql in connection.sql)
+    assert session.catalog_queries == 0
+    assert list(session.statements[0].params.values())[:2] == ["ivfflat.probes", str(result.probes)]
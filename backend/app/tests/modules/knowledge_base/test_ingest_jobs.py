@@ -0,0 +1,101 @@
+"""Tests for the Redis-backed ingestion job tracker."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+from app.infrastructure.redis.keyspace import redis_keys  # noqa: E402
+from app.modules.knowledge_base.ingest_jobs import IngestJobTracker  # noqa: E402
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, dict] = {}
+        self.ttls: dict[str, int | None] = {}
+        self.published: list[tuple[str, dict]] = []
+
+    async def ensure_connection(self) -> None:
+        return None
+
+    async def set_json(self, key: str, data, ttl=None) -> bool:
+        self.store[key] = json.loads(json.dumps(data))
+        self.ttls[key] = ttl
+        return True
+
+    async def get_json(self, key: str):
+        return self.store.get(key)
+
+    async def publish(self, channel: str, message: str) -> int:
+        self.published.append((channel, json.loads(message)))
+        return 1
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_progress_updates_are_stored_and_published():
+    redis = FakeRedis()
+    tracker = IngestJobTracker(redis, ttl_seconds=60)
+
+    state = _run(tracker.create(document_id=7, source="upload"))
+    state.progress.split = 10
+    state.progress.persisted = 4
+    _run(tracker.update(state, status="running"))
+    _run(tracker.update(state, status="succeeded", chunks=10))
+
+    loaded = _run(tracker.get(state.job_id))
+    assert loaded is not None
+    assert loaded.status == "succeeded"
+    assert loaded.chunks == 10
+    assert loaded.progress.persisted == 4
+    assert redis.ttls[redis_keys.knowledge.ingest_job(state.job_id)] == 60
+
+    channel = redis_keys.knowledge.ingest_events(state.job_id)
+    assert [event["status"] for ch, event in redis.published if ch == channel] == [
+        "queued",
+        "running",
+        "succeeded",
+    ]
+
+
+def test_unknown_status_is_rejected():
+    tracker = IngestJobTracker(FakeRedis())
+    state = _run(tracker.create(document_id=1, source="content"))
+
+    with pytest.raises(ValueError):
+        _run(tracker.update(state, status="paused"))
+
+
+def test_failed_job_discards_its_spool_file(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.modules.knowledge_base.ingest_jobs import discard_spool, spool_path_for
+
+    monkeypatch.setattr(settings, "INGEST_SPOOL_DIR", str(tmp_path / "spool"))
+    redis = FakeRedis()
+    tracker = IngestJobTracker(redis)
+    state = _run(tracker.create(document_id=3, source="upload"))
+    path = spool_path_for(state.job_id)
+    with open(path, "wb") as handle:
+        handle.write(b"partial upload")
+
+    discard_spool(path)
+    discard_spool(path)
+    discard_spool(None)
+    _run(tracker.update(state, status="failed", error="enqueue_failed: ConnectionError"))
+
+    assert not os.path.exists(path)
+    loaded = _run(tracker.get(state.job_id))
+    assert loaded is not None and loaded.status == "failed"
@@ -0,0 +1,84 @@
+"""Tests for sharded (multi-worker) chunk splitting."""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+from app.modules.knowledge_base import ingest_splitter  # noqa: E402
+from app.modules.knowledge_base.config import build_splitter_config  # noqa: E402
+from app.modules.knowledge_base.ingest_extractor import ExtractedElement  # noqa: E402
+
+
+def _fake_split_text(text: str, **_: int) -> list[str]:
+    words = text.split()
+    return [" ".join(words[i : i + 5]) for i in range(0, len(words), 5)]
+
+
+def test_parallel_split_matches_sequential_order(monkeypatch):
+    monkeypatch.setattr(ingest_splitter, "_split_text", _fake_split_text)
+    sections = [f"# Section {idx}\n\n" + " ".join(f"w{idx}_{n}" for n in range(12)) for idx in range(9)]
+    elements = [
+        ExtractedElement(text="\n\n".join(sections[:5]), metadata={"source": "a"}),
+        ExtractedElement(text="   ", metadata={}),
+        ExtractedElement(text="\n\n".join(sections[5:]), metadata={"source": "b"}),
+    ]
+
+    sequential = ingest_splitter.split_elements(elements)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        parallel = ingest_splitter.split_elements_parallel(elements, executor, workers=3)
+
+    assert len(sequential) > 9
+    assert [(c.content, c.metadata) for c in parallel] == [(c.content, c.metadata) for c in sequential]
+
+
+def test_parallel_split_stays_in_thread_for_single_worker(monkeypatch):
+    monkeypatch.setattr(ingest_splitter, "_split_text", _fake_split_text)
+
+    class _RejectingExecutor:
+        def map(self, *args, **kwargs):  # pragma: no cover - must not be used
+            raise AssertionError("executor should not be used")
+
+    elements = [ExtractedElement(text="# A\n\none two\n\n# B\n\nthree", metadata={})]
+    chunks = ingest_splitter.split_elements_parallel(elements, _RejectingExecutor(), workers=1)
+
+    expected = ingest_splitter.split_elements(elements)
+    assert [chunk.content for chunk in chunks] == [chunk.content for chunk in expected]
+
+
+def test_text_splitter_is_shared_per_parameter_set(monkeypatch):
+    built: list[tuple] = []
+
+    def fake_from_tiktoken_encoder(**kwargs):
+        built.append(tuple(sorted(kwargs.items())))
+        return object()
+
+    ingest_splitter.get_text_splitter.cache_clear()
+    monkeypatch.setattr(
+        ingest_splitter.RecursiveCharacterTextSplitter,
+        "from_tiktoken_encoder",
+        staticmethod(fake_from_tiktoken_encoder),
+    )
+    try:
+        first = ingest_splitter.get_text_splitter("cl100k_base", 500, 50)
+        assert ingest_splitter.get_text_splitter("cl100k_base", 500, 50) is first
+        assert ingest_splitter.get_text_splitter("cl100k_base", 800, 50) is not first
+        assert len(built) == 2
+    finally:
+        ingest_splitter.get_text_splitter.cache_clear()
+
+
+def test_splitter_config_keeps_overlap_below_chunk_size():
+    config = build_splitter_config({"INGEST_CHUNK_TOKENS": "300", "INGEST_CHUNK_OVERLAP": 1000})
+    assert (config.chunk_size, config.chunk_overlap) == (300, 150)
+
+    defaults = build_splitter_config(None)
+    assert (defaults.chunk_size, defaults.chunk_overlap) == (2000, 200)
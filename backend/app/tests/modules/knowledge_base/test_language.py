@@ -0,0 +1,34 @@
+"""Tests for batched language classification."""
+
+from __future__ import annotations
+
+from app.modules.knowledge_base.language import (
+    detect_language_meta,
+    detect_language_meta_many,
+)
+
+
+def test_batch_detection_matches_single_text_api() -> None:
+    texts = [
+        "Plain English paragraph about retrieval.",
+        "知识库检索与向量索引",
+        "これはテストです",
+        "```python\nprint('hi')\n```",
+        "if (a) { call(b); } else { call(c); } fn();",
+        "   ",
+        None,
+    ]
+
+    batch = detect_language_meta_many(texts, default="en")
+
+    assert batch == [detect_language_meta(text, default="en") for text in texts]
+    assert [meta["language"] for meta in batch] == ["en", "zh", "ja", "code", "code", "en", "en"]
+
+
+def test_batch_detection_only_samples_a_prefix() -> None:
+    late_cjk = "word " * 1000 + "中文"
+
+    assert detect_language_meta(late_cjk)["language"] == "zh"
+    assert detect_language_meta_many([late_cjk], sample_chars=128)[0]["language"] == "en"
+    assert detect_language_meta_many(["   中文" + "x" * 500], sample_chars=4)[0]["is_cjk"] is True
+    assert detect_language_meta_many([]) == []
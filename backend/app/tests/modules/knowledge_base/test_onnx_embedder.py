@@ -0,0 +1,61 @@
+"""Tests for the ONNX Runtime embedding backend (pooling and batching only)."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from app.modules.knowledge_base.onnx_embedder import OnnxEmbedder, l2_normalize, mean_pool
+
+
+def test_mean_pool_ignores_padding_tokens():
+    tokens = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]], dtype=np.float32)
+    mask = np.array([[1, 1, 0]])
+
+    pooled = mean_pool(tokens, mask)
+
+    assert pooled.tolist() == [[2.0, 3.0]]
+    assert np.allclose(np.linalg.norm(l2_normalize(pooled), axis=1), 1.0)
+
+
+class _FakeTokenizer:
+    def __call__(self, texts, **kwargs):
+        width = max(len(text) for text in texts)
+        ids = np.array([[len(text)] * width for text in texts], dtype=np.int64)
+        mask = np.array([[1] * len(text) + [0] * (width - len(text)) for text in texts], dtype=np.int64)
+        return {"input_ids": ids, "attention_mask": mask, "token_type_ids": np.zeros_like(ids)}
+
+
+class _FakeInput:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.feeds: list[dict] = []
+
+    def run(self, outputs, feeds):
+        self.feeds.append(feeds)
+        ids = feeds["input_ids"].astype(np.float32)
+        # 每个 token 的向量为 [文本长度, 1]
+        return [np.stack([ids, np.ones_like(ids)], axis=-1)]
+
+
+def test_encode_restores_input_order_and_filters_inputs():
+    embedder = OnnxEmbedder.__new__(OnnxEmbedder)
+    embedder.max_length = 16
+    embedder._tokenizer = _FakeTokenizer()
+    embedder._session = _FakeSession()
+    embedder._input_names = {"input_ids", "attention_mask"}
+
+    texts = ["a", "ccc", "bb", "dddd"]
+    vectors = embedder.encode(texts, batch_size=2)
+
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == [1.0, 3.0, 2.0, 4.0]
+    assert len(embedder._session.feeds) == 2
+    assert all(set(feeds) == {"input_ids", "attention_mask"} for feeds in embedder._session.feeds)
+
+    normalized = embedder.encode("bb", normalize_embeddings=True)
+    assert normalized.shape == (2,)
+    assert np.isclose(np.linalg.norm(normalized), 1.0)
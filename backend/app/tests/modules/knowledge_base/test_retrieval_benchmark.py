@@ -0,0 +1,73 @@
+"""Tests for the retrieval benchmark helpers (no database required)."""
+
+from __future__ import annotations
+
+import os
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+import asyncio  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from app.benchmarks import retrieval as bench  # noqa: E402
+
+
+def test_synthetic_corpus_is_reproducible_per_chunk() -> None:
+    corpus = bench.SyntheticCorpus(chunks=2500, dim=16, seed=3, words_per_chunk=12)
+    batches = list(corpus.iter_batches())
+
+    assert [start for start, _, _ in batches] == [0, 1000, 2000]
+    assert sum(len(texts) for _, texts, _ in batches) == 2500
+    text, vector = corpus.chunk(1234)
+    assert text == batches[1][1][234] and len(text.split()) == 12
+    np.testing.assert_allclose(vector, batches[1][2][234])
+    np.testing.assert_allclose(np.linalg.norm(batches[2][2], axis=1), 1.0, rtol=1e-5)
+
+
+def test_streaming_ground_truth_matches_full_brute_force() -> None:
+    corpus = bench.SyntheticCorpus(chunks=2300, dim=24, seed=1, words_per_chunk=8)
+    queries = bench.make_queries(corpus, 15, seed=1)
+    query_vectors = np.stack([query.vector for query in queries])
+
+    truth = bench.exact_top_k(corpus.iter_batches(), query_vectors, 5)
+
+    everything = np.concatenate([vectors for _, _, vectors in corpus.iter_batches()])
+    expected = np.argsort(-(query_vectors @ everything.T), axis=1, kind="stable")[:, :5]
+    np.testing.assert_array_equal(truth, expected)
+    assert all(query.text.split()[0] in corpus.chunk(query.source_index)[0] for query in queries)
+
+
+def test_recall_and_latency_summary() -> None:
+    assert bench.recall_at_k([[1, 2, 9], [4, 5, 6]], [[1, 2, 3], [4, 5, 6]], 3) == (2 / 3 + 1) / 2
+    summary = bench.latency_summary([float(value) for value in range(1, 101)])
+    assert summary["p50_ms"] == 50.5 and 95 <= summary["p95_ms"] <= 96 and summary["p99_ms"] > 99
+
+
+def test_replay_shares_queries_across_concurrent_sessions() -> None:
+    sessions: list[object] = []
+
+    class _Session:
+        async def __aenter__(self):
+            sessions.append(self)
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    async def search(db, query, k):
+        await asyncio.sleep(0)
+        return [len(query)] * k
+
+    queries = [bench.BenchmarkQuery(text="q" * n, vector=np.zeros(2), source_index=n) for n in range(1, 8)]
+    result = asyncio.run(bench.replay(search, queries, 2, concurrency=3, session_factory=_Session))
+
+    assert len(sessions) == 3
+    assert result.hits == [[n, n] for n in range(1, 8)]
+    assert len(result.latencies_ms) == 7 and result.qps > 0
@@ -0,0 +1,156 @@
+"""Tests for the corpus-generation keyed retrieval result cache."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import types
+from datetime import datetime
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+if "sentence_transformers" not in sys.modules:  # pragma: no cover - import shim
+    fake_sentence_transformers = types.ModuleType("sentence_transformers")
+    fake_sentence_transformers.SentenceTransformer = object
+    fake_sentence_transformers.CrossEncoder = object
+    sys.modules["sentence_transformers"] = fake_sentence_transformers
+
+from app.modules.knowledge_base import retrieval  # noqa: E402
+from app.modules.knowledge_base.repository import KnowledgeChunkRow, RetrievalFilters  # noqa: E402
+from app.modules.knowledge_base.retrieval_cache import CachedHit, RetrievalResultCache  # noqa: E402
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, object] = {}
+
+    async def ensure_connection(self) -> None:
+        return None
+
+    async def get(self, key: str):
+        return self.store.get(key)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(self.store.get(key) or 0) + amount
+        self.store[key] = str(value)
+        return value
+
+    async def get_json(self, key: str):
+        return self.store.get(key)
+
+    async def set_json(self, key: str, data, ttl=None) -> bool:
+        self.store[key] = data
+        return True
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_bumping_generation_changes_cache_key():
+    cache = RetrievalResultCache(_FakeRedis())
+    filters = RetrievalFilters.build(tags=["faq"])
+
+    first = _run(cache.generation())
+    key_before = cache.make_key(first, "hello  world", 5, filters, {"RAG_TOP_K": 5})
+    assert key_before == cache.make_key(first, "hello world", 5, filters, {"RAG_TOP_K": 5})
+
+    _run(cache.bump_generation())
+    second = _run(cache.generation())
+
+    assert second == first + 1
+    assert cache.make_key(second, "hello world", 5, filters, {"RAG_TOP_K": 5}) != key_before
+    assert cache.make_key(first, "hello world", 5, None, {"RAG_TOP_K": 5}) != key_before
+
+
+def test_failed_bump_disables_cache_until_retry_succeeds(monkeypatch):
+    from app.modules.knowledge_base import retrieval_cache
+
+    class _FlakyRedis(_FakeRedis):
+        def __init__(self, failures: int) -> None:
+            super().__init__()
+            self.failures = failures
+
+        async def incr(self, key: str, amount: int = 1):
+            if self.failures:
+                # RedisBase.incr 吞掉异常并返回 None
+                self.failures -= 1
+                return None
+            return await super().incr(key, amount)
+
+    monkeypatch.setattr(retrieval_cache, "BUMP_RETRY_INITIAL_SECONDS", 0.001)
+    redis = _FlakyRedis(failures=2)
+    cache = RetrievalResultCache(redis)
+
+    async def scenario():
+        stale_key = cache.make_key(await cache.generation(), "q", 5, None, {})
+        await cache.set(stale_key, [CachedHit(chunk_id=1, score=1.0, similarity=1.0, retrieval_source="vector")])
+
+        assert await cache.bump_generation() is None
+        assert cache.invalidation_pending()
+        assert await cache.generation() is None
+        assert await cache.get(stale_key) is None
+
+        await cache._pending_bump
+        assert not cache.invalidation_pending()
+        generation = await cache.generation()
+        assert generation == 1
+        assert cache.make_key(generation, "q", 5, None, {}) != stale_key
+
+    _run(scenario())
+
+
+def test_hybrid_search_cache_hit_rehydrates_rows_without_running_legs(monkeypatch):
+    cache = RetrievalResultCache(_FakeRedis())
+    config_map = {"RAG_TOP_K": 2}
+    key = cache.make_key(0, "q", 2, None, config_map)
+    _run(
+        cache.set(
+            key,
+            [
+                CachedHit(chunk_id=7, score=0.9, similarity=0.8, retrieval_source="hybrid"),
+                CachedHit(chunk_id=3, score=0.5, similarity=0.5, retrieval_source="bm25"),
+            ],
+        )
+    )
+
+    loaded: list[list[int]] = []
+
+    async def fake_rows(db, chunk_ids):
+        loaded.append(list(chunk_ids))
+        return {
+            chunk_id: KnowledgeChunkRow(
+                id=chunk_id,
+                document_id=None,
+                chunk_index=0,
+                content=f"chunk {chunk_id}",
+                language="en",
+                created_at=datetime(2024, 1, 1),
+            )
+            for chunk_id in chunk_ids
+        }
+
+    async def fake_settings():
+        return config_map
+
+    async def fail_leg(*args, **kwargs):  # pragma: no cover - must not run
+        raise AssertionError("retrieval legs should be skipped on a cache hit")
+
+    monkeypatch.setattr(retrieval, "get_retrieval_cache", lambda: cache)
+    monkeypatch.setattr(retrieval, "_load_dynamic_settings", fake_settings)
+    monkeypatch.setattr(retrieval, "_vector_leg", fail_leg)
+    monkeypatch.setattr(retrieval, "_bm25_leg", fail_leg)
+    monkeypatch.setattr(retrieval.crud_knowledge_base, "get_chunk_rows_by_ids", fake_rows)
+
+    result = _run(retrieval.hybrid_search(None, "q", 2))
+
+    assert loaded == [[7, 3]]
+    assert [item.chunk.id for item in result] == [7, 3]
+    assert result[0].retrieval_source == "hybrid"
@@ -0,0 +1,160 @@
+"""Tests for the streaming upload ingestion pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import sys
+import types
+
+import numpy as np
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+if "sentence_transformers" not in sys.modules:  # pragma: no cover - import shim
+    fake_sentence_transformers = types.ModuleType("sentence_transformers")
+    fake_sentence_transformers.SentenceTransformer = object
+    fake_sentence_transformers.CrossEncoder = object
+    sys.modules["sentence_transformers"] = fake_sentence_transformers
+
+from app.modules.knowledge_base import ingestion  # noqa: E402
+from app.modules.knowledge_base.ingest_extractor import IncrementalTextDecoder  # noqa: E402
+from app.modules.knowledge_base.ingest_splitter import SplitChunk  # noqa: E402
+
+
+class _FakeUpload:
+    def __init__(self, payload: bytes) -> None:
+        self._stream = io.BytesIO(payload)
+        self.reads: list[int] = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads.append(size)
+        return self._stream.read(size)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_incremental_decoder_handles_multibyte_split_across_reads():
+    payload = ("知识库" * 50).encode("utf-8")
+    decoder = IncrementalTextDecoder(sample_size=16)
+
+    text = "".join(decoder.feed(payload[i : i + 7]) for i in range(0, len(payload), 7))
+    text += decoder.finish()
+
+    assert text == "知识库" * 50
+
+
+def test_upload_segments_are_bounded_and_cut_on_paragraphs():
+    paragraphs = [f"paragraph {idx} " + "x" * 40 for idx in range(20)]
+    upload = _FakeUpload("\n\n".join(paragraphs).encode("utf-8"))
+
+    async def collect():
+        return [
+            segment
+            async for segment in ingestion._iter_upload_segments(upload, read_size=32, window_chars=200)
+        ]
+
+    segments = _run(collect())
+
+    assert len(segments) > 1
+    assert all(len(segment) <= 200 for segment in segments)
+    assert all(segment.endswith("\n\n") for segment in segments[:-1])
+    assert "".join(segments) == "\n\n".join(paragraphs)
+    assert set(upload.reads) == {32}
+
+
+def test_batch_writer_embeds_and_inserts_in_fixed_size_batches(monkeypatch):
+    encoded: list[int] = []
+    inserted: list[list[int]] = []
+
+    async def fake_encode_texts(texts):
+        encoded.append(len(texts))
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+    async def fake_bulk_create(db, document_id, payloads, *, commit=True):
+        assert commit is False
+        inserted.append([index for index, *_ in payloads])
+        return len(payloads)
+
+    monkeypatch.setattr(ingestion, "encode_texts", fake_encode_texts)
+    monkeypatch.setattr(
+        ingestion, "detect_language_meta_many", lambda texts: [{"language": "en"} for _ in texts]
+    )
+    monkeypatch.setattr(ingestion.crud_knowledge_base, "bulk_create_document_chunks", fake_bulk_create)
+
+    async def write():
+        writer = ingestion._ChunkBatchWriter(None, document_id=1, start_index=10, batch_size=3)
+        await writer.add(SplitChunk(content=f"chunk {idx}") for idx in range(4))
+        await writer.add([SplitChunk(content="tail")])
+        await writer.flush()
+        return writer.written
+
+    assert _run(write()) == 5
+    assert encoded == [3, 2]
+    assert inserted == [[10, 11, 12], [13, 14]]
+
+
+def test_overwrite_reuses_chunks_with_unchanged_content(monkeypatch):
+    encoded: list[str] = []
+    calls: dict[str, list] = {"reindex": [], "copy": [], "insert": [], "delete": []}
+
+    async def fake_encode_texts(texts):
+        encoded.extend(texts)
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+    async def fake_reindex(db, positions):
+        calls["reindex"].extend(positions)
+        return len(positions)
+
+    async def fake_copy(db, document_id, copies):
+        calls["copy"].extend(copies)
+        return len(copies)
+
+    async def fake_bulk_create(db, document_id, payloads, *, commit=True):
+        calls["insert"].extend((index, content) for index, content, *_ in payloads)
+        return len(payloads)
+
+    async def fake_delete(db, chunk_ids, *, commit=False):
+        calls["delete"].extend(chunk_ids)
+
+    crud = ingestion.crud_knowledge_base
+    monkeypatch.setattr(ingestion, "encode_texts", fake_encode_texts)
+    monkeypatch.setattr(
+        ingestion, "detect_language_meta_many", lambda texts: [{"language": "en"} for _ in texts]
+    )
+    monkeypatch.setattr(crud, "reindex_chunks", fake_reindex)
+    monkeypatch.setattr(crud, "copy_chunks", fake_copy)
+    monkeypatch.setattr(crud, "bulk_create_document_chunks", fake_bulk_create)
+    monkeypatch.setattr(crud, "delete_chunks_by_ids", fake_delete)
+
+    digest = ingestion.chunk_content_hash
+    reusable = ingestion._ReusableChunks(
+        [(101, digest("intro")), (102, digest("old body")), (103, digest("outro")), (104, None)]
+    )
+
+    async def write():
+        writer = ingestion._ChunkBatchWriter(
+            None, document_id=1, start_index=0, batch_size=2, reusable=reusable
+        )
+        new_texts = ["intro", "new body", "outro", "intro"]
+        await writer.add(SplitChunk(content=text) for text in new_texts)
+        await writer.finalize()
+        return writer
+
+    writer = _run(write())
+
+    assert encoded == ["new body"]
+    assert calls["reindex"] == [(101, 0), (103, 2)]
+    assert calls["copy"] == [(101, 3)]
+    assert calls["insert"] == [(1, "new body")]
+    assert sorted(calls["delete"]) == [102, 104]
+    assert (writer.written, writer.reused, writer.progress.embedded) == (4, 3, 1)
@@ -0,0 +1,89 @@
+"""Tests for batched search-text tokenization."""
+
+from __future__ import annotations
+
+import os
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+from app.modules.knowledge_base import tokenizer  # noqa: E402
+
+
+class _Token:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _FakePipeline:
+    def __init__(self) -> None:
+        self.pipe_calls: list[list[str]] = []
+
+    def _doc(self, text: str) -> list[_Token]:
+        # 每个字符一个词元
+        return [_Token(char) for char in text if not char.isspace()]
+
+    def __call__(self, text: str) -> list[_Token]:
+        return self._doc(text)
+
+    def pipe(self, texts, batch_size=64, n_process=1):
+        self.pipe_calls.append(list(texts))
+        return (self._doc(text) for text in texts)
+
+
+def test_batch_tokenization_pipes_cjk_once_and_trusts_known_language(monkeypatch):
+    pipeline = _FakePipeline()
+    monkeypatch.setattr(tokenizer, "_load_zh_pipeline", lambda: pipeline)
+
+    def fail_detect(*args, **kwargs):  # pragma: no cover - must not be called
+        raise AssertionError("language already known")
+
+    monkeypatch.setattr(tokenizer, "detect_language_meta", fail_detect)
+
+    texts = ["知识库", "Hello World", "", "検索"]
+    result = tokenizer.tokenize_many_for_search(texts, ["zh", "en", "en", "ja"])
+
+    assert result == ["知 识 库", "hello world", "", "検 索"]
+    assert pipeline.pipe_calls == [["知识库", "検索"]]
+
+
+def test_batch_tokenization_matches_single_text_api(monkeypatch):
+    pipeline = _FakePipeline()
+    monkeypatch.setattr(tokenizer, "_load_zh_pipeline", lambda: pipeline)
+
+    texts = ["混合 text", "Plain Words"]
+    languages = ["zh", None]
+    expected = [tokenizer.tokenize_for_search(text, lang) for text, lang in zip(texts, languages)]
+
+    assert tokenizer.tokenize_many_for_search(texts, languages) == expected
+
+
+def test_query_tokenization_is_cached(monkeypatch):
+    calls: list[str] = []
+
+    def fake_tokenize(text, language=None):
+        calls.append(text)
+        return text.lower()
+
+    tokenizer.tokenize_query_for_search.cache_clear()
+    monkeypatch.setattr(tokenizer, "tokenize_for_search", fake_tokenize)
+    try:
+        assert tokenizer.tokenize_query_for_search("Hello", "en") == "hello"
+        assert tokenizer.tokenize_query_for_search("Hello", "en") == "hello"
+        assert calls == ["Hello"]
+    finally:
+        tokenizer.tokenize_query_for_search.cache_clear()
+
+
+def test_known_language_skips_detection(monkeypatch):
+    def fail_detect(*args, **kwargs):  # pragma: no cover - must not be called
+        raise AssertionError("language already detected")
+
+    monkeypatch.setattr(tokenizer, "detect_language_meta", fail_detect)
+
+    assert tokenizer.tokenize_for_search("Hello World", "code", detect=False) == "hello world"
@@ -0,0 +1,53 @@
+"""Tests for startup model warm-up and readiness reporting."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PGADMIN_DEFAULT_EMAIL", "admin@example.com")
+os.environ.setdefault("PGADMIN_DEFAULT_PASSWORD", "password123")
+
+from app.modules.knowledge_base import warmup  # noqa: E402
+
+
+def _failing() -> bool:
+    raise RuntimeError("encoding download failed")
+
+
+def test_optional_failures_do_not_block_readiness(monkeypatch):
+    monkeypatch.setattr(warmup.settings, "MODEL_WARMUP_ENABLED", True)
+    monkeypatch.setattr(
+        warmup,
+        "_WARMUP_STEPS",
+        (("embedder", True, lambda: True), ("spacy", False, lambda: False), ("tiktoken", False, _failing)),
+    )
+
+    state = asyncio.run(warmup.warm_up_models())
+    snapshot = state.snapshot()
+
+    assert snapshot["ready"] is True
+    assert [(step["name"], step["status"]) for step in snapshot["steps"]] == [
+        ("embedder", "ready"),
+        ("spacy", "skipped"),
+        ("tiktoken", "failed"),
+    ]
+    assert snapshot["steps"][2]["error"] == "encoding download failed"
+
+
+def test_required_failure_keeps_process_not_ready(monkeypatch):
+    monkeypatch.setattr(warmup.settings, "MODEL_WARMUP_ENABLED", True)
+    monkeypatch.setattr(
+        warmup,
+        "_WARMUP_STEPS",
+        (("embedder", True, _failing), ("spacy", False, lambda: True), ("tiktoken", False, lambda: True)),
+    )
+
+    state = asyncio.run(warmup.warm_up_models())
+
+    assert state.finished and not state.ready
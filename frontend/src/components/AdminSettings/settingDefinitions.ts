@@ -126,6 +126,15 @@ export const ADMIN_SETTING_DEFINITIONS: AdminSettingDefinition[] = [
     type: 'int',
     min: 0,
   },
+  {
+    key: 'RAG_CONTEXT_NEIGHBORS',
+    label: '上下文相邻块数量',
+    description:
+      '组装回答上下文时，为每个命中块额外拉取前后各 N 个相邻块（一次批量查询），并与命中块合并、去除重叠文本。0 表示只合并已命中的相邻块；值越大上下文越连贯但提示词越长。',
+    type: 'int',
+    min: 0,
+    max: 3,
+  },
   {
     key: 'BM25_WEIGHT',
     label: 'BM25 融合权重',
@@ -137,12 +146,22 @@ export const ADMIN_SETTING_DEFINITIONS: AdminSettingDefinition[] = [
   },
   {
     key: 'BM25_MIN_RANK',
-    label: 'BM25 最小 rank 阈值（ts_rank_cd）',
-    description: 'BM25 原始得分低于该阈值的候选会被忽略，用于过滤低质量关键字命中。',
+    label: 'BM25 最小得分阈值（ts_rank_cd）',
+    description:
+      'BM25_SCORER=ts_rank_cd 时生效：原始得分低于该阈值的候选会被忽略。ts_rank_cd 得分通常小于 1。',
     type: 'float',
     min: 0,
     step: 0.01,
   },
+  {
+    key: 'BM25_OKAPI_MIN_RANK',
+    label: 'BM25 最小得分阈值（Okapi）',
+    description:
+      '默认的 Okapi BM25 打分时生效：得分低于该阈值的候选会被忽略。Okapi 得分通常在 0~数十之间，单个常见词的命中往往低于 1。',
+    type: 'float',
+    min: 0,
+    step: 0.1,
+  },
   {
     key: 'RAG_USE_LINGUA',
     label: '启用 Lingua 语言检测',
@@ -157,6 +176,22 @@ export const ADMIN_SETTING_DEFINITIONS: AdminSettingDefinition[] = [
     type: 'int',
     min: 1,
   },
+  {
+    key: 'INGEST_CHUNK_TOKENS',
+    label: '分块大小（token）',
+    description: '文档摄入时每个块的最大 token 数，仅影响之后新摄入或覆盖重建的文档。值越大上下文越完整但检索粒度更粗；值越小定位更精确但块数量增加。',
+    type: 'int',
+    min: 64,
+    max: 8192,
+  },
+  {
+    key: 'INGEST_CHUNK_OVERLAP',
+    label: '分块重叠（token）',
+    description: '相邻块之间重叠的 token 数，实际生效值不超过分块大小的一半。适当重叠可减少句子被截断造成的信息丢失。',
+    type: 'int',
+    min: 0,
+    max: 2048,
+  },
 ];
 
 export const ADMIN_SETTING_DEFINITION_MAP = ADMIN_SETTING_DEFINITIONS.reduce<Record<AdminSettingKey, AdminSettingDefinition>>(
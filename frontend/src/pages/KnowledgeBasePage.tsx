@@ -21,7 +21,7 @@ import {
   KnowledgeSearchResult,
   KnowledgeDocumentCreate,
   KnowledgeDocumentRead,
-  KnowledgeIngestResult,
+  KnowledgeIngestJobAccepted,
 } from '../types';
 import KnowledgeSearch from '../components/Knowledge/KnowledgeSearch';
 import DocumentList from '../components/Knowledge/DocumentList';
@@ -88,22 +88,22 @@ const KnowledgeBasePage: React.FC = () => {
   const handleIngest = async ({ content, file, overwrite }: { content: string; file: File | null; overwrite: boolean }) => {
     if (!ingestTarget) return;
     try {
-      let data: KnowledgeIngestResult;
+      let data: KnowledgeIngestJobAccepted;
       if (file) {
         const formData = new FormData();
         formData.append('file', file);
         formData.append('overwrite', overwrite ? 'true' : 'false');
-        data = await api.post<KnowledgeIngestResult>(
+        data = await api.post<KnowledgeIngestJobAccepted>(
           `${docsUrl}/${ingestTarget.id}/ingest/upload`,
           formData
         );
       } else {
-        data = await api.post<KnowledgeIngestResult>(`${docsUrl}/${ingestTarget.id}/ingest`, {
+        data = await api.post<KnowledgeIngestJobAccepted>(`${docsUrl}/${ingestTarget.id}/ingest`, {
           content,
           overwrite,
         });
       }
-      success(`注入成功，生成 ${data.chunks} 个分块`);
+      success(`已提交注入任务（任务 ID: ${data.job_id}），后台处理中`);
       setIngestOpen(false);
     } catch (e) {
       error(extractErrorMessage(e as ApiError) || '注入失败');
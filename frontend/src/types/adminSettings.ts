@@ -11,12 +11,16 @@ export type AdminSettingKey =
   | 'RAG_RERANK_SCORE_THRESHOLD'
   | 'RAG_CONTEXT_TOKEN_BUDGET'
   | 'RAG_CONTEXT_MAX_EVIDENCE'
+  | 'RAG_CONTEXT_NEIGHBORS'
   | 'RAG_IVFFLAT_PROBES'
   | 'RAG_USE_LINGUA'
   | 'RAG_STRATEGY_LLM_CLASSIFIER_CONFIDENCE_THRESHOLD'
   | 'BM25_TOP_K'
   | 'BM25_WEIGHT'
-  | 'BM25_MIN_RANK';
+  | 'BM25_MIN_RANK'
+  | 'BM25_OKAPI_MIN_RANK'
+  | 'INGEST_CHUNK_TOKENS'
+  | 'INGEST_CHUNK_OVERLAP';
 
 export type AdminSettingValue = number | string | boolean | null;
 
@@ -22,9 +22,12 @@ export interface KnowledgeDocumentIngestRequest {
   overwrite: boolean;
 }
 
-export interface KnowledgeIngestResult {
+export interface KnowledgeIngestJobAccepted {
+  job_id: string;
   document_id: number;
-  chunks: number;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  status_url: string;
+  stream_url: string;
 }
 
 export interface KnowledgeChunkRead {